@@ -0,0 +1,137 @@
+"""
+Minimal asyncio HTTP/1.1 load driver, shared by the load benchmarks of
+book-catalog-api and todo-backend (their benchmarks/common.py put this
+directory on sys.path). It keeps one connection per client
+and parses only the status line and Content-Length, so a single driver
+process can saturate a server with thousands of clients (general purpose
+clients such as httpx become the bottleneck well before that).
+"""
+import asyncio
+import random
+import socket
+import time
+
+
+class LoadResult:
+    def __init__(self, latencies, errors, elapsed):
+        self.latencies = sorted(latencies)
+        self.errors = errors
+        self.elapsed = elapsed
+
+    @property
+    def requests(self):
+        return len(self.latencies)
+
+    @property
+    def rps(self):
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, p):
+        """Latency in ms at quantile p (0-1)"""
+        if not self.latencies:
+            return float('nan')
+        return self.latencies[min(len(self.latencies) - 1, int(len(self.latencies) * p))]
+
+    def summary(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'rps': round(self.rps, 1),
+            'p50_ms': round(self.percentile(0.50), 2),
+            'p95_ms': round(self.percentile(0.95), 2),
+            'p99_ms': round(self.percentile(0.99), 2),
+        }
+
+
+async def _read_response(reader):
+    """Read one response; return (status, keep_alive)"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    version, status = lines[0].split(' ', 2)[:2]
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+        keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+    else:
+        # No length: the body runs until the server closes the connection
+        await reader.read()
+        keep_alive = False
+    return int(status), keep_alive
+
+
+async def _client(host, port, next_request, deadline, think_time, seed, latencies, errors):
+    rng = random.Random(seed)
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        method, path, body, expected, *extra = next_request(rng)
+        headers = extra[0] if extra else {}
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+            head = f'{method} {path} HTTP/1.1\r\nHost: {host}\r\n'
+            head += ''.join(f'{name}: {value}\r\n' for name, value in headers.items())
+            if body is not None:
+                head += f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n'
+            writer.write(head.encode('latin-1') + b'\r\n' + (body or b''))
+            status, keep_alive = await _read_response(reader)
+            if status in expected:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors.append(status)
+            if not keep_alive:
+                writer.close()
+                reader = writer = None
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            errors.append(None)
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.01)
+        if think_time:
+            # Slow clients keep their connection open while idle
+            await asyncio.sleep(rng.uniform(0, 2 * think_time))
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(host, port, next_request, clients=50, duration=10.0, think_time=0.0):
+    """
+    Drive `clients` concurrent keep-alive clients for `duration` seconds.
+    next_request(rng) returns (method, path, body_bytes_or_None, expected_statuses)
+    with an optional fifth item: a dict of extra request headers.
+    """
+    latencies, errors = [], []
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(
+        _client(host, port, next_request, deadline, think_time, seed, latencies, errors)
+        for seed in range(clients)
+    ))
+    return LoadResult(latencies, len(errors), time.perf_counter() - start)
+
+
+def free_port():
+    """Pick an unused local TCP port for a server under test"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, process=None, timeout=15.0):
+    """Block until something accepts connections on port, or raise RuntimeError"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f'server exited with status {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port)).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'nothing listening on port {port} after {timeout:.0f}s')
@@ -2,18 +2,44 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from config import Config
+from app.cache import BookCache
+from app.metrics import RequestMetrics
+from app.replicas import ReplicaRouter, RoutingSession, configure_replica_binds
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
+cache = BookCache()
+replicas = ReplicaRouter()
+metrics = RequestMetrics()
 
-def create_app(config_class=Config):
+def create_app(config_class=Config, database_uri=None, replica_uris=None):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    if database_uri is not None:
+        app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    if replica_uris is not None:
+        app.config['SQLALCHEMY_REPLICA_URIS'] = list(replica_uris)
 
+    configure_replica_binds(app)
     db.init_app(app)
+    replicas.init_app(app)
+    from app.database import init_sqlite_immediate_writes, init_sqlite_pragmas
+    init_sqlite_pragmas(app)
+    init_sqlite_immediate_writes(app)
     migrate.init_app(app, db)
+    cache.init_app(app)
+
+    from app.serialization import init_json_provider
+    init_json_provider(app)
+    metrics.init_app(app)
+
+    from app.jobs import job_runner
+    job_runner.init_app(app)
 
     from app.routes import bp as api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
 
+    from app.cli import books_cli
+    app.cli.add_command(books_cli)
+
     return app
\ No newline at end of file
@@ -0,0 +1,221 @@
+"""
+ASGI variant of the book API, for serving many concurrent slow clients
+from one process. It reuses the Book model, BookSchema, filters, search
+and keyset pagination of the Flask app, but runs queries on an async
+engine (aiosqlite for SQLite), so a waiting request costs a coroutine
+instead of a worker thread.
+
+It serves the core CRUD and list endpoints with cursor pagination only;
+the response cache, ETags, export and bulk endpoints stay on the WSGI app.
+Run it with: `uvicorn asgi:app`
+"""
+import json
+from contextlib import asynccontextmanager
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from config import Config
+from app.database import sqlite_pragma_listener
+from app.models import Book
+from app.routes import SORT_FIELDS, parse_book_filters
+from app.schemas import BookSchema
+from app.search import SEARCH_TABLE, apply_search
+from app.serialization import book_columns, rows_to_dicts
+from app.utils import DEFAULT_PER_PAGE, apply_filters, apply_range, build_envelope, keyset_query, keyset_page
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+book_schema = BookSchema()
+
+def async_database_uri(config):
+    """ASYNC_DATABASE_URI if set, else SQLALCHEMY_DATABASE_URI with the aiosqlite driver"""
+    uri = config.get('ASYNC_DATABASE_URI')
+    if uri:
+        return uri
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    if uri.startswith('sqlite://'):
+        return 'sqlite+aiosqlite://' + uri[len('sqlite://'):]
+    raise ValueError('Set ASYNC_DATABASE_URI to an async driver URL for this database')
+
+
+class EnvelopeResponse(JSONResponse):
+    """Compact JSON with sorted keys, matching the Flask app's output"""
+
+    def render(self, content):
+        return json.dumps(content, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+class OrjsonEnvelopeResponse(EnvelopeResponse):
+    """EnvelopeResponse encoded by orjson, used when JSON_PROVIDER = 'orjson'"""
+
+    def render(self, content):
+        return orjson.dumps(content, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+
+def response_class(config):
+    """The envelope response class for the JSON_PROVIDER config value, as in init_json_provider"""
+    provider = config.get('JSON_PROVIDER', 'default')
+    if provider == 'orjson':
+        if orjson is None:
+            raise RuntimeError("JSON_PROVIDER='orjson' requires the orjson package")
+        return OrjsonEnvelopeResponse
+    if provider != 'default':
+        raise ValueError(f'Unknown JSON_PROVIDER: {provider}')
+    return EnvelopeResponse
+
+def envelope(request, data, status=200, message=None, pagination=None):
+    """Same envelope as app.utils.format_response"""
+    response = build_envelope(data, status, message, pagination)
+    return request.app.state.response_class(response, status_code=status)
+
+def _not_found(request):
+    return envelope(request, None, 404, message='Book not found')
+
+async def _json_body(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+async def list_books(request):
+    args = request.query_params
+    try:
+        filters, year_from, year_to = parse_book_filters(args)
+        statement = select(*book_columns())
+        statement = apply_filters(statement, Book, filters)
+        statement = apply_range(statement, Book, 'publication_year', year_from, year_to)
+
+        sort_by = args.get('sort_by')
+        sort_order = args.get('sort_order', 'asc').lower()
+        if sort_by is not None and sort_by not in SORT_FIELDS:
+            raise ValueError(f"sort_by must be one of: {', '.join(SORT_FIELDS)}")
+        if sort_order not in ('asc', 'desc'):
+            raise ValueError('sort_order must be asc or desc')
+
+        search_query = args.get('q')
+        sort_columns = {}
+        if search_query:
+            statement, rank = apply_search(statement, search_query, request.app.state.search_index)
+            if rank is not None and sort_by is None:
+                sort_by, sort_columns = 'rank', {'rank': rank}
+
+        try:
+            per_page = int(args.get('per_page', DEFAULT_PER_PAGE))
+        except ValueError:
+            raise ValueError('per_page must be an integer')
+        after = args.get('after')
+        statement, page = keyset_query(
+            statement, Book, per_page, after=after,
+            sort_by=sort_by, sort_order=sort_order, sort_columns=sort_columns
+        )
+    except ValueError as e:
+        return envelope(request, None, 400, message=str(e))
+
+    async with request.app.state.sessions() as session:
+        rows = (await session.execute(statement)).all()
+    result = keyset_page(rows, page)
+
+    pagination = {key: value for key, value in result.items() if key != 'items'}
+    links = {
+        'self': str(request.url),
+        'first': str(request.url.remove_query_params('after'))
+    }
+    if result['next_cursor']:
+        links['next'] = str(request.url.include_query_params(after=result['next_cursor']))
+    pagination['links'] = links
+    return envelope(request, rows_to_dicts(result['items']), pagination=pagination)
+
+async def get_book(request):
+    async with request.app.state.sessions() as session:
+        book = await session.get(Book, request.path_params['id'])
+        if book is None:
+            return _not_found(request)
+        return envelope(request, book_schema.dump(book))
+
+async def create_book(request):
+    data = await _json_body(request)
+    errors = book_schema.validate(data) if isinstance(data, dict) else {'_schema': ['Invalid input type.']}
+    if errors:
+        return envelope(request, errors, 400, message='Validation failed')
+
+    async with request.app.state.sessions() as session:
+        book = Book(
+            title=data['title'],
+            author=data['author'],
+            genre=data['genre'],
+            publication_year=data['publication_year'],
+            availability=data.get('availability', True)
+        )
+        session.add(book)
+        await session.commit()
+        return envelope(request, book_schema.dump(book), 201, message='Book created successfully')
+
+async def update_book(request):
+    data = await _json_body(request)
+    errors = book_schema.validate(data) if isinstance(data, dict) else {'_schema': ['Invalid input type.']}
+
+    async with request.app.state.sessions() as session:
+        book = await session.get(Book, request.path_params['id'])
+        if book is None:
+            return _not_found(request)
+        if errors:
+            return envelope(request, errors, 400, message='Validation failed')
+
+        book.title = data['title']
+        book.author = data['author']
+        book.genre = data['genre']
+        book.publication_year = data['publication_year']
+        book.availability = data.get('availability', book.availability)
+        await session.commit()
+        return envelope(request, book_schema.dump(book), message='Book updated successfully')
+
+async def delete_book(request):
+    async with request.app.state.sessions() as session:
+        book = await session.get(Book, request.path_params['id'])
+        if book is None:
+            return _not_found(request)
+        await session.delete(book)
+        await session.commit()
+    return Response(status_code=204)
+
+
+def create_asgi_app(config_class=Config, database_uri=None):
+    """Build the Starlette app; database_uri overrides the config like in create_app"""
+    config = {key: getattr(config_class, key) for key in dir(config_class) if key.isupper()}
+    if database_uri is not None:
+        config['SQLALCHEMY_DATABASE_URI'] = database_uri
+        config['ASYNC_DATABASE_URI'] = None
+
+    engine = create_async_engine(async_database_uri(config), **(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}))
+    if engine.dialect.name == 'sqlite' and config.get('SQLITE_PRAGMAS'):
+        event.listen(engine.sync_engine, 'connect', sqlite_pragma_listener(config['SQLITE_PRAGMAS']))
+
+    @asynccontextmanager
+    async def lifespan(app):
+        app.state.search_index = False
+        if engine.dialect.name == 'sqlite':
+            async with engine.connect() as connection:
+                found = await connection.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {'name': SEARCH_TABLE}
+                )
+                app.state.search_index = found.first() is not None
+        yield
+        await engine.dispose()
+
+    routes = [
+        Route('/api/books', list_books, methods=['GET']),
+        Route('/api/books', create_book, methods=['POST']),
+        Route('/api/books/{id:int}', get_book, methods=['GET']),
+        Route('/api/books/{id:int}', update_book, methods=['PUT']),
+        Route('/api/books/{id:int}', delete_book, methods=['DELETE']),
+    ]
+    app = Starlette(routes=routes, lifespan=lifespan)
+    app.state.engine = engine
+    app.state.response_class = response_class(config)
+    app.state.sessions = async_sessionmaker(engine, expire_on_commit=False)
+    return app
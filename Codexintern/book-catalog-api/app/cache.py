@@ -0,0 +1,246 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    In-process LRU cache with a per-entry TTL.
+    Safe to share between the threads of one worker process.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        # Counters live outside the LRU so they are never evicted
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._counters.clear()
+
+
+class LocalSharedStore:
+    """
+    Stand-in for a shared key-value server such as Redis, exposing the
+    subset of the redis-py client API that SharedCache uses. Values are
+    stored as bytes so anything that works here also works over the wire.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires < time.monotonic():
+                del self._data[name]
+                return None
+            return value
+
+    def set(self, name, value, ex=None):
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        expires = time.monotonic() + ex if ex else None
+        with self._lock:
+            self._data[name] = (value, expires)
+        return True
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(1 for name in names if self._data.pop(name, None) is not None)
+
+    def incr(self, name):
+        with self._lock:
+            value, expires = self._data.get(name, (b'0', None))
+            value = int(value) + 1
+            self._data[name] = (str(value).encode('utf-8'), expires)
+            return value
+
+    def scan_iter(self, match=None):
+        prefix = match.rstrip('*') if match else ''
+        with self._lock:
+            names = [name for name in self._data if name.startswith(prefix)]
+        return iter(names)
+
+
+class SharedCache:
+    """Cache backed by a redis-py compatible client shared by all workers"""
+
+    def __init__(self, client, prefix='books:', ttl=60):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return None if value is None else json.loads(value)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, json.dumps(value, separators=(',', ':')), ex=self.ttl)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+    def counter(self, key):
+        value = self.client.get(self.prefix + key)
+        return 0 if value is None else int(value)
+
+    def clear(self):
+        names = list(self.client.scan_iter(match=self.prefix + '*'))
+        if names:
+            self.client.delete(*names)
+
+
+class BookCache:
+    """
+    Read-through cache for serialized book responses.
+
+    Single books are keyed by id and list responses by their normalized
+    query string, both plus a catalog generation number; every write bumps
+    the generation, which orphans all cached entries at once without having
+    to enumerate them. Keys are computed before the database is read, so a
+    request that read a row before a concurrent write invalidated it stores
+    its stale payload under the old generation, where nothing reads it.
+    """
+
+    GENERATION_KEY = 'generation'
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('BOOK_CACHE_BACKEND')
+        ttl = app.config.get('BOOK_CACHE_TTL', 60)
+
+        if backend == 'memory':
+            self.backend = LRUCache(app.config.get('BOOK_CACHE_SIZE', 1024), ttl)
+        elif backend == 'shared':
+            client = app.config.get('BOOK_CACHE_CLIENT')
+            if client is None:
+                try:
+                    import redis
+                except ImportError as e:
+                    raise RuntimeError(
+                        "BOOK_CACHE_BACKEND='shared' needs BOOK_CACHE_CLIENT or the redis package"
+                    ) from e
+                client = redis.Redis.from_url(app.config['BOOK_CACHE_URL'])
+            self.backend = SharedCache(client, app.config.get('BOOK_CACHE_PREFIX', 'books:'), ttl)
+        elif backend:
+            raise ValueError(f'Unknown BOOK_CACHE_BACKEND: {backend}')
+        else:
+            self.backend = None
+
+        app.extensions['book_cache'] = self
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        if not self.enabled:
+            return None
+        value = self.backend.get(key)
+        self._count(value is not None)
+        return value
+
+    def set(self, key, value):
+        if self.enabled and value is not None:
+            self.backend.set(key, value)
+
+    def generation(self):
+        return self.backend.counter(self.GENERATION_KEY) if self.enabled else 0
+
+    def book_key(self, book_id):
+        """Key a single book by id and generation"""
+        if not self.enabled:
+            return None
+        return f'book:{self.generation()}:{book_id}'
+
+    def list_key(self, host, args):
+        """Key a list response by host, sorted query arguments and generation"""
+        if not self.enabled:
+            return None
+        generation = self.generation()
+        normalized = '&'.join(f'{key}={value}' for key, value in sorted(args.items(multi=True)))
+        return f'books:{generation}:{host}?{normalized}'
+
+    def invalidate(self):
+        """Orphan every cached book and list; call after the write commits"""
+        if not self.enabled:
+            return
+        self.backend.incr(self.GENERATION_KEY)
+
+    def clear(self):
+        if self.enabled:
+            self.backend.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__ if self.enabled else None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0
+        }
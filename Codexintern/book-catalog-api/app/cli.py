@@ -0,0 +1,38 @@
+import os
+import click
+from flask.cli import AppGroup
+from app.importer import IMPORT_FORMATS, CatalogImportError, import_books
+
+books_cli = AppGroup('books', help='Manage the book catalog.')
+
+
+@books_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(IMPORT_FORMATS),
+              help='File format (default: from the extension; .ndjson counts as jsonl).')
+@click.option('--chunk-size', default=10000, show_default=True,
+              help='Records validated and inserted per transaction.')
+@click.option('--workers', type=int, default=None,
+              help='Validation processes (default: one per CPU; 0 validates in-process).')
+@click.option('--rejects', type=click.File('a', encoding='utf-8'),
+              help='Append rejected records and their errors to this file as JSON lines.')
+@click.option('--restart', is_flag=True,
+              help='Ignore the checkpoint and import the file from the beginning.')
+def import_command(path, file_format, chunk_size, workers, rejects, restart):
+    """Import books from a CSV or JSON Lines file, resuming an interrupted import."""
+    def progress(stats):
+        click.echo(f'{stats.rows_read:>12,} records  {stats.inserted:>12,} inserted  '
+                   f'{stats.rejected:>10,} rejected  {stats.rows_per_second:>10,.0f} rows/s', err=True)
+
+    try:
+        stats = import_books(path, file_format, chunk_size, workers, restart, progress, rejects)
+    except (CatalogImportError, ValueError) as e:
+        raise click.ClickException(str(e))
+
+    if stats.already_imported:
+        click.echo(f'{os.path.basename(path)} was already imported; use --restart to import it again.')
+        return
+    if stats.resumed_from:
+        click.echo(f'Resumed after record {stats.resumed_from:,}.')
+    click.echo(f'Imported {stats.inserted:,} books from {stats.rows_read:,} records '
+               f'({stats.rejected:,} rejected) in {stats.elapsed:.1f}s.')
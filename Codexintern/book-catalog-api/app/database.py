@@ -0,0 +1,48 @@
+from flask import has_request_context, request
+from sqlalchemy import event
+from app import db
+from app.replicas import READ_METHODS
+
+def sqlite_pragma_listener(pragmas):
+    """Build a connect event listener that runs the given pragmas"""
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+    return on_connect
+
+def init_sqlite_pragmas(app):
+    """Run the SQLITE_PRAGMAS config on every new connection of the app's SQLite engines"""
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if not pragmas:
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', sqlite_pragma_listener(pragmas))
+
+def _begin(connection):
+    # pysqlite skips its own deferred BEGIN when a transaction is already open
+    if has_request_context() and request.method not in READ_METHODS:
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+
+def init_sqlite_immediate_writes(app):
+    """
+    With SQLITE_IMMEDIATE_WRITES, requests that may write open their
+    transaction with BEGIN IMMEDIATE. Their reads (e.g. get_or_404 before an
+    UPDATE) then see the rows they go on to write, and a writer waits for
+    the lock in busy_timeout when the request starts rather than halfway
+    through. Readers are not blocked in WAL mode; work outside requests
+    keeps the driver's deferred BEGIN.
+    """
+    if not app.config.get('SQLITE_IMMEDIATE_WRITES'):
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'begin', _begin)
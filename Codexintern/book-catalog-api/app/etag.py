@@ -0,0 +1,56 @@
+import hashlib
+from sqlalchemy import DDL, event, select
+from app import db
+from app.models import Book, CatalogVersion
+
+# Triggers keep Book.version and the catalog-wide counter current for
+# every writer (ORM, bulk statements, imports), not just the API routes.
+# They only exist on SQLite; elsewhere both stay put and ETags are off.
+VERSION_DDL = [
+    """CREATE TRIGGER IF NOT EXISTS book_version_au AFTER UPDATE ON book
+    WHEN new.version = old.version BEGIN
+        UPDATE book SET version = old.version + 1 WHERE id = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS catalog_version_ai AFTER INSERT ON book BEGIN
+        UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS catalog_version_au AFTER UPDATE ON book BEGIN
+        UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS catalog_version_ad AFTER DELETE ON book BEGIN
+        UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+    END""",
+]
+
+event.listen(
+    CatalogVersion.__table__, 'after_create',
+    DDL("INSERT INTO catalog_version (id, version) VALUES (1, 0)").execute_if(dialect='sqlite')
+)
+# On the metadata rather than a table, so both tables exist whatever order
+# create_all makes them in
+for statement in VERSION_DDL:
+    event.listen(db.metadata, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+def etags_enabled():
+    """Whether the version triggers exist, i.e. the database is SQLite"""
+    return db.engine.dialect.name == 'sqlite'
+
+def current_catalog_version(primary=False):
+    """
+    Read the catalog-wide change counter (a primary key lookup), from the
+    database the request reads from or, with primary=True, the primary
+    """
+    return db.session.execute(
+        select(CatalogVersion.version).where(CatalogVersion.id == 1),
+        bind_arguments={'bind': db.engine} if primary else None
+    ).scalar() or 0
+
+def book_etag(book_id, version):
+    """Strong ETag for a single book representation"""
+    return f'book-{book_id}-v{version}'
+
+def list_etag(catalog_version, path, args):
+    """Strong ETag for a list response: catalog version plus normalized query"""
+    normalized = '&'.join(f'{key}={value}' for key, value in sorted(args.items(multi=True)))
+    digest = hashlib.sha1(f'{path}?{normalized}'.encode('utf-8')).hexdigest()[:16]
+    return f'books-v{catalog_version}-{digest}'
@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+from sqlalchemy import select
+from app import db
+from app.models import Book
+
+# Column order matches BookSchema so exports look like API responses
+EXPORT_COLUMNS = ['id', 'title', 'author', 'genre', 'publication_year', 'availability']
+
+EXPORT_FORMATS = {
+    'jsonl': 'application/x-ndjson',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'json': 'application/json',
+}
+
+def iter_book_rows(whereclause=None, batch_size=1000):
+    """
+    Yield books as plain dicts straight from a server-side cursor,
+    holding at most `batch_size` rows in memory at a time
+    """
+    columns = [getattr(Book, name) for name in EXPORT_COLUMNS]
+    statement = select(*columns).order_by(Book.id)
+    if whereclause is not None:
+        statement = statement.where(whereclause)
+
+    result = db.session.execute(statement.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        for row in partition:
+            yield dict(zip(EXPORT_COLUMNS, row))
+
+def _chunked(lines, chunk_size):
+    """Join encoded lines into chunks so each write carries many rows"""
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+def encode_jsonl(rows, chunk_size=500):
+    """Encode rows as JSON Lines, one object per line"""
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    return _chunked((dumps(row) + '\n' for row in rows), chunk_size)
+
+def encode_json(rows, chunk_size=500):
+    """Encode rows as a single JSON array without building it in memory"""
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+    def lines():
+        yield '['
+        for index, row in enumerate(rows):
+            yield (',' if index else '') + dumps(row)
+        yield ']\n'
+
+    return _chunked(lines(), chunk_size)
+
+def encode_csv(rows, chunk_size=500):
+    """Encode rows as CSV with a header line"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def lines():
+        writer.writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        for row in rows:
+            row['availability'] = 'true' if row['availability'] else 'false'
+            writer.writerow([row[name] for name in EXPORT_COLUMNS])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    return _chunked(lines(), chunk_size)
+
+ENCODERS = {
+    'jsonl': encode_jsonl,
+    'ndjson': encode_jsonl,
+    'csv': encode_csv,
+    'json': encode_json,
+}
@@ -0,0 +1,113 @@
+from flask import current_app
+from sqlalchemy import DDL, case, event, func, select, text
+from app import db
+from app.models import Book, BookFacet
+
+FACETS = ('genre', 'decade', 'availability')
+
+# SQL for each facet's value, as the triggers store it in book_facet.value
+FACET_SQL = {
+    'genre': '{row}.genre',
+    'decade': '({row}.publication_year / 10) * 10',
+    'availability': "CASE WHEN {row}.availability THEN 'true' ELSE 'false' END",
+}
+
+
+def _adjust(row, delta):
+    return '\n        '.join(
+        f"INSERT INTO book_facet (facet, value, count) VALUES ('{facet}', {sql.format(row=row)}, {delta})"
+        " ON CONFLICT (facet, value) DO UPDATE SET count = count + excluded.count;"
+        for facet, sql in FACET_SQL.items()
+    )
+
+
+# Triggers keep the counts current for every writer (API, bulk endpoints,
+# imports), so an unfiltered facet request reads a handful of rows instead
+# of grouping the whole catalog. Values whose count drops to 0 stay in the
+# table and are skipped on read.
+FACET_DDL = [
+    f"""CREATE TRIGGER IF NOT EXISTS book_facet_ai AFTER INSERT ON book BEGIN
+        {_adjust('new', 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS book_facet_ad AFTER DELETE ON book BEGIN
+        {_adjust('old', -1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS book_facet_au AFTER UPDATE OF genre, publication_year, availability ON book BEGIN
+        {_adjust('old', -1)}
+        {_adjust('new', 1)}
+    END""",
+]
+
+# Counts for books that already exist (migrations, rebuild_facet_counts)
+FACET_BACKFILL = [
+    f"""INSERT INTO book_facet (facet, value, count)
+        SELECT '{facet}', {sql.format(row='book')}, COUNT(*) FROM book GROUP BY 2"""
+    for facet, sql in FACET_SQL.items()
+]
+
+# On the metadata, so book and book_facet both exist whatever order create_all makes them in
+for statement in FACET_DDL:
+    event.listen(db.metadata, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+# The same values as SQLAlchemy expressions, for grouped queries over filtered results
+FACET_COLUMNS = {
+    'genre': Book.genre,
+    'decade': Book.publication_year // 10 * 10,
+    'availability': case((Book.availability, 'true'), else_='false'),
+}
+
+
+def facet_counts_maintained(app=None):
+    """
+    Check whether the facet triggers exist in the app's database. They only
+    appear through a migration, so the answer is looked up once per app.
+    """
+    app = app or current_app
+    maintained = app.extensions.get('facet_counts_maintained')
+    if maintained is None:
+        maintained = db.engine.dialect.name == 'sqlite' and db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'book_facet_ai'")
+        ).first() is not None
+        app.extensions['facet_counts_maintained'] = maintained
+    return maintained
+
+
+def rebuild_facet_counts():
+    """Recount every facet from the book table"""
+    db.session.execute(BookFacet.__table__.delete())
+    for statement in FACET_BACKFILL:
+        db.session.execute(text(statement))
+    db.session.commit()
+
+
+def _format(counts):
+    """Turn {facet: {value: count}} into the response shape, typed and ordered"""
+    return {
+        'genre': [{'value': value, 'count': count}
+                  for value, count in sorted(counts['genre'].items(), key=lambda item: (-item[1], item[0]))],
+        'decade': [{'value': int(value), 'count': count}
+                   for value, count in sorted(counts['decade'].items(), key=lambda item: int(item[0]))],
+        'availability': [{'value': value == 'true', 'count': count}
+                         for value, count in sorted(counts['availability'].items(), reverse=True)],
+        'total': sum(counts['availability'].values()),
+    }
+
+
+def stored_facet_counts():
+    """Facet counts for the whole catalog, read from book_facet"""
+    counts = {facet: {} for facet in FACETS}
+    rows = db.session.execute(
+        select(BookFacet.facet, BookFacet.value, BookFacet.count).where(BookFacet.count > 0)
+    )
+    for facet, value, count in rows:
+        counts[facet][value] = count
+    return _format(counts)
+
+
+def grouped_facet_counts(query):
+    """Facet counts for the books a (filtered) Book query selects, one GROUP BY per facet"""
+    counts = {}
+    for facet, column in FACET_COLUMNS.items():
+        rows = query.with_entities(column, func.count()).group_by(column).order_by(None)
+        counts[facet] = {str(value): count for value, count in rows}
+    return _format(counts)
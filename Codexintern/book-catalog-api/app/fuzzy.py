@@ -0,0 +1,253 @@
+"""
+Typo-tolerant search over Book.title and Book.author.
+
+Each word of the query is compared with the terms of the FTS5 index by
+trigram similarity, so "tolkein" finds the term "tolkien" and "orwel"
+finds "orwell"; books are then fetched through book_fts using the
+closest terms. Only the vocabulary (distinct title and author words)
+is held in memory, which is far smaller than the catalog. Books stay
+current for every writer through the FTS triggers, and the vocabulary
+is re-read from book_fts_vocab when the catalog version changes.
+"""
+import logging
+import threading
+import time
+import unicodedata
+from array import array
+from collections import defaultdict
+from itertools import product
+import numpy as np
+from flask import current_app
+from sqlalchemy import text
+from app import db
+from app.etag import current_catalog_version
+from app.models import Book
+from app.search import SEARCH_TABLE, VOCAB_TABLE, TOKEN_PATTERN, search_index_available, search_table
+
+logger = logging.getLogger(__name__)
+
+# Query words beyond this are ignored; combinations grow as EXPANSIONS ** words
+MAX_WORDS = 5
+
+
+def normalize(word):
+    """Lowercase and strip diacritics, as the unicode61 tokenizer does for indexed terms"""
+    decomposed = unicodedata.normalize('NFKD', word.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def trigrams(word):
+    """
+    The set of three-letter sequences in a word, padded like PostgreSQL's
+    pg_trgm so the start and end of the word weigh more: 'cat' ->
+    {'  c', ' ca', 'cat', 'at '}
+    """
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a, b):
+    """Shared trigrams over all distinct trigrams of both words (0 to 1)"""
+    a, b = trigrams(a), trigrams(b)
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+class TrigramIndex:
+    """
+    Terms by trigram, for finding the terms most similar to a word without
+    comparing it to every term. Postings are append-only int arrays, so a
+    refresh can add terms while requests read them; a removed term keeps
+    its postings with a size of 0 until the index is rebuilt.
+    """
+
+    def __init__(self, terms=()):
+        self.terms = []
+        self.sizes = array('i')
+        self.ids = {}
+        self.postings = defaultdict(lambda: array('i'))
+        self.removed = 0
+        for term in terms:
+            self.add(term)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, term):
+        if term in self.ids:
+            return
+        term_id = len(self.terms)
+        grams = trigrams(term)
+        # Sizes first: a reader may see the new id in postings straight away
+        self.terms.append(term)
+        self.sizes.append(len(grams))
+        self.ids[term] = term_id
+        for gram in grams:
+            self.postings[gram].append(term_id)
+
+    def remove(self, term):
+        term_id = self.ids.pop(term, None)
+        if term_id is not None:
+            self.sizes[term_id] = 0
+            self.removed += 1
+
+    def similar(self, word, threshold, limit):
+        """
+        Terms whose similarity to word is at least threshold, best first
+        Returns: [(similarity, term)]
+        """
+        grams = trigrams(word)
+        # np.array copies each posting list in one call, so a concurrent
+        # append never sees an exported buffer
+        postings = [np.array(self.postings[gram]) for gram in grams if gram in self.postings]
+        if not postings:
+            return []
+        # Sorting the few thousand postings beats bincount over every term id
+        candidates, counts = np.unique(np.concatenate(postings), return_counts=True)
+        sizes = np.array(self.sizes)[candidates]
+        scores = counts / (len(grams) + sizes - counts)
+        found = (sizes > 0) & (scores >= threshold)
+
+        matches = [(float(score), self.terms[term_id])
+                   for score, term_id in zip(scores[found], candidates[found])]
+        matches.sort(key=lambda match: (-match[0], match[1]))
+        return matches[:limit]
+
+
+class Vocabulary:
+    """The trigram index over book_fts terms for one app, refreshed when the catalog changes"""
+
+    def __init__(self):
+        self.index = TrigramIndex()
+        self.version = None
+        self.checked_at = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def sync(self, refresh_interval, background=True):
+        """
+        Re-read the terms if the catalog changed since they were loaded. The
+        catalog version is read at most once per refresh_interval seconds.
+        Reading the terms scans the whole FTS index, so after the first load
+        it runs on a background thread and requests keep using the previous
+        terms: words added by recent writes are not corrected to yet, and
+        removed terms find no books.
+        """
+        now = time.monotonic()
+        if self.checked_at is not None and now - self.checked_at < refresh_interval:
+            return
+        self.checked_at = now
+        version = current_catalog_version()
+        if version == self.version:
+            return
+
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        if background and self.version is not None:
+            app = current_app._get_current_object()
+            try:
+                threading.Thread(target=self._refresh_in_context, args=(app, version), daemon=True).start()
+            except Exception:
+                self._refreshing = False
+                raise
+        else:
+            try:
+                self.refresh(version)
+            finally:
+                self._refreshing = False
+
+    def _refresh_in_context(self, app, version):
+        # Whatever fails, clear the flag so a later sync can try again
+        try:
+            with app.app_context():
+                try:
+                    self.refresh(version)
+                finally:
+                    db.session.remove()
+        except Exception:
+            logger.exception('Refreshing the fuzzy search vocabulary failed')
+        finally:
+            self._refreshing = False
+
+    def refresh(self, version):
+        terms = set(db.session.scalars(text(f'SELECT term FROM {VOCAB_TABLE}')))
+        index = self.index
+        stale = index.ids.keys() - terms
+        if stale and (index.removed + len(stale)) * 4 > len(index.terms):
+            # Mostly holes: start over rather than score them on every lookup
+            index = TrigramIndex(terms)
+        else:
+            for term in stale:
+                index.remove(term)
+            for term in terms - index.ids.keys():
+                index.add(term)
+        self.index, self.version = index, version
+
+
+def vocabulary(app=None):
+    app = app or current_app
+    vocab = app.extensions.get('fuzzy_vocabulary')
+    if vocab is None:
+        vocab = app.extensions['fuzzy_vocabulary'] = Vocabulary()
+    return vocab
+
+
+def fuzzy_available(app=None):
+    """
+    Fuzzy search needs the FTS5 index and its vocabulary table (SQLite
+    only); search_index_available looks it up once per app
+    """
+    return search_index_available(VOCAB_TABLE, app)
+
+
+def fuzzy_search(query, search_query, limit, threshold):
+    """
+    Find books whose title or author words are similar to every word of
+    the search text, most similar first.
+
+    Each query word is expanded to its FUZZY_EXPANSIONS most similar terms
+    (similarity >= threshold); combinations of one term per word are tried
+    best first, scored by their mean similarity, until `limit` books are
+    found. A book is reported with the score of the best combination it
+    contains. `query` is a column query over Book, possibly filtered.
+    Returns: (rows, scores, terms) with scores[i] for rows[i] and terms
+    mapping each query word to the terms it was expanded to.
+    """
+    words = [normalize(word) for word in TOKEN_PATTERN.findall(search_query or '')][:MAX_WORDS]
+    if not words:
+        return [], [], {}
+
+    config = current_app.config
+    vocab = vocabulary()
+    vocab.sync(config.get('FUZZY_REFRESH_INTERVAL', 5), config.get('FUZZY_BACKGROUND_REFRESH', True))
+    index = vocab.index
+    expansions = [index.similar(word, threshold, config.get('FUZZY_EXPANSIONS', 5)) for word in words]
+    terms = {word: [term for _, term in matches] for word, matches in zip(words, expansions)}
+    if not all(expansions):
+        return [], [], terms
+
+    combinations = sorted(
+        product(*expansions),
+        key=lambda combination: (-sum(score for score, _ in combination), [term for _, term in combination])
+    )[:config.get('FUZZY_MAX_COMBINATIONS', 50)]
+
+    query = query.join(search_table, search_table.c.rowid == Book.id)
+    rows, scores, seen = [], [], set()
+    for combination in combinations:
+        match = ' '.join('"{}"'.format(term.replace('"', '""')) for term in {term for _, term in combination})
+        statement = query.filter(search_table.c[SEARCH_TABLE].op('MATCH')(match))
+        if seen:
+            statement = statement.filter(Book.id.notin_(seen))
+        # Ordering by the FTS rowid lets the index return matches in order
+        # instead of sorting every book that contains a common term
+        found = statement.order_by(search_table.c.rowid).limit(limit - len(rows)).all()
+        score = sum(score for score, _ in combination) / len(combination)
+        for row in found:
+            seen.add(row.id)
+            rows.append(row)
+            scores.append(score)
+        if len(rows) >= limit:
+            break
+    return rows, scores, terms
@@ -0,0 +1,173 @@
+"""
+Batch ISBN validation, normalization, conversion and formatting.
+
+The scalar helpers in app.utils handle one ISBN per call. These functions
+take a whole sequence at once: separators are stripped in a single pass,
+the cleaned values are laid out as a matrix of code points and checksums
+are computed for every row with NumPy, so a million ISBNs cost a few
+array operations instead of a million Python loops.
+"""
+import numpy as np
+
+# The characters ISBN_SEPARATORS (r'[-\s]') strips: '-' and everything str.isspace() accepts
+_SEPARATORS = str.maketrans('', '', (
+    '-\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680'
+    '\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a'
+    '\u2028\u2029\u202f\u205f\u3000'
+))
+
+_ZERO = ord('0')
+_X = ord('X')
+_ISBN10_WEIGHTS = np.arange(10, 0, -1)
+_ISBN13_WEIGHTS = np.tile([1, 3], 6)
+_PREFIX_978 = np.array([ord(c) for c in '978'], dtype=np.uint32)
+
+# Output column -> source column (-1 for a hyphen), matching format_isbn
+_FORMAT_10 = [0, -1, 1, 2, 3, -1, 4, 5, 6, 7, 8, -1, 9]
+_FORMAT_13 = [0, 1, 2, -1, 3, -1, 4, 5, -1, 6, 7, 8, 9, 10, 11, -1, 12]
+
+
+def _strip_separators(isbn):
+    # str.replace is several times faster than translate; most values only contain hyphens
+    cleaned = isbn.replace('-', '')
+    return cleaned if cleaned.isalnum() else cleaned.translate(_SEPARATORS)
+
+
+def clean_isbns(isbns):
+    """
+    Strip hyphens and whitespace from every ISBN.
+    Returns: (cleaned, lengths) where cleaned is a '<U13' array (longer values
+    are truncated, but their true length is kept in lengths) and missing
+    values become ''
+    """
+    cleaned = [_strip_separators(isbn) if isinstance(isbn, str) else '' for isbn in isbns]
+    lengths = np.fromiter(map(len, cleaned), dtype=np.int64, count=len(cleaned))
+    return np.array(cleaned, dtype='<U13'), lengths
+
+
+def _code_points(cleaned):
+    """View a '<U13' array as an (n, 13) matrix of code points, 0 past the end of each value"""
+    return cleaned.view(np.uint32).reshape(len(cleaned), 13)
+
+
+def _isbn10_check(digits):
+    """Check digit value (10 means 'X') for rows of the first 9 digits of an ISBN-10"""
+    return (11 - (digits @ _ISBN10_WEIGHTS[:9]) % 11) % 11
+
+
+def _isbn13_check(digits):
+    """Check digit for rows of the first 12 digits of an ISBN-13"""
+    return (10 - (digits @ _ISBN13_WEIGHTS) % 10) % 10
+
+
+def _from_code_points(points, width):
+    """Turn an (n, width) code point matrix back into a '<U{width}' array"""
+    return np.ascontiguousarray(points, dtype=np.uint32).view(f'<U{width}').ravel()
+
+
+def validate_isbns(isbns):
+    """
+    Validate a batch of ISBN-10/ISBN-13 strings, like validate_isbn for each.
+    Returns: (valid, cleaned) where valid is a boolean mask and cleaned holds
+    the values without separators
+    """
+    cleaned, lengths = clean_isbns(isbns)
+    points = _code_points(cleaned).astype(np.int64)
+    digits = points - _ZERO
+    is_digit = (digits >= 0) & (digits <= 9)
+
+    # ISBN-10: nine digits then a digit or X; weighted sum divisible by 11
+    is_x = (points[:, 9] == _X) | (points[:, 9] == ord('x'))
+    check10 = np.where(is_x, 10, digits[:, 9])
+    valid10 = (
+        (lengths == 10)
+        & is_digit[:, :9].all(axis=1)
+        & (is_digit[:, 9] | is_x)
+        & ((np.where(is_digit[:, :9], digits[:, :9], 0) @ _ISBN10_WEIGHTS[:9] + check10) % 11 == 0)
+    )
+
+    # ISBN-13: thirteen digits, alternating 1/3 weights
+    digits13 = np.where(is_digit, digits, 0)
+    valid13 = (
+        (lengths == 13)
+        & is_digit.all(axis=1)
+        & (_isbn13_check(digits13[:, :12]) == digits13[:, 12])
+    )
+
+    return valid10 | valid13, cleaned
+
+
+def to_isbn13(isbns):
+    """
+    Normalize a batch of ISBNs to ISBN-13, converting valid ISBN-10s with the 978 prefix.
+    Returns: (valid, isbn13) where invalid rows hold ''
+    """
+    valid, cleaned = validate_isbns(isbns)
+    points = _code_points(cleaned).copy()
+
+    is10 = valid & (points[:, 10] == 0)
+    if is10.any():
+        nine = points[is10, :9]
+        converted = np.empty((len(nine), 13), dtype=np.uint32)
+        converted[:, :3] = _PREFIX_978
+        converted[:, 3:12] = nine
+        converted[:, 12] = _isbn13_check(converted[:, :12].astype(np.int64) - _ZERO) + _ZERO
+        points[is10] = converted
+
+    points[~valid] = 0
+    return valid, _from_code_points(points, 13)
+
+
+def to_isbn10(isbns):
+    """
+    Convert a batch of ISBNs to ISBN-10. Only 978-prefixed ISBN-13s (and valid
+    ISBN-10s) have an ISBN-10 form.
+    Returns: (convertible, isbn10) where other rows hold ''
+    """
+    valid, cleaned = validate_isbns(isbns)
+    points = _code_points(cleaned)
+
+    is13 = valid & (points[:, 12] != 0)
+    convertible = valid & (~is13 | (points[:, :3] == _PREFIX_978).all(axis=1))
+
+    result = points[:, :10].copy()
+    # A valid ISBN-10 may end in a lowercase check digit; 'X' is the normal form
+    result[:, 9] = np.where(result[:, 9] == ord('x'), _X, result[:, 9])
+    from13 = is13 & convertible
+    if from13.any():
+        nine = points[from13, 3:12]
+        check = _isbn10_check(nine.astype(np.int64) - _ZERO)
+        result[from13, :9] = nine
+        result[from13, 9] = np.where(check == 10, _X, check + _ZERO)
+
+    result[~convertible] = 0
+    return convertible, _from_code_points(result, 10)
+
+
+def format_isbns(isbns):
+    """
+    Hyphenate a batch of ISBNs like format_isbn: 10-digit values as
+    X-XXX-XXXXX-X, 13-digit values as XXX-X-XX-XXXXXX-X and anything else
+    returned cleaned but unhyphenated
+    """
+    cleaned, lengths = clean_isbns(isbns)
+    points = _code_points(cleaned)
+    hyphen = np.uint32(ord('-'))
+    formatted = np.zeros((len(cleaned), 17), dtype=np.uint32)
+
+    for length, layout in ((10, _FORMAT_10), (13, _FORMAT_13)):
+        rows = lengths == length
+        if rows.any():
+            layout = np.array(layout)
+            block = np.where(layout >= 0, points[rows][:, np.maximum(layout, 0)], hyphen)
+            formatted[rows, :len(layout)] = block
+
+    result = _from_code_points(formatted, 17).astype(object)
+    other = (lengths != 10) & (lengths != 13)
+    if other.any():
+        # Values of other lengths may be longer than the 13 characters kept in cleaned
+        result[other] = [
+            _strip_separators(isbn) if isinstance(isbn, str) and isbn else None
+            for isbn, keep in zip(isbns, other) if keep
+        ]
+    return result
@@ -0,0 +1,346 @@
+"""
+Background jobs for work too long for a request: catalog export, import
+and search reindexing.
+
+Jobs run on a small thread pool inside the app process, so no broker is
+needed. Each job is a row in the `job` table holding its parameters,
+status, progress and result; any worker process can answer
+GET /api/jobs/<id>, but only the process that accepted a job runs it.
+"""
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import func, inspect, select, update
+from app import db, cache
+from app.export import EXPORT_COLUMNS, EXPORT_FORMATS, ENCODERS
+from app.importer import IMPORT_FORMATS, import_books
+from app.models import Book, Job
+from app.search import rebuild_search_index, search_clause
+from app.utils import LIKE_ESCAPE, escape_like
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+# Job type -> (handler, validate). handler(job, params, progress) runs in
+# an app context and returns the job's result; validate(params) returns
+# cleaned params or raises ValueError before the job is stored.
+JOB_TYPES = {}
+
+
+def job_type(name, validate=None):
+    """Register a handler for a job type"""
+    def decorator(handler):
+        JOB_TYPES[name] = (handler, validate)
+        return handler
+    return decorator
+
+
+class JobProgress:
+    """Progress callback handed to handlers; writes the job row at most every `interval` seconds"""
+
+    def __init__(self, job_id, interval):
+        self.job_id = job_id
+        self.interval = interval
+        self.processed = 0
+        self.total = None
+        self._written = None
+
+    def __call__(self, processed, total=None):
+        self.processed = processed
+        if total is not None:
+            self.total = total
+        now = time.monotonic()
+        if self._written is not None and now - self._written < self.interval:
+            return
+        self._written = now
+        db.session.execute(
+            update(Job).where(Job.id == self.job_id)
+            .values(processed=self.processed, total=self.total, updated_at=datetime.utcnow())
+        )
+        db.session.commit()
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobRunner:
+    """
+    Run jobs on a thread pool of JOBS_WORKERS threads (0 runs each job
+    inline in the request that submits it). Handlers get their own app
+    context and database session, so request latency is unaffected by
+    job work beyond sharing the CPU.
+    """
+
+    def __init__(self, app=None):
+        self._recovered = False
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        workers = app.config.get('JOBS_WORKERS', 1)
+        # One pool per app, so apps created side by side (tests) keep their own
+        app.extensions['job_executor'] = (
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job') if workers else None
+        )
+        app.extensions['job_runner'] = self
+
+    @property
+    def worker_id(self):
+        # Read on every call: the pid changes when a server forks its workers
+        return f'{socket.gethostname()}:{os.getpid()}'
+
+    def submit(self, name, params):
+        """
+        Validate params, store a queued job and hand it to the pool.
+        Raises ValueError for invalid params.
+        Returns: the Job
+        """
+        _, validate = JOB_TYPES[name]
+        if validate is not None:
+            params = validate(params)
+        self.recover()
+
+        job = Job(type=name, params=params, status='queued', worker=self.worker_id)
+        db.session.add(job)
+        db.session.commit()
+        self._dispatch(current_app._get_current_object(), job.id)
+        # Inline jobs have finished by now; the row was written by another session
+        db.session.refresh(job)
+        return job
+
+    def _dispatch(self, app, job_id):
+        executor = app.extensions['job_executor']
+        if executor is None:
+            self.run(app, job_id)
+        else:
+            executor.submit(self.run, app, job_id)
+
+    def start(self, app):
+        """
+        Recover jobs orphaned by exited processes and delete expired result
+        files as this process starts, rather than on its first submit. Call
+        it in every process that serves requests (run.py does); with
+        gunicorn --preload, call it from a post_fork hook instead.
+        """
+        with app.app_context():
+            if inspect(db.engine).has_table(Job.__tablename__):
+                self.recover()
+            expire_results(app)
+            db.session.remove()
+
+    def recover(self):
+        """
+        Once per process, deal with jobs left behind by processes on this
+        host that have exited: queued jobs are run here, running ones are
+        marked failed since their partial work cannot be resumed safely.
+        """
+        with self._lock:
+            if self._recovered:
+                return
+            self._recovered = True
+
+        host = socket.gethostname()
+        requeued = []
+        for job in Job.query.filter(Job.status.in_(ACTIVE_STATUSES), Job.worker.like(f'{escape_like(host)}:%', escape=LIKE_ESCAPE)):
+            pid = int(job.worker.rsplit(':', 1)[1])
+            if pid == os.getpid() or _process_alive(pid):
+                continue
+            if job.status == 'queued':
+                job.worker = self.worker_id
+                requeued.append(job.id)
+            else:
+                job.status = 'failed'
+                job.error = 'Interrupted: the process running the job exited'
+                job.finished_at = job.updated_at = datetime.utcnow()
+        db.session.commit()
+
+        app = current_app._get_current_object()
+        for job_id in requeued:
+            self._dispatch(app, job_id)
+
+    def run(self, app, job_id):
+        with app.app_context():
+            now = datetime.utcnow()
+            # Claim the job, so it runs once even if recover() also picked it up
+            claimed = db.session.execute(
+                update(Job).where(Job.id == job_id, Job.status == 'queued')
+                .values(status='running', worker=self.worker_id, started_at=now, updated_at=now)
+            ).rowcount
+            db.session.commit()
+            if not claimed:
+                return
+
+            job = db.session.get(Job, job_id)
+            name = job.type
+            handler, _ = JOB_TYPES[name]
+            progress = JobProgress(job_id, app.config.get('JOBS_PROGRESS_INTERVAL', 1.0))
+            values = {}
+            try:
+                values['result'] = handler(job, dict(job.params), progress)
+                values['status'] = 'succeeded'
+            except Exception as e:
+                db.session.rollback()
+                logger.exception('Job %s (%s) failed', job_id, name)
+                values['status'] = 'failed'
+                values['error'] = str(e) or e.__class__.__name__
+
+            now = datetime.utcnow()
+            db.session.execute(
+                update(Job).where(Job.id == job_id)
+                .values(processed=progress.processed, total=progress.total,
+                        finished_at=now, updated_at=now, **values)
+            )
+            db.session.commit()
+            expire_results(app)
+
+
+def result_dir(app=None):
+    app = app or current_app
+    return app.config.get('JOBS_RESULT_DIR') or os.path.join(app.instance_path, 'jobs')
+
+
+def expire_results(app=None):
+    """
+    Delete result files (and leftover partial ones) older than
+    JOBS_RESULT_RETENTION seconds; their jobs' result_url then answers 404.
+    Returns: the number of files deleted
+    """
+    app = app or current_app
+    retention = app.config.get('JOBS_RESULT_RETENTION')
+    directory = result_dir(app)
+    if retention is None or not os.path.isdir(directory):
+        return 0
+
+    cutoff = time.time() - retention
+    deleted = 0
+    for entry in os.scandir(directory):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                deleted += 1
+        except FileNotFoundError:
+            # Another worker expired it first
+            continue
+    return deleted
+
+
+# ---------- job types ----------
+
+def _export_params(params):
+    export_format = str(params.get('format', 'jsonl')).lower()
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format, use one of: {', '.join(EXPORT_FORMATS)}")
+    cleaned = {'format': export_format}
+    if params.get('q'):
+        cleaned['q'] = str(params['q'])
+    return cleaned
+
+
+@job_type('export', validate=_export_params)
+def export_job(job, params, progress, batch_size=5000):
+    """Write the catalog (or search results) to a file in the result directory"""
+    whereclause = search_clause(params['q']) if params.get('q') else None
+    count = select(func.count()).select_from(Book)
+    if whereclause is not None:
+        count = count.where(whereclause)
+    progress(0, db.session.scalar(count))
+
+    columns = [getattr(Book, name) for name in EXPORT_COLUMNS]
+
+    def rows():
+        # Keyset batches instead of one long cursor, so progress can be
+        # committed between them
+        last_id, written = 0, 0
+        while True:
+            statement = select(*columns).where(Book.id > last_id).order_by(Book.id).limit(batch_size)
+            if whereclause is not None:
+                statement = statement.where(whereclause)
+            batch = db.session.execute(statement).all()
+            db.session.commit()
+            if not batch:
+                return
+            for row in batch:
+                yield dict(zip(EXPORT_COLUMNS, row))
+            last_id = batch[-1][0]
+            written += len(batch)
+            progress(written)
+
+    extension = 'jsonl' if params['format'] == 'ndjson' else params['format']
+    filename = f'books-{job.id}.{extension}'
+    directory = result_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, filename)
+    with open(path + '.part', 'w', encoding='utf-8', newline='') as out:
+        for chunk in ENCODERS[params['format']](rows()):
+            out.write(chunk)
+    os.replace(path + '.part', path)
+    return {'filename': filename, 'format': params['format'], 'rows': progress.processed,
+            'bytes': os.path.getsize(path)}
+
+
+def _import_params(params):
+    base = current_app.config.get('JOBS_IMPORT_DIR')
+    if not base:
+        raise ValueError('Import jobs are disabled; set JOBS_IMPORT_DIR')
+    if not isinstance(params.get('path'), str) or not params['path']:
+        raise ValueError('path is required')
+    base = os.path.realpath(base)
+    path = os.path.realpath(os.path.join(base, params['path']))
+    if os.path.commonpath([base, path]) != base or not os.path.isfile(path):
+        raise ValueError('path must name a file inside the import directory')
+
+    cleaned = {'path': os.path.relpath(path, base)}
+    if params.get('format') is not None:
+        if params['format'] not in IMPORT_FORMATS:
+            raise ValueError(f"Unsupported format, use one of: {', '.join(IMPORT_FORMATS)}")
+        cleaned['format'] = params['format']
+    if params.get('restart'):
+        cleaned['restart'] = True
+    return cleaned
+
+
+@job_type('import', validate=_import_params)
+def import_job(job, params, progress):
+    """Run `flask books import` on a file from JOBS_IMPORT_DIR"""
+    path = os.path.join(os.path.realpath(current_app.config['JOBS_IMPORT_DIR']), params['path'])
+    # Forking from a job thread of a multithreaded server is unsafe, so a
+    # validation pool, if configured, starts its processes fresh
+    stats = import_books(
+        path, params.get('format'), workers=current_app.config.get('JOBS_IMPORT_WORKERS', 0),
+        mp_context=multiprocessing.get_context('spawn'), restart=params.get('restart', False), on_progress=lambda stats: progress(stats.rows_read)
+    )
+    progress(stats.rows_read, stats.rows_read)
+    return {'rows_read': stats.rows_read, 'inserted': stats.inserted, 'rejected': stats.rejected,
+            'already_imported': stats.already_imported}
+
+
+@job_type('reindex')
+def reindex_job(job, params, progress):
+    """Rebuild the FTS5 search index from the book table"""
+    if db.engine.dialect.name != 'sqlite':
+        raise ValueError('The search index only exists on SQLite')
+    books = db.session.scalar(select(func.count()).select_from(Book))
+    progress(0, books)
+    rebuild_search_index()
+    progress(books)
+    # Search results may change once the index is rebuilt
+    cache.invalidate()
+    return {'books': books}
+
+
+job_runner = JobRunner()
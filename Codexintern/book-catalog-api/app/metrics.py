@@ -0,0 +1,218 @@
+import logging
+import threading
+import time
+from collections import Counter
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _format_labels(names, values):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+class CounterMetric:
+    """Prometheus counter with a fixed set of label names"""
+
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labels, labels)} {value}')
+        return lines
+
+
+class Histogram:
+    """Prometheus histogram with a fixed set of label names and buckets"""
+
+    def __init__(self, name, documentation, labels, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts, sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        names = self.labels + ('le',)
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f'{self.name}_bucket{_format_labels(names, labels + (bound,))} {cumulative}')
+                lines.append(f'{self.name}_bucket{_format_labels(names, labels + ("+Inf",))} {count}')
+                lines.append(f'{self.name}_sum{_format_labels(self.labels, labels)} {total}')
+                lines.append(f'{self.name}_count{_format_labels(self.labels, labels)} {count}')
+        return lines
+
+
+class RequestStats:
+    """What one request spent, collected while it runs"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.statements = Counter()
+
+
+class RequestMetrics:
+    """
+    Per-request instrumentation: latency, SQL statement count and time
+    (from SQLAlchemy cursor events), JSON encoding time and response size
+    per endpoint, served in Prometheus text format on METRICS_PATH.
+
+    With METRICS_SERVER_TIMING on, responses carry a Server-Timing header.
+    A request that runs the same SQL statement METRICS_N_PLUS_ONE_THRESHOLD
+    times or more is logged as a likely N+1 query.
+    Metrics live in process memory; each worker reports its own.
+    """
+
+    def __init__(self, app=None):
+        endpoint = ('endpoint', 'method')
+        self.requests = CounterMetric(
+            'http_requests_total', 'HTTP requests by endpoint, method and status', endpoint + ('status',))
+        self.latency = Histogram(
+            'http_request_duration_seconds', 'Time spent handling requests', endpoint, LATENCY_BUCKETS)
+        self.queries = Histogram(
+            'http_request_sql_queries', 'SQL statements executed per request', endpoint, QUERY_COUNT_BUCKETS)
+        self.sql_time = Histogram(
+            'http_request_sql_duration_seconds', 'Time spent in SQL per request', endpoint, LATENCY_BUCKETS)
+        self.serialize_time = Histogram(
+            'http_request_serialize_duration_seconds', 'Time spent encoding JSON per request', endpoint,
+            LATENCY_BUCKETS)
+        self.response_size = Histogram(
+            'http_response_size_bytes', 'Response body size, when known up front', endpoint, SIZE_BUCKETS)
+        self.n_plus_one = CounterMetric(
+            'http_request_n_plus_one_total', 'Requests that repeated one SQL statement past the threshold',
+            endpoint)
+        self.all_metrics = (self.requests, self.latency, self.queries, self.sql_time,
+                            self.serialize_time, self.response_size, self.n_plus_one)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Call after the database and JSON provider are set up"""
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+
+        with app.app_context():
+            for engine in app.extensions['sqlalchemy'].engines.values():
+                event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+        encode = app.json.response
+
+        def timed_response(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return encode(*args, **kwargs)
+            finally:
+                stats = self._stats()
+                if stats is not None:
+                    stats.serialize_seconds += time.perf_counter() - start
+
+        app.json.response = timed_response
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.add_url_rule(app.config.get('METRICS_PATH', '/metrics'), 'metrics', self.metrics_view)
+        app.extensions['request_metrics'] = self
+
+    @staticmethod
+    def _stats():
+        return g.get('request_stats') if has_request_context() else None
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # The start time lives on the execution context, which is discarded
+        # with it when the statement raises and after_cursor_execute never runs
+        if context is not None:
+            context._metrics_query_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, '_metrics_query_start', None)
+        elapsed = time.perf_counter() - start if start is not None else 0.0
+        stats = self._stats()
+        if stats is not None:
+            stats.queries += 1
+            stats.sql_seconds += elapsed
+            stats.statements[statement] += 1
+
+    def _start(self):
+        g.request_stats = None if request.endpoint == 'metrics' else RequestStats()
+
+    def _finish(self, response):
+        stats = g.pop('request_stats', None)
+        if stats is None:
+            return response
+
+        elapsed = time.perf_counter() - stats.start
+        endpoint = request.url_rule.rule if request.url_rule else '<unmatched>'
+        labels = (endpoint, request.method)
+        self.requests.inc(labels + (str(response.status_code),))
+        self.latency.observe(labels, elapsed)
+        self.queries.observe(labels, stats.queries)
+        self.sql_time.observe(labels, stats.sql_seconds)
+        self.serialize_time.observe(labels, stats.serialize_seconds)
+        if response.content_length is not None:
+            self.response_size.observe(labels, response.content_length)
+
+        threshold = current_app.config.get('METRICS_N_PLUS_ONE_THRESHOLD', 10)
+        if threshold and stats.statements:
+            statement, count = stats.statements.most_common(1)[0]
+            if count >= threshold:
+                self.n_plus_one.inc(labels)
+                logger.warning(
+                    'Possible N+1 query: %s %s ran the same statement %d times: %s',
+                    request.method, endpoint, count, ' '.join(statement.split())[:200]
+                )
+
+        if current_app.config.get('METRICS_SERVER_TIMING'):
+            response.headers['Server-Timing'] = ', '.join([
+                f'app;dur={elapsed * 1000:.2f}',
+                f'db;dur={stats.sql_seconds * 1000:.2f};desc="{stats.queries} queries"',
+                f'serialize;dur={stats.serialize_seconds * 1000:.2f}',
+            ])
+        return response
+
+    def render(self):
+        lines = []
+        for metric in self.all_metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def metrics_view(self):
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
@@ -1,12 +1,28 @@
+from datetime import datetime
 from app import db
 
 class Book(db.Model):
+    # Indexes for the columns apply_filters and apply_sorting work on. Each
+    # one implicitly ends in the rowid, so (column, id) keyset pages are
+    # index range scans too.
+    __table_args__ = (
+        db.Index('ix_book_title', 'title'),
+        db.Index('ix_book_author', 'author'),
+        db.Index('ix_book_genre', 'genre'),
+        db.Index('ix_book_genre_publication_year', 'genre', 'publication_year'),
+        db.Index('ix_book_publication_year', 'publication_year'),
+        db.Index('ix_book_availability', 'availability'),
+        db.Index('ix_book_availability_genre', 'availability', 'genre'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     author = db.Column(db.String(100), nullable=False)
     genre = db.Column(db.String(50), nullable=False)
     publication_year = db.Column(db.Integer, nullable=False)
     availability = db.Column(db.Boolean, default=True)
+    # Bumped by a trigger on every UPDATE; used to build ETags
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     
     def __repr__(self):
         return f'<Book {self.title}>'
@@ -19,4 +35,91 @@ class Book(db.Model):
             'genre': self.genre,
             'publication_year': self.publication_year,
             'availability': self.availability
-        }
\ No newline at end of file
+        }
+
+
+class CatalogVersion(db.Model):
+    """Single-row counter bumped by triggers whenever any book changes"""
+    __tablename__ = 'catalog_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class BookFacet(db.Model):
+    """Book count per facet value (genre, decade, availability), kept current by triggers"""
+    __tablename__ = 'book_facet'
+
+    facet = db.Column(db.String(20), primary_key=True)
+    value = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class BookSuggestion(db.Model):
+    """Book count per distinct title and author, kept current by triggers for /api/books/suggest"""
+    __tablename__ = 'book_suggestion'
+    __table_args__ = (
+        # Each change stamps the next seq, so readers can fetch what changed since they last looked
+        db.Index('ix_book_suggestion_seq', 'seq'),
+    )
+
+    kind = db.Column(db.String(10), primary_key=True)
+    value = db.Column(db.String(200), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    seq = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ImportCheckpoint(db.Model):
+    """How far a bulk import got through its source file, committed with every chunk"""
+    __tablename__ = 'import_checkpoint'
+
+    # Absolute path of the imported file
+    source = db.Column(db.String(1024), primary_key=True)
+    source_size = db.Column(db.BigInteger, nullable=False)
+    # Byte offset of the next record to read; None for checkpoints written
+    # before offsets were stored
+    source_offset = db.Column(db.BigInteger)
+    rows_read = db.Column(db.Integer, nullable=False, default=0)
+    inserted = db.Column(db.Integer, nullable=False, default=0)
+    rejected = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+
+class Job(db.Model):
+    """A background job (see app/jobs.py); the row is its status, progress and result"""
+    __tablename__ = 'job'
+    __table_args__ = (
+        db.Index('ix_job_status', 'status'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    type = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    params = db.Column(db.JSON, nullable=False, default=dict)
+    # host:pid of the process whose thread pool runs the job
+    worker = db.Column(db.String(255))
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'type': self.type,
+            'status': self.status,
+            'params': self.params,
+            'processed': self.processed,
+            'total': self.total,
+            'progress': min(self.processed / self.total, 1.0) if self.total else None,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
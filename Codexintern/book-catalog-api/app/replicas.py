@@ -0,0 +1,144 @@
+import itertools
+import sqlite3
+import threading
+import time
+from flask import g, has_app_context, request
+from flask_sqlalchemy.session import Session
+
+# Replica engines are registered as SQLAlchemy binds named replica_0, replica_1, ...
+REPLICA_BIND_PREFIX = 'replica_'
+# Set on responses to writes; reads from that client go to the primary until it expires
+STICKY_COOKIE = 'db_primary_until'
+READ_METHODS = ('GET', 'HEAD')
+
+
+def configure_replica_binds(app):
+    """
+    Register each URI in SQLALCHEMY_REPLICA_URIS as a bind.
+    Must run before db.init_app so the engines get created.
+    """
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for index, uri in enumerate(app.config.get('SQLALCHEMY_REPLICA_URIS') or ()):
+        binds[f'{REPLICA_BIND_PREFIX}{index}'] = uri
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+
+def reading_from_replica():
+    """True when the current request's reads go to a replica rather than the primary"""
+    return has_app_context() and g.get('db_read_bind') is not None
+
+
+def use_primary():
+    """Send the rest of the current request's reads to the primary"""
+    g.db_read_bind = None
+
+
+class RoutingSession(Session):
+    """
+    Session that sends SELECTs to the replica picked for the current
+    request. Flushes and every other statement, including text() SQL whose
+    effect cannot be told from its type, always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and getattr(clause, 'is_select', False):
+            key = g.get('db_read_bind') if has_app_context() else None
+            if key is not None:
+                return self._db.engines[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    """
+    Route GET/HEAD requests to the replicas round-robin. After a client
+    writes, its reads stay on the primary for REPLICA_STICKY_SECONDS so
+    it always sees its own writes despite replication lag.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Call after db.init_app"""
+        keys = sorted(key for key in app.config.get('SQLALCHEMY_BINDS') or {}
+                      if key and key.startswith(REPLICA_BIND_PREFIX))
+        sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 5)
+        # itertools.count is atomic under the GIL, so request threads share it safely
+        counter = itertools.count()
+        app.extensions['replica_router'] = self
+
+        # Flask-SQLAlchemy creates a MetaData per bind. Replicas mirror the
+        # primary and have no tables of their own, so keep create_all() and
+        # drop_all() away from them.
+        metadatas = app.extensions['sqlalchemy'].metadatas
+        for key in keys:
+            metadatas.pop(key, None)
+        if not keys:
+            return
+
+        @app.before_request
+        def choose_read_bind():
+            # Always assign: g outlives the request when an app context was already pushed
+            if request.method in READ_METHODS and not self.sticky():
+                g.db_read_bind = keys[next(counter) % len(keys)]
+            else:
+                g.db_read_bind = None
+
+        @app.after_request
+        def mark_writer(response):
+            if request.method not in READ_METHODS and response.status_code < 400 and sticky_seconds:
+                until = time.time() + sticky_seconds
+                response.set_cookie(STICKY_COOKIE, f'{until:.3f}', max_age=sticky_seconds, httponly=True)
+            return response
+
+    @staticmethod
+    def sticky():
+        """True while the current client's recent write pins its reads to the primary"""
+        try:
+            return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+
+class SQLiteReplicator:
+    """
+    Stand-in for real replication when running against SQLite files: copies
+    the primary database into each replica with the online backup API,
+    either on demand or every `interval` seconds in a background thread.
+    """
+
+    def __init__(self, primary_path, replica_paths, interval=1.0):
+        self.primary_path = primary_path
+        self.replica_paths = list(replica_paths)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sync(self):
+        source = sqlite3.connect(self.primary_path)
+        try:
+            for path in self.replica_paths:
+                target = sqlite3.connect(path)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+        finally:
+            source.close()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sync()
+
+    def start(self):
+        self.sync()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sqlite-replicator', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
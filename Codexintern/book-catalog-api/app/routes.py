@@ -1,40 +1,364 @@
-from flask import Blueprint, request, jsonify
-from app import db
-from app.models import Book
+from flask import (
+    Blueprint, Response, request, jsonify, stream_with_context, abort, send_from_directory, url_for, current_app
+)
+from app import db, cache
+from app.models import Book, Job
 from app.schemas import BookSchema
-from sqlalchemy import or_
+from app.search import apply_search, ilike_clause, search_clause
+from app.fuzzy import fuzzy_available, fuzzy_search, vocabulary
+from app.suggest import (
+    DEFAULT_SUGGESTIONS, MAX_SUGGESTIONS, query_suggestions, suggest, suggestions_maintained
+)
+from app.export import EXPORT_FORMATS, ENCODERS, iter_book_rows
+from app.jobs import JOB_TYPES, job_runner, result_dir
+from app.facets import facet_counts_maintained, grouped_facet_counts, stored_facet_counts
+from app.etag import current_catalog_version, book_etag, etags_enabled, list_etag
+from app.replicas import reading_from_replica, use_primary
+from app.serialization import book_columns, rows_to_dicts
+from app.utils import (
+    DEFAULT_PER_PAGE, MAX_PER_PAGE, MAX_BULK_ITEMS, paginate_query, paginate_keyset,
+    build_pagination_links, build_cursor_links, format_response, load_batch,
+    apply_filters, apply_range, apply_sorting, TRUE_VALUES, FALSE_VALUES
+)
+from sqlalchemy import insert, update, delete, select
 
 bp = Blueprint('api', __name__)
 book_schema = BookSchema()
 books_schema = BookSchema(many=True)
+books_patch_schema = BookSchema(many=True, partial=True)
+
+FILTER_FIELDS = ('genre', 'author', 'availability', 'publication_year')
+SORT_FIELDS = ('id', 'title', 'author', 'genre', 'publication_year', 'availability')
+
+def _list_param(args, name):
+    """Read a filter that may repeat or be comma separated: ?genre=A&genre=B or ?genre=A,B"""
+    values = [value.strip() for raw in args.getlist(name) for value in raw.split(',')]
+    values = [value for value in values if value]
+    if not values:
+        return None
+    return values if len(values) > 1 else values[0]
+
+def _int_param(args, name):
+    value = args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer')
+
+def _bool_param(args, name):
+    value = args.get(name)
+    if value is None or value == '':
+        return None
+    if value.lower() in TRUE_VALUES:
+        return True
+    if value.lower() in FALSE_VALUES:
+        return False
+    raise ValueError(f'{name} must be true or false')
+
+def parse_book_filters(args):
+    """
+    Parse the list filters from query string arguments (any mapping with
+    get/getlist, so the ASGI app shares it)
+    Returns: (filters, year_from, year_to) where filters suits apply_filters
+    """
+    filters = {}
+    for field in ('genre', 'author'):
+        filters[field] = _list_param(args, field)
+
+    availability = _bool_param(args, 'availability')
+    if availability is not None:
+        filters['availability'] = availability
+
+    years = _list_param(args, 'publication_year')
+    if years is not None:
+        try:
+            filters['publication_year'] = [int(year) for year in years] if isinstance(years, list) else int(years)
+        except ValueError:
+            raise ValueError('publication_year must be an integer')
+
+    return filters, _int_param(args, 'year_from'), _int_param(args, 'year_to')
+
+def _load_books():
+    """Run the list query for the current request and serialize the page"""
+    # Plain column tuples skip ORM identity-map and marshmallow overhead
+    query = db.session.query(*book_columns())
+
+    # Filters are pushed down to SQL and served by the book indexes
+    filters, year_from, year_to = parse_book_filters(request.args)
+    query = apply_filters(query, Book, filters)
+    query = apply_range(query, Book, 'publication_year', year_from, year_to)
+
+    sort_by = request.args.get('sort_by')
+    sort_order = request.args.get('sort_order', 'asc').lower()
+    if sort_by is not None and sort_by not in SORT_FIELDS:
+        raise ValueError(f"sort_by must be one of: {', '.join(SORT_FIELDS)}")
+    if sort_order not in ('asc', 'desc'):
+        raise ValueError('sort_order must be asc or desc')
+
+    # Search functionality, ranked by relevance when the FTS index is present
+    search_query = request.args.get('q')
+    sort_columns = {}
+    if search_query:
+        query, rank = apply_search(query, search_query)
+        if rank is not None and sort_by is None:
+            sort_by, sort_columns = 'rank', {'rank': rank}
+
+    per_page = request.args.get('per_page', DEFAULT_PER_PAGE, type=int)
+    link_params = {
+        key: ','.join(request.args.getlist(key))
+        for key in ('q', 'year_from', 'year_to', 'sort_by', 'sort_order') + FILTER_FIELDS
+        if key in request.args
+    }
+
+    # Offset pagination is kept for clients that ask for a page number;
+    # it needs a COUNT(*) per request, so cursors are the default.
+    page = request.args.get('page', type=int)
+    if page is not None:
+        if sort_by in sort_columns:
+            query = query.order_by(sort_columns[sort_by])
+        else:
+            query = apply_sorting(query, Book, sort_by, sort_order)
+        query = query.order_by(Book.id.desc() if sort_order == 'desc' else Book.id)
+        result = paginate_query(query, page, per_page)
+        pagination = {key: value for key, value in result.items() if key != 'items'}
+        pagination['links'] = build_pagination_links(
+            request.path, result['current_page'], result['per_page'], result['pages'],
+            **link_params
+        )
+        return {'data': rows_to_dicts(result['items']), 'pagination': pagination}
+
+    after = request.args.get('after')
+    result = paginate_keyset(
+        query, Book, per_page, after=after,
+        sort_by=sort_by, sort_order=sort_order, sort_columns=sort_columns
+    )
+
+    pagination = {key: value for key, value in result.items() if key != 'items'}
+    pagination['links'] = build_cursor_links(
+        request.path, result['per_page'], after, result['next_cursor'],
+        **link_params
+    )
+    return {'data': rows_to_dicts(result['items']), 'pagination': pagination}
+
+def _cached_response(payload, hit, **kwargs):
+    """Wrap a cached payload in the standard envelope and tag cache status and ETag"""
+    response, status = format_response(payload['data'], **kwargs)
+    if payload['etag']:
+        response.set_etag(payload['etag'])
+    if cache.enabled:
+        response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response, status
+
+def _fill_cache(key, payload, version):
+    """
+    Cache a payload. version is the catalog version the request read before
+    the payload. A replica's answer is cached only if that version has caught
+    up with the primary; a lagging one would be stored under the current
+    generation and served to clients whose reads are pinned to the primary
+    to see their own writes.
+    """
+    if reading_from_replica() and version < current_catalog_version(primary=True):
+        return
+    cache.set(key, payload)
+
+def _list_etag(version):
+    """ETag for the list-style response to this request, or None when ETags are off"""
+    return list_etag(version, request.host + request.path, request.args) if etags_enabled() else None
+
+def _matches(etag):
+    return etag is not None and etag in request.if_none_match
+
+def _not_modified(etag):
+    """Answer a conditional GET whose ETag still matches, without a body"""
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
 
 @bp.route('/books', methods=['GET'])
 def get_books():
-    # Search functionality
+    key = cache.list_key(request.host, request.args)
+    payload = cache.get(key)
+    hit = payload is not None
+
+    if payload is None:
+        # The catalog version is one primary key lookup, so unchanged
+        # lists are answered before running the list query at all
+        version = current_catalog_version()
+        etag = _list_etag(version)
+        if _matches(etag):
+            return _not_modified(etag)
+
+        try:
+            payload = _load_books()
+        except ValueError as e:
+            return format_response(None, 400, message=str(e))
+        payload['etag'] = etag
+        _fill_cache(key, payload, version)
+    elif _matches(payload['etag']):
+        return _not_modified(payload['etag'])
+
+    return _cached_response(payload, hit, pagination=payload['pagination'])
+
+@bp.route('/books/facets', methods=['GET'])
+def get_book_facets():
+    """Book counts per genre, decade and availability for the books the list filters select"""
+    # The path is part of the key so facets never collide with a list page for the same query
+    key = cache.list_key(request.host + request.path, request.args)
+    payload = cache.get(key)
+    hit = payload is not None
+
+    if payload is None:
+        version = current_catalog_version()
+        etag = _list_etag(version)
+        if _matches(etag):
+            return _not_modified(etag)
+
+        try:
+            filters, year_from, year_to = parse_book_filters(request.args)
+        except ValueError as e:
+            return format_response(None, 400, message=str(e))
+        search_query = request.args.get('q')
+        filtered = search_query or year_from is not None or year_to is not None or \
+            any(value is not None for value in filters.values())
+
+        if not filtered and facet_counts_maintained():
+            data = stored_facet_counts()
+        else:
+            query = apply_filters(db.session.query(Book), Book, filters)
+            query = apply_range(query, Book, 'publication_year', year_from, year_to)
+            if search_query:
+                query, _ = apply_search(query, search_query)
+            data = grouped_facet_counts(query)
+        payload = {'data': data, 'etag': etag}
+        _fill_cache(key, payload, version)
+    elif _matches(payload['etag']):
+        return _not_modified(payload['etag'])
+
+    return _cached_response(payload, hit)
+
+def _load_fuzzy_matches():
+    """
+    Run a fuzzy search for the current request
+    Returns: (data, version) where version is the catalog version of the
+    vocabulary used, or None when there is no vocabulary
+    """
+    search_query = request.args.get('q', '').strip()
+    if not search_query:
+        raise ValueError('q is required')
+    limit = max(1, min(request.args.get('limit', DEFAULT_PER_PAGE, type=int), MAX_PER_PAGE))
+    threshold = request.args.get('threshold', current_app.config.get('FUZZY_THRESHOLD', 0.3), type=float)
+    if not 0 < threshold <= 1:
+        raise ValueError('threshold must be greater than 0 and at most 1')
+
+    filters, year_from, year_to = parse_book_filters(request.args)
+    query = apply_filters(db.session.query(*book_columns()), Book, filters)
+    query = apply_range(query, Book, 'publication_year', year_from, year_to)
+
+    if not fuzzy_available():
+        # Without the FTS5 vocabulary there is nothing to correct against
+        rows = query.filter(ilike_clause(search_query)).order_by(Book.id).limit(limit).all()
+        return {'books': [dict(book, similarity=None) for book in rows_to_dicts(rows)], 'terms': {}}, None
+
+    rows, scores, terms = fuzzy_search(query, search_query, limit, threshold)
+    books = [dict(book, similarity=round(score, 3)) for book, score in zip(rows_to_dicts(rows), scores)]
+    return {'books': books, 'terms': terms}, vocabulary().version
+
+@bp.route('/books/fuzzy', methods=['GET'])
+def fuzzy_search_books():
+    """Books whose title or author words are similar to q, for misspelled searches"""
+    key = cache.list_key(request.host + request.path, request.args)
+    payload = cache.get(key)
+    hit = payload is not None
+
+    if payload is None:
+        version = current_catalog_version()
+        etag = _list_etag(version)
+        if _matches(etag):
+            return _not_modified(etag)
+
+        try:
+            data, vocabulary_version = _load_fuzzy_matches()
+        except ValueError as e:
+            return format_response(None, 400, message=str(e))
+        # Until a background refresh catches up, words from the latest writes
+        # are missing: tag such answers with the older version, uncached
+        if vocabulary_version is None or vocabulary_version == version:
+            payload = {'data': data, 'etag': etag}
+            _fill_cache(key, payload, version)
+        else:
+            payload = {'data': data,
+                       'etag': list_etag(vocabulary_version, request.host + request.path, request.args)}
+    elif _matches(payload['etag']):
+        return _not_modified(payload['etag'])
+
+    return _cached_response(payload, hit)
+
+@bp.route('/books/suggest', methods=['GET'])
+def suggest_books():
+    """Most popular titles and authors starting with prefix, for search box autocomplete"""
+    prefix = request.args.get('prefix', '')
+    if not prefix.strip():
+        return format_response(None, 400, message='prefix is required')
+    limit = max(1, min(request.args.get('limit', DEFAULT_SUGGESTIONS, type=int), MAX_SUGGESTIONS))
+
+    # Served from memory; the index keeps itself current, so there is
+    # nothing for the response cache to add
+    if suggestions_maintained():
+        return format_response(suggest(prefix, limit))
+    return format_response(query_suggestions(prefix.strip(), limit))
+
+@bp.route('/books/export', methods=['GET'])
+def export_books():
+    export_format = request.args.get('format', 'jsonl').lower()
+    if export_format not in EXPORT_FORMATS:
+        return format_response(
+            None, 400,
+            message=f"Unsupported format, use one of: {', '.join(EXPORT_FORMATS)}"
+        )
+
     search_query = request.args.get('q')
-    if search_query:
-        books = Book.query.filter(
-            or_(
-                Book.title.ilike(f'%{search_query}%'),
-                Book.author.ilike(f'%{search_query}%')
-            )
-        ).all()
-    else:
-        books = Book.query.all()
-    
-    return jsonify(books_schema.dump(books))
+    whereclause = search_clause(search_query) if search_query else None
+
+    # Rows are read with a server-side cursor and encoded chunk by chunk,
+    # so memory stays flat however large the catalog is
+    chunks = ENCODERS[export_format](iter_book_rows(whereclause))
+    extension = 'jsonl' if export_format == 'ndjson' else export_format
+    return Response(
+        stream_with_context(chunks),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename=books.{extension}'}
+    )
 
 @bp.route('/books/<int:id>', methods=['GET'])
 def get_book(id):
-    book = Book.query.get_or_404(id)
-    return jsonify(book_schema.dump(book))
+    key = cache.book_key(id)
+    payload = cache.get(key)
+    hit = payload is not None
+
+    if payload is None:
+        # Only needed to tell whether a replica's answer may be cached
+        version = current_catalog_version() if reading_from_replica() else None
+        book = db.session.get(Book, id)
+        if book is None:
+            abort(404)
+        etag = book_etag(book.id, book.version) if etags_enabled() else None
+        if _matches(etag):
+            return _not_modified(etag)
+        payload = {'data': book_schema.dump(book), 'etag': etag}
+        _fill_cache(key, payload, version)
+    elif _matches(payload['etag']):
+        return _not_modified(payload['etag'])
+
+    return _cached_response(payload, hit)
 
 @bp.route('/books', methods=['POST'])
 def create_book():
     data = request.get_json()
     errors = book_schema.validate(data)
     if errors:
-        return jsonify(errors), 400
+        return format_response(errors, 400, message='Validation failed')
     
     book = Book(
         title=data['title'],
@@ -46,16 +370,17 @@ def create_book():
     
     db.session.add(book)
     db.session.commit()
+    cache.invalidate()
     
-    return jsonify(book_schema.dump(book)), 201
+    return format_response(book_schema.dump(book), 201, message='Book created successfully')
 
 @bp.route('/books/<int:id>', methods=['PUT'])
 def update_book(id):
-    book = Book.query.get_or_404(id)
+    book = db.get_or_404(Book, id)
     data = request.get_json()
     errors = book_schema.validate(data)
     if errors:
-        return jsonify(errors), 400
+        return format_response(errors, 400, message='Validation failed')
     
     book.title = data['title']
     book.author = data['author']
@@ -64,13 +389,197 @@ def update_book(id):
     book.availability = data.get('availability', book.availability)
     
     db.session.commit()
+    cache.invalidate()
     
-    return jsonify(book_schema.dump(book))
+    return format_response(book_schema.dump(book), message='Book updated successfully')
 
 @bp.route('/books/<int:id>', methods=['DELETE'])
 def delete_book(id):
-    book = Book.query.get_or_404(id)
+    book = db.get_or_404(Book, id)
     db.session.delete(book)
     db.session.commit()
+    cache.invalidate()
     
-    return '', 204
\ No newline at end of file
+    return '', 204
+
+
+def _bulk_items(data, key):
+    """Pull the item list out of a bulk request body, or return an error response"""
+    items = data.get(key) if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return None, format_response(None, 400, message=f'Expected a non-empty list of {key}')
+    if len(items) > MAX_BULK_ITEMS:
+        return None, format_response(
+            None, 413, message=f'A bulk request may contain at most {MAX_BULK_ITEMS} {key}'
+        )
+    return items, None
+
+def _is_book_id(value):
+    # JSON true/false arrive as bool, which is an int subclass
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _bulk_response(results, action):
+    """Summarise per-item results; 207 signals that some items failed"""
+    failed = sum(1 for result in results if result['status'] == 'error')
+    if failed == len(results):
+        status = 400
+    elif failed:
+        status = 207
+    else:
+        status = 201 if action == 'created' else 200
+    message = f'{len(results) - failed} books {action}, {failed} failed'
+    return format_response(results, status, message=message)
+
+@bp.route('/books/bulk', methods=['POST'])
+def bulk_create_books():
+    items, error = _bulk_items(request.get_json(silent=True), 'books')
+    if error:
+        return error
+
+    valid, errors = load_batch(books_schema, items)
+    results = [{'index': index, 'status': 'error', 'errors': messages}
+               for index, messages in errors.items()]
+
+    if valid:
+        # One executemany INSERT inside a single transaction
+        ids = db.session.scalars(
+            insert(Book).returning(Book.id, sort_by_parameter_order=True),
+            [data for _, data in valid]
+        ).all()
+        db.session.commit()
+        cache.invalidate()
+        results.extend({'index': index, 'status': 'created', 'id': book_id}
+                       for (index, _), book_id in zip(valid, ids))
+
+    results.sort(key=lambda result: result['index'])
+    return _bulk_response(results, 'created')
+
+@bp.route('/books/bulk', methods=['PATCH'])
+def bulk_update_books():
+    items, error = _bulk_items(request.get_json(silent=True), 'books')
+    if error:
+        return error
+
+    # The id selects the row; the remaining fields are a partial BookSchema
+    ids, fields = [], []
+    for item in items:
+        if isinstance(item, dict):
+            item = dict(item)
+            ids.append(item.pop('id', None))
+        else:
+            ids.append(None)
+        fields.append(item)
+
+    valid, errors = load_batch(books_patch_schema, fields)
+    results = [{'index': index, 'status': 'error', 'errors': messages}
+               for index, messages in errors.items()]
+
+    candidates = [index for index, _ in valid if _is_book_id(ids[index])]
+    existing = set(db.session.scalars(
+        select(Book.id).where(Book.id.in_([ids[index] for index in candidates]))
+    )) if candidates else set()
+
+    rows = []
+    for index, data in valid:
+        book_id = ids[index]
+        if not _is_book_id(book_id):
+            results.append({'index': index, 'status': 'error', 'errors': {'id': ['Missing or invalid id.']}})
+        elif book_id not in existing:
+            results.append({'index': index, 'status': 'error', 'id': book_id, 'errors': {'id': ['Book not found.']}})
+        elif not data:
+            results.append({'index': index, 'status': 'error', 'id': book_id, 'errors': {'_schema': ['No fields to update.']}})
+        else:
+            rows.append(dict(data, id=book_id))
+            results.append({'index': index, 'status': 'updated', 'id': book_id})
+
+    if rows:
+        # ORM bulk UPDATE by primary key, batched per set of changed columns
+        db.session.execute(update(Book), rows)
+        db.session.commit()
+        cache.invalidate()
+
+    results.sort(key=lambda result: result['index'])
+    return _bulk_response(results, 'updated')
+
+@bp.route('/books/bulk', methods=['DELETE'])
+def bulk_delete_books():
+    ids, error = _bulk_items(request.get_json(silent=True), 'ids')
+    if error:
+        return error
+
+    wanted = {book_id for book_id in ids if _is_book_id(book_id)}
+    existing = set(db.session.scalars(select(Book.id).where(Book.id.in_(wanted)))) if wanted else set()
+
+    if existing:
+        db.session.execute(
+            delete(Book).where(Book.id.in_(existing)).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        cache.invalidate()
+
+    results, seen = [], set()
+    for index, book_id in enumerate(ids):
+        if not _is_book_id(book_id):
+            results.append({'index': index, 'status': 'error', 'id': book_id, 'errors': {'id': ['Invalid id.']}})
+        elif book_id in seen:
+            results.append({'index': index, 'status': 'error', 'id': book_id, 'errors': {'id': ['Duplicate id.']}})
+        else:
+            seen.add(book_id)
+            if book_id in existing:
+                results.append({'index': index, 'status': 'deleted', 'id': book_id})
+            else:
+                results.append({'index': index, 'status': 'error', 'id': book_id, 'errors': {'id': ['Book not found.']}})
+    return _bulk_response(results, 'deleted')
+
+@bp.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return format_response(cache.stats())
+
+
+def _job_payload(job):
+    payload = job.to_dict()
+    if job.status == 'succeeded' and (job.result or {}).get('filename'):
+        payload['result_url'] = url_for('api.get_job_result', id=job.id)
+    return payload
+
+def _job_or_404(id):
+    # Job rows change while the job runs; a lagging replica would report stale progress
+    use_primary()
+    job = db.session.get(Job, id, populate_existing=True)
+    if job is None:
+        abort(404)
+    return job
+
+@bp.route('/jobs', methods=['POST'])
+def create_job():
+    data = request.get_json(silent=True)
+    job_type = data.get('type') if isinstance(data, dict) else None
+    if job_type not in JOB_TYPES:
+        return format_response(None, 400, message=f"type must be one of: {', '.join(JOB_TYPES)}")
+    params = data.get('params') or {}
+    if not isinstance(params, dict):
+        return format_response(None, 400, message='params must be an object')
+
+    try:
+        job = job_runner.submit(job_type, params)
+    except ValueError as e:
+        return format_response(None, 400, message=str(e))
+
+    response, status = format_response(_job_payload(job), 202, message='Job accepted')
+    response.headers['Location'] = url_for('api.get_job', id=job.id)
+    return response, status
+
+@bp.route('/jobs/<int:id>', methods=['GET'])
+def get_job(id):
+    return format_response(_job_payload(_job_or_404(id)))
+
+@bp.route('/jobs/<int:id>/result', methods=['GET'])
+def get_job_result(id):
+    job = _job_or_404(id)
+    if job.status != 'succeeded' or not (job.result or {}).get('filename'):
+        return format_response(None, 404, message='This job has no result file')
+    return send_from_directory(
+        result_dir(), job.result['filename'],
+        mimetype=EXPORT_FORMATS.get(job.result.get('format'), 'application/octet-stream'),
+        as_attachment=True
+    )
@@ -0,0 +1,126 @@
+import re
+from flask import current_app
+from sqlalchemy import DDL, event, or_, select, text, column, table, literal_column
+from app import db
+from app.models import Book
+from app.utils import LIKE_ESCAPE, escape_like
+
+# SQLite FTS5 index over Book.title and Book.author. It is an external
+# content table, so it stores only the index and reads rows from `book`;
+# the triggers below keep it in sync on insert/update/delete.
+SEARCH_TABLE = 'book_fts'
+# Read-only view of the index's terms (one row per distinct token), used
+# by fuzzy search to correct misspelled words
+VOCAB_TABLE = 'book_fts_vocab'
+
+SEARCH_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        title, author,
+        content='book', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ai AFTER INSERT ON book BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ad AFTER DELETE ON book BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title, author)
+        VALUES ('delete', old.id, old.title, old.author);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_au AFTER UPDATE OF title, author ON book BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title, author)
+        VALUES ('delete', old.id, old.title, old.author);
+        INSERT INTO {SEARCH_TABLE}(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END""",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {VOCAB_TABLE} USING fts5vocab({SEARCH_TABLE}, 'row')",
+]
+
+for statement in SEARCH_DDL:
+    event.listen(Book.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+for statement in (f"DROP TABLE IF EXISTS {VOCAB_TABLE}", f"DROP TABLE IF EXISTS {SEARCH_TABLE}"):
+    event.listen(Book.__table__, 'before_drop', DDL(statement).execute_if(dialect='sqlite'))
+
+search_table = table(SEARCH_TABLE, column('rowid'), column(SEARCH_TABLE))
+search_rank = literal_column(f'{SEARCH_TABLE}.rank')
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+def build_match_expression(search_query):
+    """
+    Turn free text into an FTS5 MATCH expression where every word must
+    appear as a prefix of a title or author token, e.g. 'tolk hob' ->
+    '"tolk"* "hob"*'. Returns None if the text has no searchable words.
+    """
+    tokens = TOKEN_PATTERN.findall(search_query or '')
+    if not tokens:
+        return None
+    return ' '.join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+
+def ilike_clause(search_query):
+    """Substring match used when the FTS5 index is not available"""
+    pattern = f'%{escape_like(search_query)}%'
+    return or_(
+        Book.title.ilike(pattern, escape=LIKE_ESCAPE),
+        Book.author.ilike(pattern, escape=LIKE_ESCAPE)
+    )
+
+def search_index_available(name=SEARCH_TABLE, app=None):
+    """
+    Check whether the FTS5 index (or another search table) exists in the
+    app's database. The tables only appear through a migration or
+    rebuild_search_index, so the answer is looked up once per app rather
+    than on every request.
+    """
+    app = app or current_app
+    available = app.extensions.setdefault('search_tables', {})
+    if name not in available:
+        available[name] = db.engine.dialect.name == 'sqlite' and db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': name}
+        ).first() is not None
+    return available[name]
+
+def rebuild_search_index():
+    """Create the FTS5 index if missing and rebuild it from the book table"""
+    for statement in SEARCH_DDL:
+        db.session.execute(text(statement))
+    db.session.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"))
+    db.session.commit()
+    # The tables may be new; look again on the next search
+    current_app.extensions.pop('search_tables', None)
+
+def apply_search(query, search_query, index_available=None):
+    """
+    Restrict a Book query to rows matching the search text.
+    Callers without a Flask-SQLAlchemy session pass index_available.
+    Returns: (query, rank_expression) where rank_expression orders results
+    by relevance (lower is better) or is None when the ILIKE fallback is used.
+    """
+    if index_available is None:
+        index_available = search_index_available()
+    if index_available:
+        match = build_match_expression(search_query)
+        if match is None:
+            return query.filter(db.false()), None
+        query = query.join(search_table, search_table.c.rowid == Book.id).filter(
+            search_table.c[SEARCH_TABLE].op('MATCH')(match)
+        )
+        return query, search_rank
+
+    return query.filter(ilike_clause(search_query)), None
+
+def search_clause(search_query):
+    """
+    Build a WHERE clause selecting books that match the search text,
+    for statements that cannot join the index (e.g. streamed exports)
+    """
+    if search_index_available():
+        match = build_match_expression(search_query)
+        if match is None:
+            return db.false()
+        return Book.id.in_(
+            select(search_table.c.rowid).where(search_table.c[SEARCH_TABLE].op('MATCH')(match))
+        )
+
+    return ilike_clause(search_query)
@@ -0,0 +1,425 @@
+"""
+Autocomplete for the search box: titles and authors starting with a
+prefix, most popular first, answered from memory.
+
+Popularity is the number of books sharing the title or author, so
+prolific authors and titles with many editions come first; ties are
+alphabetical. Triggers keep those counts in `book_suggestion` for every
+writer and stamp each change with an increasing seq. Each process loads
+the table once into a sorted array (PrefixIndex) and then only reads the
+rows changed since the seq it last saw, keeping them in a small overlay
+until the next rebuild.
+"""
+import logging
+import threading
+import time
+import heapq
+from bisect import bisect_left, insort
+import numpy as np
+from flask import current_app
+from sqlalchemy import DDL, event, func, inspect, select
+from app import db
+from app.fuzzy import normalize
+from app.models import Book, BookSuggestion
+from app.search import TOKEN_PATTERN
+from app.utils import LIKE_ESCAPE, escape_like
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('title', 'author')
+
+# Entries per leaf block of the PrefixIndex tree, and how many of the most
+# popular entries each tree node keeps (the largest limit it can answer)
+BLOCK_SIZE = 64
+TOP_WIDTH = 32
+
+DEFAULT_SUGGESTIONS = 10
+MAX_SUGGESTIONS = 20
+
+# Sorts after every character, to bound the range of keys with a prefix
+MAX_CHAR = '\U0010ffff'
+
+
+def _adjust(kind, row, delta):
+    return (
+        f"INSERT INTO book_suggestion (kind, value, count, seq) VALUES ('{kind}', {row}.{kind}, {delta}, "
+        "(SELECT coalesce(max(seq), 0) + 1 FROM book_suggestion))"
+        " ON CONFLICT (kind, value) DO UPDATE SET count = count + excluded.count, seq = excluded.seq;"
+    )
+
+
+def _adjust_all(row, delta):
+    return '\n        '.join(_adjust(kind, row, delta) for kind in KINDS)
+
+
+SUGGEST_DDL = [
+    f"""CREATE TRIGGER IF NOT EXISTS book_suggestion_ai AFTER INSERT ON book BEGIN
+        {_adjust_all('new', 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS book_suggestion_ad AFTER DELETE ON book BEGIN
+        {_adjust_all('old', -1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS book_suggestion_au AFTER UPDATE OF title, author ON book BEGIN
+        {_adjust_all('old', -1)}
+        {_adjust_all('new', 1)}
+    END""",
+]
+
+# Counts for books that already exist (migrations)
+SUGGEST_BACKFILL = [
+    f"""INSERT INTO book_suggestion (kind, value, count, seq)
+        SELECT '{kind}', {kind}, COUNT(*), 0 FROM book GROUP BY {kind}"""
+    for kind in KINDS
+]
+
+# On the metadata, so book and book_suggestion both exist whatever order create_all makes them in
+for statement in SUGGEST_DDL:
+    event.listen(db.metadata, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+
+def normalize_text(text):
+    """Lowercase, strip diacritics and reduce punctuation and spacing to single spaces"""
+    return ' '.join(TOKEN_PATTERN.findall(normalize(text)))
+
+
+def normalize_prefix(prefix):
+    """Like normalize_text, but 'the ' keeps its space so it does not match 'theory'"""
+    key = normalize_text(prefix)
+    if key and not prefix[-1:].isalnum():
+        key += ' '
+    return key
+
+
+def merge_variants(counts):
+    """
+    Titles or authors that differ only in case or punctuation are one
+    suggestion: its books are summed and it shows the most popular
+    spelling, alphabetical on ties.
+    Returns: (books, text) for {text: books}; text is None if books is 0
+    """
+    live = [(-count, value) for value, count in counts.items() if count > 0]
+    if not live:
+        return 0, None
+    return -sum(count for count, _ in live), min(live)[1]
+
+
+class PrefixIndex:
+    """
+    Suggestions sorted by normalized text, so the entries with a prefix
+    are one contiguous range found by bisection. Spellings with the same
+    normalized text and kind are merged into one entry (merge_variants)
+    before ranking. To pick the most popular entries of a range without
+    scanning it, the array is cut into blocks and a segment tree over the
+    blocks stores each node's TOP_WIDTH most popular entries: a range is
+    covered by its two partial end blocks plus O(log n) nodes, whatever
+    its size. Immutable once built.
+    """
+
+    def __init__(self, entries):
+        entries = sorted(entries)
+        # Spellings of one suggestion are adjacent once sorted; entry i
+        # merges variants starts[i] to starts[i + 1] - 1
+        self.variant_values = [entry[2] for entry in entries]
+        self.variant_counts = np.array([entry[3] for entry in entries], dtype=np.int64)
+        self.keys, self.kinds, starts = [], [], []
+        for position, (key, kind, _, _) in enumerate(entries):
+            if not starts or key != self.keys[-1] or kind != self.kinds[-1]:
+                self.keys.append(key)
+                self.kinds.append(kind)
+                starts.append(position)
+        self.starts = np.array(starts + [len(entries)], dtype=np.int64)
+        self.counts = np.add.reduceat(self.variant_counts, starts) if starts else np.zeros(0, dtype=np.int64)
+        self.values = [
+            self.variant_values[start] if end - start == 1 else merge_variants(self.variants(i))[1]
+            for i, (start, end) in enumerate(zip(starts, self.starts[1:].tolist()))
+        ]
+        self.levels = self._build_levels()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _top(self, candidates):
+        # Most popular first, then alphabetical (lower index); -1 pads
+        counts = np.where(candidates >= 0, self.counts[candidates], -1)
+        order = np.lexsort((candidates, -counts), axis=-1)[..., :TOP_WIDTH]
+        return np.take_along_axis(candidates, order, axis=-1)
+
+    def _build_levels(self):
+        blocks = len(self.keys) // BLOCK_SIZE
+        if not blocks:
+            return []
+        size = 1 << (blocks - 1).bit_length()
+        leaves = np.full((size, max(BLOCK_SIZE, TOP_WIDTH)), -1, dtype=np.int64)
+        leaves[:blocks, :BLOCK_SIZE] = np.arange(blocks * BLOCK_SIZE).reshape(blocks, BLOCK_SIZE)
+        levels = [self._top(leaves)]
+        while len(levels[-1]) > 1:
+            levels.append(self._top(levels[-1].reshape(len(levels[-1]) // 2, 2 * TOP_WIDTH)))
+        return levels
+
+    def find(self, key, kind):
+        """Position of the entry for normalized text key and kind, or -1"""
+        i = bisect_left(self.keys, key)
+        while i < len(self.keys) and self.keys[i] == key:
+            if self.kinds[i] == kind:
+                return i
+            i += 1
+        return -1
+
+    def variants(self, i):
+        """{text: books} of the spellings merged into entry i"""
+        start, end = self.starts[i], self.starts[i + 1]
+        return dict(zip(self.variant_values[start:end], self.variant_counts[start:end].tolist()))
+
+    def range(self, key):
+        """(lo, hi) index range of the entries whose key starts with key"""
+        return bisect_left(self.keys, key), bisect_left(self.keys, key + MAX_CHAR)
+
+    def top(self, lo, hi, limit, exclude=()):
+        """
+        Indices of the `limit` most popular entries in [lo, hi), best
+        first, skipping the indices in exclude. A tree node whose kept
+        entries fall short of limit once exclude is removed is replaced
+        by its two children, so excluding many entries costs a deeper walk
+        under them instead of sorting the whole range.
+        """
+        if hi <= lo or limit <= 0:
+            return []
+        exclude = np.fromiter(exclude, dtype=np.int64)
+        if limit > TOP_WIDTH:
+            candidates = np.arange(lo, hi)
+        else:
+            first, last = -(-lo // BLOCK_SIZE), hi // BLOCK_SIZE
+            if first >= last:
+                candidates = np.arange(lo, hi)
+            else:
+                parts = [np.arange(lo, first * BLOCK_SIZE), np.arange(last * BLOCK_SIZE, hi)]
+                nodes = []
+                level = 0
+                while first < last:
+                    if first & 1:
+                        nodes.append((level, first))
+                        first += 1
+                    if last & 1:
+                        last -= 1
+                        nodes.append((level, last))
+                    first, last, level = first >> 1, last >> 1, level + 1
+                while nodes:
+                    level, node = nodes.pop()
+                    entries = self.levels[level][node]
+                    # A padded node holds every entry below it
+                    kept = np.count_nonzero((entries >= 0) & ~np.isin(entries, exclude))
+                    if kept >= limit or entries[-1] < 0:
+                        parts.append(entries)
+                    elif level:
+                        nodes += [(level - 1, 2 * node), (level - 1, 2 * node + 1)]
+                    else:
+                        parts.append(np.arange(node * BLOCK_SIZE, (node + 1) * BLOCK_SIZE))
+                candidates = np.concatenate(parts)
+                candidates = candidates[candidates >= 0]
+        if len(exclude):
+            candidates = candidates[~np.isin(candidates, exclude)]
+        return candidates[np.lexsort((candidates, -self.counts[candidates]))[:limit]].tolist()
+
+
+class SuggestionState:
+    """A PrefixIndex plus the counts changed since it was built, as of `seq`"""
+
+    def __init__(self, index, seq, changes=None, merged=None, changed=None, replaced=None):
+        self.index = index
+        self.seq = seq
+        # Per changed (key, kind): the current {text: books} of its changed
+        # spellings, and the merged (books, text) over all its spellings;
+        # the same (key, kind) pairs sorted for range lookups; and the
+        # subset of those that are also in the index, with an outdated count
+        self.changes = changes or {}
+        self.merged = merged or {}
+        self.changed = changed or []
+        self.replaced = replaced or []
+
+
+def load_state():
+    """Build a SuggestionState from the book_suggestion table"""
+    # Read seq first: rows changed while loading are read again later,
+    # which is harmless since they carry absolute counts
+    seq = db.session.scalar(select(func.max(BookSuggestion.seq))) or 0
+    rows = db.session.execute(
+        select(BookSuggestion.kind, BookSuggestion.value, BookSuggestion.count).where(BookSuggestion.count > 0)
+    )
+    entries = []
+    for kind, value, count in rows:
+        key = normalize_text(value)
+        if key:
+            entries.append((key, kind, value, count))
+    return SuggestionState(PrefixIndex(entries), seq)
+
+
+class Suggestions:
+    """The suggestion index of one app"""
+
+    def __init__(self):
+        self.state = None
+        self.checked = None
+        self._rebuilding = False
+        self._lock = threading.Lock()
+
+    def sync(self, refresh_interval, rebuild_changes):
+        """
+        Load the index on first use, then read the rows changed since
+        the last look, at most once per refresh_interval seconds. Once
+        more than rebuild_changes entries have changed, a new index is
+        built on a background thread while requests keep using this one.
+        """
+        with self._lock:
+            if self.state is None:
+                self.state, self.checked = load_state(), time.monotonic()
+                return self.state
+
+        now = time.monotonic()
+        if now - self.checked < refresh_interval:
+            return self.state
+        self.checked = now
+
+        state = self.state
+        rows = db.session.execute(
+            select(BookSuggestion.kind, BookSuggestion.value, BookSuggestion.count, BookSuggestion.seq)
+            .where(BookSuggestion.seq > state.seq)
+        ).all()
+        if rows:
+            # Copy rather than update in place: other threads may be reading state
+            changes, merged = dict(state.changes), dict(state.merged)
+            changed, replaced = list(state.changed), list(state.replaced)
+            touched = set()
+            for kind, value, count, _ in rows:
+                key = normalize_text(value)
+                if not key:
+                    continue
+                entry = (key, kind)
+                if entry not in changes:
+                    insort(changed, entry)
+                    if state.index.find(key, kind) >= 0:
+                        insort(replaced, entry)
+                    changes[entry] = {}
+                elif entry not in touched:
+                    changes[entry] = dict(changes[entry])
+                touched.add(entry)
+                changes[entry][value] = count
+            for entry in touched:
+                i = state.index.find(*entry)
+                counts = state.index.variants(i) if i >= 0 else {}
+                counts.update(changes[entry])
+                merged[entry] = merge_variants(counts)
+            with self._lock:
+                if self.state is state:
+                    self.state = SuggestionState(
+                        state.index, max(row[3] for row in rows), changes, merged, changed, replaced
+                    )
+            if len(changes) > rebuild_changes:
+                self._rebuild(current_app._get_current_object())
+        return self.state
+
+    def _rebuild(self, app):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild_in_context, args=(app,), daemon=True).start()
+
+    def _rebuild_in_context(self, app):
+        with app.app_context():
+            try:
+                state = load_state()
+                with self._lock:
+                    self.state = state
+            except Exception:
+                logger.exception('Rebuilding the suggestion index failed')
+            finally:
+                self._rebuilding = False
+                db.session.remove()
+
+
+def suggestions(app=None):
+    app = app or current_app
+    index = app.extensions.get('suggestions')
+    if index is None:
+        index = app.extensions['suggestions'] = Suggestions()
+    return index
+
+
+def suggestions_maintained(app=None):
+    """
+    Check whether the trigger-maintained book_suggestion table exists in
+    the app's database. The table only appears through a migration, so
+    the answer is looked up once per app rather than on every request.
+    """
+    app = app or current_app
+    maintained = app.extensions.get('suggestions_maintained')
+    if maintained is None:
+        maintained = db.engine.dialect.name == 'sqlite' and \
+            inspect(db.engine).has_table(BookSuggestion.__tablename__)
+        app.extensions['suggestions_maintained'] = maintained
+    return maintained
+
+
+def preload_suggestions(app):
+    """Build the suggestion index at startup, so the first keystroke does not pay for it"""
+    with app.app_context():
+        if suggestions_maintained(app):
+            suggestions(app).sync(0, app.config.get('SUGGEST_REBUILD_CHANGES', 10000))
+        db.session.remove()
+
+
+def suggest(prefix, limit):
+    """
+    The `limit` most popular titles and authors starting with prefix
+    Returns: [{'text', 'type', 'books'}]
+    """
+    config = current_app.config
+    state = suggestions().sync(config.get('SUGGEST_REFRESH_INTERVAL', 1), config.get('SUGGEST_REBUILD_CHANGES', 10000))
+    key = normalize_prefix(prefix)
+    if not key:
+        return []
+
+    # Entries changed since the index was built are ranked from the
+    # overlay, so the index skips the ones the overlay replaces
+    def in_range(entries):
+        return bisect_left(entries, (key,)), bisect_left(entries, (key + MAX_CHAR,))
+
+    start, end = in_range(state.replaced)
+    index = state.index
+    replaced = [index.find(*entry) for entry in state.replaced[start:end]]
+    candidates = [
+        (int(index.counts[i]), index.keys[i], index.kinds[i], index.values[i])
+        for i in index.top(*index.range(key), limit, replaced)
+    ]
+    start, end = in_range(state.changed)
+    for entry in state.changed[start:end]:
+        count, value = state.merged[entry]
+        if count > 0:
+            candidates.append((count, entry[0], entry[1], value))
+    candidates = heapq.nsmallest(limit, candidates, key=lambda candidate: (-candidate[0], candidate[1], candidate[2]))
+    return [{'text': value, 'type': kind, 'books': count} for count, _, kind, value in candidates]
+
+
+def query_suggestions(prefix, limit):
+    """
+    The same answer grouped from the book table, for databases without
+    book_suggestion. Spellings are merged among the `limit` most common
+    values of each kind, so a suggestion spread over many rarer spellings
+    may be missed.
+    """
+    pattern = escape_like(prefix) + '%'
+    variants = {}
+    for kind in KINDS:
+        column = getattr(Book, kind)
+        rows = (
+            db.session.query(column, func.count()).filter(column.ilike(pattern, escape=LIKE_ESCAPE))
+            .group_by(column).order_by(func.count().desc(), column).limit(limit)
+        )
+        for value, count in rows:
+            variants.setdefault((normalize_text(value), kind), {})[value] = count
+    results = []
+    for (key, kind), counts in variants.items():
+        count, value = merge_variants(counts)
+        results.append((count, key, kind, value))
+    results.sort(key=lambda result: (-result[0], result[1], result[2]))
+    return [{'text': value, 'type': kind, 'books': count} for count, _, kind, value in results[:limit]]
@@ -1,9 +1,20 @@
 import re
+import json
+import base64
+import binascii
+import logging
 from datetime import datetime
 from functools import wraps
+from urllib.parse import quote
 from flask import request, jsonify
+from marshmallow import ValidationError
+from sqlalchemy import and_, literal, or_
 from app import db
 
+logger = logging.getLogger(__name__)
+
+ISBN_SEPARATORS = re.compile(r'[-\s]')
+
 def validate_isbn(isbn):
     """
     Validate ISBN format (both ISBN-10 and ISBN-13)
@@ -13,7 +24,7 @@ def validate_isbn(isbn):
         return False, None
     
     # Remove hyphens and spaces
-    cleaned_isbn = re.sub(r'[-\s]', '', isbn)
+    cleaned_isbn = ISBN_SEPARATORS.sub('', isbn)
     
     # Check length
     if len(cleaned_isbn) not in [10, 13]:
@@ -68,7 +79,7 @@ def format_isbn(isbn):
     if not isbn:
         return None
     
-    cleaned_isbn = re.sub(r'[-\s]', '', isbn)
+    cleaned_isbn = ISBN_SEPARATORS.sub('', isbn)
     
     if len(cleaned_isbn) == 10:
         return f"{cleaned_isbn[0:1]}-{cleaned_isbn[1:4]}-{cleaned_isbn[4:9]}-{cleaned_isbn[9:]}"
@@ -88,7 +99,7 @@ def paginate_query(query, page, per_page):
     Returns: (paginated_items, total_count, total_pages)
     """
     page = max(1, page)
-    per_page = max(1, min(per_page, 100))  # Limit to 100 items per page
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
     
     items = query.paginate(page=page, per_page=per_page, error_out=False)
     
@@ -102,6 +113,169 @@ def paginate_query(query, page, per_page):
         'has_prev': items.has_prev
     }
 
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+MAX_BULK_ITEMS = 1000
+
+def encode_cursor(sort_by, sort_value, last_id):
+    """
+    Encode the position of the last returned row as an opaque cursor token
+    """
+    payload = json.dumps([sort_by, sort_value, last_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """
+    Decode a cursor token produced by encode_cursor
+    Returns: (sort_by, sort_value, last_id)
+    Raises ValueError if the token is malformed
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        sort_by, sort_value, last_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+    if not isinstance(last_id, int):
+        raise ValueError('Invalid cursor')
+
+    return sort_by, sort_value, last_id
+
+def paginate_keyset(query, model, per_page, after=None, sort_by=None, sort_order='asc',
+                    sort_columns=None):
+    """
+    Paginate a SQLAlchemy query by seeking past the last seen row instead of
+    using OFFSET, so every page costs the same and no COUNT(*) is issued.
+    Rows are ordered by (sort_by, id); the cursor is opaque to clients.
+    sort_columns maps extra sort keys (e.g. a search rank) to SQL expressions;
+    when one is used it is appended as the last column of each returned row.
+    """
+    query, page = keyset_query(query, model, per_page, after, sort_by, sort_order, sort_columns)
+    return keyset_page(query.all(), page)
+
+def keyset_query(query, model, per_page, after=None, sort_by=None, sort_order='asc',
+                 sort_columns=None):
+    """
+    Build the statement for one keyset page. Works on ORM queries and 2.0
+    select() statements alike, so async callers can execute it themselves.
+    Returns: (query, page) where page is passed on to keyset_page with the rows
+    Raises ValueError for a malformed cursor or one from another sort order
+    """
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    descending = sort_order.lower() == 'desc'
+    sort_columns = sort_columns or {}
+
+    computed = sort_by in sort_columns
+    if computed:
+        sort_column = sort_columns[sort_by]
+    elif sort_by and sort_by != 'id' and hasattr(model, sort_by):
+        sort_column = getattr(model, sort_by)
+    else:
+        sort_column = None
+    sort_key = sort_by if sort_column is not None else 'id'
+    # `column > NULL` never matches, so NULL sort values need their own filters
+    nullable = getattr(getattr(sort_column, 'expression', None), 'nullable', False)
+
+    if after:
+        cursor_key, cursor_value, last_id = decode_cursor(after)
+        if cursor_key != sort_key:
+            raise ValueError('Cursor does not match the requested sort order')
+
+        if sort_column is None:
+            query = query.filter(model.id < last_id if descending else model.id > last_id)
+        elif cursor_value is None:
+            # NULLs sort first, so ascending pages go on to every non-NULL
+            # value and descending pages have only NULLs left
+            same = and_(sort_column.is_(None), model.id < last_id if descending else model.id > last_id)
+            query = query.filter(same if descending else or_(same, sort_column.isnot(None)))
+        else:
+            # Bound as a literal: SQLAlchemy refuses `column > True`
+            cursor_value = literal(cursor_value, sort_column.type)
+            if descending:
+                after_value = or_(
+                    sort_column < cursor_value,
+                    and_(sort_column == cursor_value, model.id < last_id)
+                )
+                if nullable:
+                    after_value = or_(after_value, sort_column.is_(None))
+            else:
+                after_value = or_(
+                    sort_column > cursor_value,
+                    and_(sort_column == cursor_value, model.id > last_id)
+                )
+            query = query.filter(after_value)
+
+    order = [model.id.desc() if descending else model.id.asc()]
+    if sort_column is not None:
+        order.insert(0, sort_column.desc() if descending else sort_column.asc())
+    if computed:
+        query = query.add_columns(sort_column)
+
+    # Fetch one extra row to learn whether another page exists
+    query = query.order_by(*order).limit(per_page + 1)
+    return query, {'per_page': per_page, 'sort_key': sort_key, 'computed': computed}
+
+def keyset_page(rows, page):
+    """Turn the rows fetched for a keyset_query statement into a page"""
+    per_page, sort_key = page['per_page'], page['sort_key']
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+
+    if page['computed']:
+        # The computed key is the last column of each row
+        sort_values = [row[-1] for row in items]
+    else:
+        sort_values = [getattr(item, sort_key) for item in items]
+
+    next_cursor = None
+    if has_next:
+        next_cursor = encode_cursor(sort_key, sort_values[-1], items[-1].id)
+
+    return {
+        'items': items,
+        'per_page': per_page,
+        'has_next': has_next,
+        'next_cursor': next_cursor
+    }
+
+def load_batch(schema, items):
+    """
+    Deserialize a list of items with a many=True schema without failing
+    the whole batch on the first bad item
+    Returns: (valid, errors) where valid is a list of (index, data) pairs
+    and errors maps item index to marshmallow error messages
+    """
+    try:
+        loaded = schema.load(items)
+        errors = {}
+    except ValidationError as e:
+        loaded = e.valid_data
+        errors = e.messages
+
+    valid = [(index, data) for index, data in enumerate(loaded) if index not in errors]
+    return valid, errors
+
+def build_cursor_links(endpoint, per_page, after=None, next_cursor=None, **filters):
+    """Build cursor pagination links for API responses"""
+    base_url = f"{request.host_url.rstrip('/')}{endpoint}"
+
+    query_params = [f"per_page={per_page}"]
+    for key, value in filters.items():
+        if value is not None:
+            query_params.append(f"{key}={quote(str(value))}")
+
+    query_string = "&".join(query_params)
+
+    links = {
+        'self': f"{base_url}?{query_string}" + (f"&after={after}" if after else ''),
+        'first': f"{base_url}?{query_string}"
+    }
+
+    if next_cursor:
+        links['next'] = f"{base_url}?{query_string}&after={next_cursor}"
+
+    return links
+
 def build_pagination_links(endpoint, page, per_page, total_pages, **filters):
     """Build pagination links for API responses"""
     base_url = f"{request.host_url.rstrip('/')}{endpoint}"
@@ -182,12 +356,12 @@ def generate_book_slug(title, author):
     
     return f"{author_slug}-{title_slug}"
 
-def format_response(data, status=200, message=None, pagination=None):
+def build_envelope(data, status=200, message=None, pagination=None):
     """
-    Standardize API response format
+    The standard API response body, shared by the Flask and ASGI apps
     """
     response = {
-        'success': status in [200, 201],
+        'success': status in [200, 201, 202],
         'data': data,
         'timestamp': datetime.utcnow().isoformat()
     }
@@ -198,16 +372,30 @@ def format_response(data, status=200, message=None, pagination=None):
     if pagination:
         response['pagination'] = pagination
     
-    return jsonify(response), status
+    return response
+
+def format_response(data, status=200, message=None, pagination=None):
+    """
+    Standardize API response format
+    """
+    return jsonify(build_envelope(data, status, message, pagination)), status
 
 def log_operation(operation, details):
     """
     Simple logging utility for database operations
     """
-    timestamp = datetime.now().isoformat()
-    print(f"[{timestamp}] {operation}: {details}")
+    logger.info("%s: %s", operation, details)
 
 # Utility functions for filtering and sorting
+LIKE_ESCAPE = '\\'
+
+def escape_like(value):
+    """
+    Escape LIKE wildcards in user input so it matches literally; pass
+    escape=LIKE_ESCAPE to like()/ilike()
+    """
+    return value.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2).replace('%', LIKE_ESCAPE + '%').replace('_', LIKE_ESCAPE + '_')
+
 def apply_filters(query, model, filters):
     """
     Apply filters to a SQLAlchemy query
@@ -220,6 +408,17 @@ def apply_filters(query, model, filters):
                 query = query.filter(getattr(model, field) == value)
     return query
 
+def apply_range(query, model, field, minimum=None, maximum=None):
+    """
+    Apply an inclusive range filter to a SQLAlchemy query
+    """
+    column = getattr(model, field)
+    if minimum is not None:
+        query = query.filter(column >= minimum)
+    if maximum is not None:
+        query = query.filter(column <= maximum)
+    return query
+
 def apply_sorting(query, model, sort_by, sort_order='asc'):
     """
     Apply sorting to a SQLAlchemy query
@@ -231,6 +430,9 @@ def apply_sorting(query, model, sort_by, sort_order='asc'):
             query = query.order_by(getattr(model, sort_by).asc())
     return query
 
+TRUE_VALUES = ('true', '1', 'yes', 'y', 'on')
+FALSE_VALUES = ('false', '0', 'no', 'n', 'off')
+
 def parse_boolean(value):
     """
     Parse various boolean representations to Python boolean
@@ -238,7 +440,7 @@ def parse_boolean(value):
     if isinstance(value, bool):
         return value
     if isinstance(value, str):
-        return value.lower() in ['true', '1', 'yes', 'y', 'on']
+        return value.lower() in TRUE_VALUES
     if isinstance(value, int):
         return value == 1
     return bool(value)
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+Load-test the WSGI app (threaded dev server, as in run.py) against the
+ASGI app (uvicorn + aiosqlite) with many concurrent keep-alive clients.
+
+    python benchmarks/bench_asgi.py --clients 50 500 --duration 10
+    python benchmarks/bench_asgi.py --clients 1000 2000 --think-time 1
+
+Run the driver on a different machine, or at least on spare cores:
+sharing one core with the server skews the comparison.
+"""
+import argparse
+import asyncio
+import os
+
+from common import SERVERS, make_app, seed_books, start_server
+from http_load import run_load
+from app import db
+
+def next_request_for(books):
+    def next_request(rng):
+        if rng.random() < 0.5:
+            return 'GET', f'/api/books/{rng.randint(1, books)}', None, (200,)
+        genre = rng.choice(['Fantasy', 'Classic', 'Poetry'])
+        return 'GET', f'/api/books?per_page=20&genre={genre}', None, (200,)
+    return next_request
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=100000)
+    parser.add_argument('--clients', type=int, nargs='+', default=[50, 500])
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help='mean pause between requests per client, to model slow clients')
+    args = parser.parse_args()
+
+    app, db_path = make_app()
+    try:
+        with app.app_context():
+            db.create_all()
+            seed_books(args.books)
+            db.session.remove()
+            db.engine.dispose()
+
+        print(f'{args.books} books, {args.duration:.0f}s per run')
+        print(f'{"server":<8}{"clients":>8}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"errors":>8}')
+        for name in SERVERS:
+            process, port = start_server(name, db_path)
+            try:
+                for clients in args.clients:
+                    result = asyncio.run(run_load(
+                        '127.0.0.1', port, next_request_for(args.books),
+                        clients, args.duration, args.think_time
+                    ))
+                    print(f'{name:<8}{clients:>8}{result.rps:>10.0f}{result.percentile(0.5):>10.1f}'
+                          f'{result.percentile(0.95):>10.1f}{result.percentile(0.99):>10.1f}{result.errors:>8}')
+            finally:
+                process.terminate()
+                process.wait()
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Hammer one SQLite file with several writer processes, the way gunicorn
+workers share it, and compare the default engine setup with the
+production profile (WAL, synchronous=NORMAL, mmap, busy timeout, pool,
+BEGIN IMMEDIATE for writers).
+
+The write-heavy case mostly updates books through PUT, which reads the
+row before writing it. The production profile runs the read and the write
+in one BEGIN IMMEDIATE transaction, so the write lock is taken up front.
+
+    python benchmarks/bench_concurrent_writes.py --workers 8 --requests 500
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import time
+
+from common import make_app, seed_books, generate_books
+from config import Config, ProductionConfig
+from app import db
+
+PROFILES = {
+    'default': Config,
+    'production': ProductionConfig,
+}
+
+# Case -> (share of list reads, share of updates); the rest are inserts
+CASES = {
+    'mixed': (0.5, 0.0),
+    'write-heavy': (0.1, 0.6),
+}
+
+
+def worker(profile, db_path, requests, case, books, start_event, results):
+    app, _ = make_app(db_path, PROFILES[profile], BOOK_CACHE_BACKEND=None)
+    client = app.test_client()
+    new_books = list(generate_books(requests, seed=os.getpid()))
+    rng = random.Random(os.getpid())
+    read_ratio, update_ratio = CASES[case]
+    counts = {'ok': 0, 'failed': 0}
+
+    start_event.wait()
+    for book in new_books:
+        draw = rng.random()
+        try:
+            if draw < read_ratio:
+                response = client.get('/api/books?per_page=20')
+                ok = response.status_code == 200
+            elif draw < read_ratio + update_ratio:
+                response = client.put(f'/api/books/{rng.randint(1, books)}', json=book)
+                ok = response.status_code == 200
+            else:
+                response = client.post('/api/books', json=book)
+                ok = response.status_code == 201
+        except Exception:
+            # "database is locked" surfaces as an OperationalError
+            ok = False
+        counts['ok' if ok else 'failed'] += 1
+    results.put(counts)
+
+
+def run(profile, workers, requests, case, books):
+    app, db_path = make_app(None, PROFILES[profile])
+    try:
+        with app.app_context():
+            db.create_all()
+            seed_books(books)
+            db.session.remove()
+            db.engine.dispose()
+
+        context = multiprocessing.get_context('spawn')
+        start_event = context.Event()
+        results = context.Queue()
+        processes = [
+            context.Process(target=worker, args=(profile, db_path, requests, case, books, start_event, results))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        # Let every worker finish importing before the clock starts
+        time.sleep(2)
+        start = time.perf_counter()
+        start_event.set()
+        totals = {'ok': 0, 'failed': 0}
+        for _ in processes:
+            for key, value in results.get().items():
+                totals[key] += value
+        elapsed = time.perf_counter() - start
+        for process in processes:
+            process.join()
+        return totals, elapsed
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=300, help='requests per worker')
+    parser.add_argument('--case', choices=CASES, action='append', help='default: every case')
+    parser.add_argument('--books', type=int, default=10000, help='books seeded before the run')
+    args = parser.parse_args()
+
+    for case in args.case or CASES:
+        read_ratio, update_ratio = CASES[case]
+        print(f'{case}: {args.workers} workers x {args.requests} requests, '
+              f'{read_ratio:.0%} reads, {update_ratio:.0%} updates')
+        for profile in PROFILES:
+            totals, elapsed = run(profile, args.workers, args.requests, case, args.books)
+            print(f'{profile:<12}{totals["ok"] / elapsed:>10.0f} req/s{totals["failed"]:>8} failed{elapsed:>8.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Compare peak memory and throughput of the streaming export with the old
+load-everything-then-jsonify path.
+
+    python benchmarks/bench_export.py --books 1000000
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+from common import make_app, seed_books
+from app import db
+from app.models import Book
+from app.schemas import BookSchema
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=100000)
+    args = parser.parse_args()
+
+    app, db_path = make_app()
+    try:
+        with app.app_context():
+            db.create_all()
+            seed_books(args.books)
+            db.session.remove()
+
+        client = app.test_client()
+
+        def materialised():
+            with app.test_request_context():
+                from flask import jsonify
+                books = Book.query.all()
+                size = len(jsonify(BookSchema(many=True).dump(books)).get_data())
+                db.session.remove()
+                return size
+
+        def streamed():
+            response = client.get('/api/books/export?format=jsonl')
+            return sum(len(chunk) for chunk in response.response)
+
+        print(f'{args.books} books')
+        for name, func in [('materialised', materialised), ('streamed jsonl', streamed)]:
+            elapsed, peak_mb, size = measure(func)
+            print(f'{name:<16}{elapsed:>8.2f}s{peak_mb:>10.1f} MiB peak{args.books / elapsed:>12.0f} rows/s  {size / 1e6:.1f} MB')
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
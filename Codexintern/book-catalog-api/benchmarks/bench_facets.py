@@ -0,0 +1,40 @@
+"""
+Compare facet counts read from the trigger-maintained book_facet table
+with grouping the whole catalog on every request.
+
+    python benchmarks/bench_facets.py --books 1000000
+"""
+import argparse
+import os
+
+from common import make_app, seed_books, timed
+from app import db
+from app.facets import grouped_facet_counts, stored_facet_counts
+from app.models import Book
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app, db_path = make_app()
+    try:
+        with app.app_context():
+            db.create_all()
+            seed_books(args.books)
+            assert stored_facet_counts() == grouped_facet_counts(Book.query)
+
+            print(f'{args.books} books')
+            for name, func in [('book_facet table', stored_facet_counts),
+                               ('GROUP BY catalog', lambda: grouped_facet_counts(Book.query))]:
+                median, p95 = timed(func, args.repeat)
+                print(f'{name:<20}{median:>10.2f}ms median{p95:>10.2f}ms p95')
+            db.session.remove()
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Latency of GET /api/books/fuzzy for misspelled queries, next to the ILIKE
+scan that a misspelled `q` falls through to, plus the in-memory term
+lookup on a vocabulary of realistic size (the synthetic catalog only has
+a few dozen distinct words).
+
+    python benchmarks/bench_fuzzy.py --books 1000000 --vocabulary 300000
+    python benchmarks/bench_fuzzy.py --db /tmp/books.db
+"""
+import argparse
+import os
+import random
+import string
+
+from sqlalchemy import func, select, text
+
+from common import make_app, seed_books, timed
+from app import db
+from app.fuzzy import TrigramIndex
+from app.models import Book
+from app.search import SEARCH_DDL, ilike_clause
+
+QUERIES = ['Orwel', 'Murakmi', 'Tolstoi', 'shadw rivr', 'midnite librery', 'Agata Cristie']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=1000000, help='catalog size when no --db is given')
+    parser.add_argument('--db', help='existing catalog built by generate_data.py')
+    parser.add_argument('--vocabulary', type=int, default=300000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app, db_path = make_app(os.path.abspath(args.db) if args.db else None, BOOK_CACHE_BACKEND=None)
+    try:
+        with app.app_context():
+            if args.db:
+                # Catalogs built before the vocabulary table existed
+                for statement in SEARCH_DDL:
+                    db.session.execute(text(statement))
+                db.session.commit()
+                books = db.session.scalar(select(func.count()).select_from(Book))
+            else:
+                db.create_all()
+                seed_books(args.books)
+                books = args.books
+        client = app.test_client()
+        client.get('/api/books/fuzzy?q=warmup')
+
+        print(f'{books} books')
+        for query in QUERIES:
+            response = client.get('/api/books/fuzzy', query_string={'q': query})
+            books = response.get_json()['data']['books']
+            median, p95 = timed(lambda: client.get('/api/books/fuzzy', query_string={'q': query}), args.repeat)
+            print(f'fuzzy {query!r:<20}{len(books):>4} books{median:>10.2f}ms median{p95:>10.2f}ms p95')
+
+        with app.app_context():
+            median, p95 = timed(
+                lambda: Book.query.filter(ilike_clause('Tolkein')).limit(20).all(), max(3, args.repeat // 4)
+            )
+            print(f"{'ILIKE scan (no match)':<32}{median:>10.2f}ms median{p95:>10.2f}ms p95")
+            db.session.remove()
+            db.engine.dispose()
+
+        rng = random.Random(42)
+        terms = {''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 12))) for _ in range(args.vocabulary)}
+        index = TrigramIndex(terms)
+        words = rng.sample(sorted(terms), 100)
+        typos = [word[:1] + word[2:] for word in words]
+        median, p95 = timed(lambda: [index.similar(word, 0.3, 5) for word in typos], args.repeat)
+        print(f'term lookup, {len(index)} terms{median / len(typos):>14.3f}ms median'
+              f'{p95 / len(typos):>10.3f}ms p95 per word')
+    finally:
+        if not args.db:
+            os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
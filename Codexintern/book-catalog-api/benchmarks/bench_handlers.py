@@ -0,0 +1,48 @@
+"""
+pytest-benchmark microbenchmarks for the hot book handlers, called
+through the Flask test client so routing and serialization are included.
+
+    pytest benchmarks                                   # print timings
+    pytest benchmarks --benchmark-autosave              # store a baseline
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=median:25%
+
+Autosaved runs go to benchmarks/baselines/<machine>/, which is not
+committed: they are raw per-machine timings, so record and compare them
+on the same machine. BENCH_BOOKS sets the catalog size.
+"""
+
+def request(client, method, path, status, **kwargs):
+    def run():
+        response = client.open(path, method=method, **kwargs)
+        assert response.status_code == status
+        return response
+    return run
+
+def test_get_books(benchmark, client):
+    benchmark(request(client, 'GET', '/api/books?per_page=20', 200))
+
+def test_get_books_filtered_sorted(benchmark, client):
+    path = '/api/books?per_page=20&genre=Fantasy&year_from=1900&sort_by=publication_year&sort_order=desc'
+    benchmark(request(client, 'GET', path, 200))
+
+def test_get_books_deep_cursor(benchmark, client, catalog):
+    # Cursor taken from the middle of the catalog: keyset pages cost the same at any depth
+    first = client.get(f'/api/books?per_page={min(100, catalog[1] // 2)}').get_json()
+    cursor = first['pagination']['next_cursor']
+    benchmark(request(client, 'GET', f'/api/books?per_page=20&after={cursor}', 200))
+
+def test_search(benchmark, client):
+    benchmark(request(client, 'GET', '/api/books?q=shadow%20riv&per_page=20', 200))
+
+def test_get_book(benchmark, client, catalog):
+    benchmark(request(client, 'GET', f'/api/books/{catalog[1] // 2}', 200))
+
+def test_create_book(benchmark, client):
+    book = {
+        'title': 'Benchmark Book',
+        'author': 'Bench Author',
+        'genre': 'Fiction',
+        'publication_year': 2001,
+        'availability': True
+    }
+    benchmark(request(client, 'POST', '/api/books', 201, json=book))
@@ -0,0 +1,63 @@
+"""
+Measure rows/second of `flask books import` on a generated dump, for one
+or more validation pool sizes. Each run imports into a fresh database.
+
+    python benchmarks/bench_import.py --rows 5000000 --format csv --workers 0 4
+"""
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+
+from common import generate_books, make_app
+from app import db
+from app.importer import import_books
+
+
+def write_dump(path, rows, file_format):
+    with open(path, 'w', newline='', encoding='utf-8') as out:
+        if file_format == 'csv':
+            writer = csv.DictWriter(out, fieldnames=['title', 'author', 'genre', 'publication_year', 'availability'])
+            writer.writeheader()
+            writer.writerows(generate_books(rows))
+        else:
+            for row in generate_books(rows):
+                out.write(json.dumps(row) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=5000000)
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    handle, dump = tempfile.mkstemp(suffix='.' + args.format)
+    os.close(handle)
+    try:
+        start = time.perf_counter()
+        write_dump(dump, args.rows, args.format)
+        print(f'{args.rows} rows, {os.path.getsize(dump) / 1e6:.0f} MB {args.format} '
+              f'written in {time.perf_counter() - start:.1f}s')
+
+        for workers in args.workers:
+            app, db_path = make_app()
+            try:
+                with app.app_context():
+                    db.create_all()
+                    stats = import_books(dump, args.format, args.chunk_size, workers)
+                    db.session.remove()
+                    db.engine.dispose()
+                print(f'workers={workers:<3}{stats.inserted:>10} inserted in {stats.elapsed:>7.1f}s'
+                      f'{stats.rows_per_second:>12.0f} rows/s')
+            finally:
+                os.remove(db_path)
+    finally:
+        os.remove(dump)
+
+
+if __name__ == '__main__':
+    main()
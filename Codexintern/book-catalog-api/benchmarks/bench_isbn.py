@@ -0,0 +1,78 @@
+"""
+Compare ISBNs/second of the scalar helpers in app.utils (one call per
+ISBN) with the batch functions in app.isbn.
+
+    python benchmarks/bench_isbn.py --isbns 1000000
+"""
+import argparse
+import random
+
+from common import timed
+from app.isbn import format_isbns, to_isbn13, validate_isbns
+from app.utils import format_isbn, validate_isbn
+
+
+def isbn13_check(digits):
+    return str((10 - sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(digits)) % 10) % 10)
+
+
+def isbn10_check(digits):
+    check = (11 - sum(int(d) * (10 - i) for i, d in enumerate(digits)) % 11) % 11
+    return 'X' if check == 10 else str(check)
+
+
+def generate_isbns(count, seed=42):
+    """A mix like a real import: mostly valid, hyphenated or not, ISBN-10 and -13, ~10% bad"""
+    rng = random.Random(seed)
+    isbns = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            body = '978' + ''.join(rng.choices('0123456789', k=9))
+            isbn = body + isbn13_check(body)
+            if rng.random() < 0.5:
+                isbn = f'{isbn[:3]}-{isbn[3]}-{isbn[4:6]}-{isbn[6:12]}-{isbn[12]}'
+        else:
+            body = ''.join(rng.choices('0123456789', k=9))
+            isbn = body + isbn10_check(body)
+            if rng.random() < 0.5:
+                isbn = f'{isbn[0]}-{isbn[1:4]}-{isbn[4:9]}-{isbn[9]}'
+        if rng.random() < 0.1:
+            isbn = isbn[:-1] + rng.choice('0123456789')
+        isbns.append(isbn)
+    return isbns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--isbns', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    isbns = generate_isbns(args.isbns)
+
+    def scalar_normalize():
+        # Validate, then turn ISBN-10s into ISBN-13s one at a time
+        result = []
+        for isbn in isbns:
+            valid, cleaned = validate_isbn(isbn)
+            if valid and len(cleaned) == 10:
+                cleaned = '978' + cleaned[:9] + isbn13_check('978' + cleaned[:9])
+            result.append(cleaned if valid else '')
+        return result
+
+    cases = [
+        ('validate', lambda: [validate_isbn(isbn) for isbn in isbns], lambda: validate_isbns(isbns)),
+        ('format', lambda: [format_isbn(isbn) for isbn in isbns], lambda: format_isbns(isbns)),
+        ('to isbn-13', scalar_normalize, lambda: to_isbn13(isbns)),
+    ]
+
+    print(f'{args.isbns} ISBNs')
+    for name, scalar, batch in cases:
+        scalar_ms, _ = timed(scalar, args.repeat)
+        batch_ms, _ = timed(batch, args.repeat)
+        print(f'{name:<12}scalar {args.isbns / (scalar_ms / 1000):>12.0f}/s   '
+              f'batch {args.isbns / (batch_ms / 1000):>12.0f}/s   {scalar_ms / batch_ms:>6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+HTTP load test of the book API: each scenario runs for --duration seconds
+with --clients keep-alive clients and reports RPS and p50/p95/p99 latency.
+Results are compared with a stored baseline and the script exits with
+status 1 if any scenario regressed beyond --tolerance.
+
+    python benchmarks/bench_load.py                    # compare with the baseline
+    python benchmarks/bench_load.py --save-baseline    # record a new baseline
+    python benchmarks/bench_load.py --db /tmp/books.db # catalog from generate_data.py
+
+Baselines are machine specific: record one on the machine (or CI runner
+class) that will run the comparison.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+
+from common import SERVERS, make_app, seed_books, start_server, generate_books
+from http_load import run_load
+from app import db
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+WORDS = ['shadow', 'river', 'empire', 'garden', 'winter', 'crown', 'myst', 'sto']
+
+
+def _book_body(rng):
+    book = next(generate_books(1, rng.random()))
+    return json.dumps(book).encode('utf-8')
+
+
+def scenarios(books):
+    """name -> next_request(rng) returning (method, path, body, expected statuses)"""
+    return {
+        'list': lambda rng: ('GET', '/api/books?per_page=20', None, (200,)),
+        'list_filtered': lambda rng: (
+            'GET', f'/api/books?per_page=20&genre=Fantasy&year_from={rng.randint(1800, 2000)}'
+                   '&sort_by=publication_year', None, (200,)),
+        'search': lambda rng: ('GET', f'/api/books?q={rng.choice(WORDS)}&per_page=20', None, (200,)),
+        'get_book': lambda rng: ('GET', f'/api/books/{rng.randint(1, books)}', None, (200,)),
+        'create_book': lambda rng: ('POST', '/api/books', _book_body(rng), (201,)),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression messages, empty if every scenario is within tolerance"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['rps'] < base['rps'] * (1 - tolerance):
+            regressions.append(f"{name}: {result['rps']:.0f} req/s vs baseline {base['rps']:.0f}")
+        if result['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']:.1f} ms vs baseline {base['p95_ms']:.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--server', choices=SERVERS, default='wsgi')
+    parser.add_argument('--books', type=int, default=10000, help='catalog size when no --db is given')
+    parser.add_argument('--db', help='existing catalog built by generate_data.py')
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--scenario', action='append', help='run only these scenarios')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative regression')
+    parser.add_argument('--baseline', help='baseline file (default: baselines/load-<server>.json)')
+    parser.add_argument('--save-baseline', action='store_true')
+    args = parser.parse_args()
+
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f'load-{args.server}.json')
+    settings = {'server': args.server, 'clients': args.clients, 'duration': args.duration}
+
+    if args.db:
+        db_path = os.path.abspath(args.db)
+        books = sqlite3.connect(db_path).execute('SELECT max(id) FROM book').fetchone()[0]
+    else:
+        app, db_path = make_app()
+        books = args.books
+        with app.app_context():
+            db.create_all()
+            seed_books(books)
+            db.session.remove()
+            db.engine.dispose()
+    settings['books'] = books
+
+    selected = scenarios(books)
+    if args.scenario:
+        selected = {name: selected[name] for name in args.scenario}
+
+    results = {}
+    process, port = start_server(args.server, db_path)
+    try:
+        print(f'{args.server}, {books} books, {args.clients} clients, {args.duration:.0f}s per scenario')
+        print(f'{"scenario":<16}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"errors":>8}')
+        for name, next_request in selected.items():
+            result = asyncio.run(run_load('127.0.0.1', port, next_request, args.clients, args.duration))
+            results[name] = result.summary()
+            print(f'{name:<16}{result.rps:>10.0f}{result.percentile(0.5):>10.1f}'
+                  f'{result.percentile(0.95):>10.1f}{result.percentile(0.99):>10.1f}{result.errors:>8}')
+    finally:
+        process.terminate()
+        process.wait()
+        if not args.db:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, 'w') as handle:
+            json.dump({'settings': settings, 'results': results}, handle, indent=2, sort_keys=True)
+            handle.write('\n')
+        print(f'baseline saved to {baseline_path}')
+        return
+
+    if not os.path.exists(baseline_path):
+        print(f'no baseline at {baseline_path}; run with --save-baseline to record one')
+        return
+    with open(baseline_path) as handle:
+        baseline = json.load(handle)
+    if baseline['settings'] != settings:
+        print(f"baseline was recorded with {baseline['settings']}, not comparing")
+        return
+
+    regressions = compare(results, baseline['results'], args.tolerance)
+    for message in regressions:
+        print('REGRESSION', message)
+    if regressions:
+        sys.exit(1)
+    print(f'no regressions beyond {args.tolerance:.0%}')
+
+
+if __name__ == '__main__':
+    main()
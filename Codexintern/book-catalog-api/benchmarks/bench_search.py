@@ -0,0 +1,56 @@
+"""
+Compare the FTS5 search path with the old ILIKE scan.
+
+    python benchmarks/bench_search.py --books 1000000
+"""
+import argparse
+import os
+from sqlalchemy import or_
+
+from common import make_app, seed_books, timed
+from app import db
+from app.models import Book
+from app.search import apply_search
+
+QUERIES = ['orwell', 'midnight garden', 'lib', 'tolstoy crown', 'nonexistentbook']
+
+
+def ilike_page(search_query, per_page=20):
+    return Book.query.filter(
+        or_(
+            Book.title.ilike(f'%{search_query}%'),
+            Book.author.ilike(f'%{search_query}%')
+        )
+    ).order_by(Book.id).limit(per_page).all()
+
+
+def fts_page(search_query, per_page=20):
+    query, rank = apply_search(Book.query, search_query)
+    return query.order_by(rank, Book.id).limit(per_page).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app, db_path = make_app()
+    try:
+        with app.app_context():
+            db.create_all()
+            seed_books(args.books)
+
+            print(f'{args.books} books')
+            print(f"{'query':<20}{'ilike p50':>12}{'ilike p95':>12}{'fts p50':>12}{'fts p95':>12}")
+            for search_query in QUERIES:
+                ilike = timed(lambda: ilike_page(search_query), args.repeat)
+                fts = timed(lambda: fts_page(search_query), args.repeat)
+                print(f'{search_query:<20}{ilike[0]:>10.2f}ms{ilike[1]:>10.2f}ms{fts[0]:>10.2f}ms{fts[1]:>10.2f}ms')
+            db.session.remove()
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
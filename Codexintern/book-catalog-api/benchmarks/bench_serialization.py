@@ -0,0 +1,57 @@
+"""
+Compare rows/second of the old list serialization (ORM entities,
+BookSchema(many=True).dump, pretty-printed stdlib jsonify) with the fast
+path (column tuples, rows_to_dicts, compact orjson).
+
+    python benchmarks/bench_serialization.py --books 100000
+"""
+import argparse
+import os
+
+from common import make_app, seed_books, timed
+from flask.json.provider import DefaultJSONProvider
+from app import db
+from app.models import Book
+from app.schemas import BookSchema
+from app.serialization import OrjsonProvider, book_columns, rows_to_dicts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app, db_path = make_app()
+    try:
+        with app.app_context():
+            db.create_all()
+            seed_books(args.books)
+
+            stdlib_pretty = DefaultJSONProvider(app)
+            stdlib_pretty.compact = False
+            fast_json = OrjsonProvider(app)
+            fast_json.compact = True
+
+            def old_path():
+                books = Book.query.all()
+                body = stdlib_pretty.response(BookSchema(many=True).dump(books)).get_data()
+                db.session.expunge_all()
+                return body
+
+            def fast_path():
+                rows = db.session.query(*book_columns()).all()
+                return fast_json.response(rows_to_dicts(rows)).get_data()
+
+            print(f'{args.books} books')
+            for name, func in [('orm + marshmallow', old_path), ('columns + orjson', fast_path)]:
+                median, p95 = timed(func, args.repeat)
+                size = len(func())
+                print(f'{name:<20}{median:>10.1f}ms{args.books / (median / 1000):>12.0f} rows/s{size / 1e6:>8.1f} MB')
+            db.session.remove()
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Latency of GET /api/books/suggest, answered from the in-memory prefix
+index, next to the search query it replaces on every keystroke, and the
+time to build the index at startup.
+
+    python benchmarks/bench_suggest.py --books 1000000
+    python benchmarks/bench_suggest.py --db /tmp/books.db
+"""
+import argparse
+import os
+import time
+
+from sqlalchemy import func, select, text
+
+from common import make_app, seed_books, timed
+from app import db
+from app.models import Book, BookSuggestion
+from app.search import apply_search
+from app.suggest import SUGGEST_BACKFILL, suggest, suggestions
+
+PREFIXES = ['s', 'the', 'shadow', 'shadow r', 'george', 'haruki mur', 'zz']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=1000000, help='catalog size when no --db is given')
+    parser.add_argument('--db', help='existing catalog built by generate_data.py')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--writes', type=int, default=1000, help='books added before the overlay run')
+    args = parser.parse_args()
+
+    app, db_path = make_app(os.path.abspath(args.db) if args.db else None)
+    try:
+        with app.app_context():
+            db.create_all()
+            if args.db:
+                # Catalogs built before the suggestion table existed
+                if not db.session.scalar(select(func.count()).select_from(BookSuggestion)):
+                    for statement in SUGGEST_BACKFILL:
+                        db.session.execute(text(statement))
+                    db.session.commit()
+            else:
+                seed_books(args.books)
+            books = db.session.scalar(select(func.count()).select_from(Book))
+
+        with app.test_request_context():
+            start = time.perf_counter()
+            state = suggestions().sync(0, app.config['SUGGEST_REBUILD_CHANGES'])
+            print(f'{books} books, {len(state.index)} titles and authors indexed '
+                  f'in {time.perf_counter() - start:.1f}s')
+
+            for prefix in PREFIXES:
+                found = suggest(prefix, 10)
+                median, p95 = timed(lambda: suggest(prefix, 10), args.repeat)
+                print(f'suggest {prefix!r:<14}{len(found):>4} found{median:>10.3f}ms median{p95:>10.3f}ms p95')
+
+            query, _ = apply_search(db.session.query(Book.id), 'shadow r')
+            median, p95 = timed(lambda: query.limit(20).all(), max(3, args.repeat // 20))
+            print(f"{'search q=shadow r':<32}{median:>10.3f}ms median{p95:>10.3f}ms p95")
+
+            # New books become an overlay on the index until the next rebuild
+            db.session.execute(Book.__table__.insert(), [
+                {'title': f'Shadow Rising {n}', 'author': 'New Author', 'genre': 'Fiction',
+                 'publication_year': 2024, 'availability': True}
+                for n in range(args.writes)
+            ])
+            db.session.commit()
+            suggestions().sync(0, app.config['SUGGEST_REBUILD_CHANGES'])
+            app.config['SUGGEST_REFRESH_INTERVAL'] = 3600
+            median, p95 = timed(lambda: suggest('shadow r', 10), args.repeat)
+            print(f"{f'overlay of {args.writes} writes':<32}{median:>10.3f}ms median{p95:>10.3f}ms p95")
+            db.session.remove()
+    finally:
+        if not args.db:
+            os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
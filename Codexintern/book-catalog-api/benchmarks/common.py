@@ -0,0 +1,111 @@
+"""
+Shared helpers for the benchmark scripts in this directory.
+Run the scripts from the book-catalog-api directory, e.g.
+`python benchmarks/bench_search.py --books 1000000`.
+"""
+import os
+import sys
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+# The HTTP load driver is shared with todo-backend's benchmarks
+sys.path.insert(0, os.path.abspath(os.path.join(ROOT, '..', 'benchmarks')))
+
+from config import Config
+from app import create_app, db
+from app.models import Book
+from http_load import free_port, wait_for_port
+
+TITLE_WORDS = [
+    'shadow', 'river', 'empire', 'garden', 'winter', 'silent', 'crown', 'glass',
+    'forgotten', 'midnight', 'stone', 'house', 'ocean', 'secret', 'iron', 'storm',
+    'letters', 'journey', 'kingdom', 'library', 'mirror', 'song', 'fire', 'city'
+]
+FIRST_NAMES = ['Jane', 'George', 'Harper', 'Ursula', 'Isaac', 'Mary', 'Leo', 'Toni', 'Haruki', 'Agatha']
+LAST_NAMES = ['Austen', 'Orwell', 'Lee', 'LeGuin', 'Asimov', 'Shelley', 'Tolstoy', 'Morrison', 'Murakami', 'Christie']
+GENRES = ['Fiction', 'Fantasy', 'Classic', 'Romance', 'Mystery', 'Science Fiction', 'History', 'Poetry']
+
+
+def make_app(db_path=None, config_class=Config, **overrides):
+    """Create the app against a throwaway SQLite file"""
+    if db_path is None:
+        handle, db_path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        os.remove(db_path)
+
+    attributes = {'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + db_path}
+    attributes.update(overrides)
+    config_class = type('BenchmarkConfig', (config_class,), attributes)
+    return create_app(config_class), db_path
+
+
+def generate_books(count, seed=42):
+    """Yield synthetic book rows as dicts suitable for executemany"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield {
+            'title': ' '.join(rng.sample(TITLE_WORDS, rng.randint(2, 4))).title(),
+            'author': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            'genre': rng.choice(GENRES),
+            'publication_year': rng.randint(1800, 2023),
+            'availability': rng.random() < 0.7
+        }
+
+
+def seed_books(count, batch_size=50000, seed=42):
+    """Insert `count` synthetic books in large transactions"""
+    batch = []
+    for row in generate_books(count, seed):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.session.execute(Book.__table__.insert(), batch)
+            db.session.commit()
+            batch = []
+    if batch:
+        db.session.execute(Book.__table__.insert(), batch)
+        db.session.commit()
+
+
+def timed(func, repeat=20):
+    """Run func repeatedly and return (median_ms, p95_ms)"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return statistics.median(samples), p95
+
+
+# Commands serving the app on the port given as the last argument
+SERVERS = {
+    'wsgi': [sys.executable, '-c',
+             'import sys; from werkzeug.serving import run_simple; from run import app; '
+             'run_simple("127.0.0.1", int(sys.argv[1]), app, threaded=True)'],
+    'asgi': [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1',
+             '--log-level', 'warning', '--port'],
+}
+
+
+def start_server(name, db_path, **env):
+    """
+    Serve the app from a subprocess against db_path with the production
+    profile and no response cache. Returns (process, port).
+    """
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + db_path, APP_CONFIG='production',
+               BOOK_CACHE_BACKEND='', **env)
+    process = subprocess.Popen(SERVERS[name] + [str(port)], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port, process)
+    except RuntimeError:
+        process.kill()
+        raise
+    return process, port
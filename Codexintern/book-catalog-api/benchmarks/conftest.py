@@ -0,0 +1,24 @@
+import os
+import pytest
+from common import make_app, seed_books
+from app import db
+
+@pytest.fixture(scope='session')
+def catalog():
+    """App over a throwaway catalog of BENCH_BOOKS books (default 10000), without the response cache."""
+    count = int(os.environ.get('BENCH_BOOKS', 10000))
+    app, db_path = make_app(BOOK_CACHE_BACKEND=None)
+    with app.app_context():
+        db.create_all()
+        seed_books(count)
+        db.session.remove()
+    
+    yield app, count
+    
+    with app.app_context():
+        db.engine.dispose()
+    os.remove(db_path)
+
+@pytest.fixture
+def client(catalog):
+    return catalog[0].test_client()
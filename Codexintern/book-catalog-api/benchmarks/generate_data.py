@@ -0,0 +1,42 @@
+"""
+Build a SQLite database of synthetic books, from 1k up to 10M rows, for
+the benchmarks and for trying the API on a realistic catalog.
+
+    python benchmarks/generate_data.py --books 10000000 --out /tmp/books.db
+    DATABASE_URL=sqlite:////tmp/books.db python run.py
+"""
+import argparse
+import os
+import time
+
+from sqlalchemy import text
+
+from common import make_app, seed_books
+from app import db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=1000)
+    parser.add_argument('--out', required=True, help='SQLite file to create')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if os.path.exists(args.out):
+        parser.error(f'{args.out} already exists')
+
+    app, _ = make_app(os.path.abspath(args.out))
+    start = time.perf_counter()
+    with app.app_context():
+        db.create_all()
+        seed_books(args.books, seed=args.seed)
+        # Planner statistics, so queries behave as on a long-lived database
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+        db.session.remove()
+    elapsed = time.perf_counter() - start
+    print(f'{args.books} books written to {args.out} in {elapsed:.1f}s ({args.books / elapsed:.0f} rows/s)')
+
+
+if __name__ == '__main__':
+    main()
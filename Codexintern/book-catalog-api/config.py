@@ -9,4 +9,111 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-string'
\ No newline at end of file
+    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-string'
+
+    # Response cache for book reads: 'memory' (per process), 'shared'
+    # (redis-py compatible client in BOOK_CACHE_CLIENT or BOOK_CACHE_URL) or None
+    BOOK_CACHE_BACKEND = os.environ.get('BOOK_CACHE_BACKEND', 'memory') or None
+    BOOK_CACHE_URL = os.environ.get('BOOK_CACHE_URL')
+    BOOK_CACHE_TTL = int(os.environ.get('BOOK_CACHE_TTL', 60))
+    BOOK_CACHE_SIZE = int(os.environ.get('BOOK_CACHE_SIZE', 1024))
+
+    # JSON encoder for responses: 'default' (stdlib) or 'orjson' (faster on
+    # large lists; install the optional orjson package first)
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'default')
+    # Compact JSON responses; pretty printing costs CPU and bytes. False
+    # indents them, None indents only when DEBUG is on
+    JSON_COMPACT = True
+
+    # PRAGMA name -> value run on every new SQLite connection
+    SQLITE_PRAGMAS = {}
+    # Start transactions of non-GET requests with BEGIN IMMEDIATE
+    SQLITE_IMMEDIATE_WRITES = False
+    # Async driver URL for the ASGI app (asgi.py); SQLite URLs are converted to aiosqlite
+    ASYNC_DATABASE_URI = os.environ.get('ASYNC_DATABASE_URL')
+
+    # Request metrics on /metrics (Prometheus text format). Server-Timing
+    # headers expose internals, so they are opt-in.
+    METRICS_ENABLED = True
+    METRICS_SERVER_TIMING = os.environ.get('METRICS_SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+    # Log a warning when one request runs the same SQL statement this often
+    METRICS_N_PLUS_ONE_THRESHOLD = 10
+
+    # Background jobs (app/jobs.py): threads per process running them (0 runs
+    # jobs inline in the submitting request), where export files are written
+    # (default: <instance>/jobs) and the only directory import jobs may read
+    JOBS_WORKERS = int(os.environ.get('JOBS_WORKERS', 1))
+    JOBS_RESULT_DIR = os.environ.get('JOBS_RESULT_DIR')
+    JOBS_IMPORT_DIR = os.environ.get('JOBS_IMPORT_DIR')
+    # Validation processes for import jobs (0 validates on the job thread,
+    # so an import does not take every core of the serving host)
+    JOBS_IMPORT_WORKERS = int(os.environ.get('JOBS_IMPORT_WORKERS', 0))
+    # Seconds export files are kept before they are deleted (None keeps them)
+    JOBS_RESULT_RETENTION = 7 * 24 * 3600
+    # Seconds between progress writes to the job row
+    JOBS_PROGRESS_INTERVAL = 1.0
+
+    # Fuzzy search (GET /api/books/fuzzy): minimum trigram similarity of a
+    # corrected word (0-1, overridable per request with ?threshold=), how
+    # many similar terms each query word is tried as, how many term
+    # combinations are looked up, and how often the in-memory vocabulary
+    # may be re-read after the catalog changes (seconds; on a background
+    # thread unless FUZZY_BACKGROUND_REFRESH is off)
+    FUZZY_THRESHOLD = 0.3
+    FUZZY_EXPANSIONS = 5
+    FUZZY_MAX_COMBINATIONS = 50
+    FUZZY_REFRESH_INTERVAL = 5
+    FUZZY_BACKGROUND_REFRESH = True
+
+    # Autocomplete (GET /api/books/suggest): how often (seconds) each process
+    # reads title/author counts changed by any writer, and how many changed
+    # entries it overlays before rebuilding its in-memory index
+    SUGGEST_REFRESH_INTERVAL = 1
+    SUGGEST_REBUILD_CHANGES = 10000
+
+    # Read replicas for GET requests, e.g. DATABASE_REPLICA_URLS=sqlite:///r1.db,sqlite:///r2.db
+    SQLALCHEMY_REPLICA_URIS = [uri for uri in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if uri]
+    # How long a client's reads stay on the primary after it writes
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
+
+class ProductionConfig(Config):
+    # Tuned for several workers sharing one SQLite file:
+    # - WAL lets readers run alongside the single writer instead of blocking on it
+    # - synchronous=NORMAL is crash-safe in WAL mode and skips an fsync per commit
+    # - mmap_size serves reads from the page cache without copying through sqlite
+    # - busy_timeout makes a writer wait for the lock instead of failing with
+    #   "database is locked" straight away
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'busy_timeout': 5000,
+    }
+    # Writers take the lock when their transaction starts, so one that read
+    # first waits in busy_timeout instead of failing (app/database.py)
+    SQLITE_IMMEDIATE_WRITES = True
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': 30,
+    }
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # One in-memory connection cannot be shared with job threads
+    JOBS_WORKERS = 0
+    # Re-read the fuzzy search vocabulary as soon as the catalog changes,
+    # in the request (a thread would see its own empty in-memory database)
+    FUZZY_REFRESH_INTERVAL = 0
+    FUZZY_BACKGROUND_REFRESH = False
+    SUGGEST_REFRESH_INTERVAL = 0
+
+
+config_by_name = {
+    'default': Config,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
+}
@@ -0,0 +1,83 @@
+"""initial catalog schema
+
+Revision ID: 3f1c2a9d8b10
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d8b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+SQLITE_DDL = [
+    # FTS5 search index kept in sync with book by triggers
+    """CREATE VIRTUAL TABLE book_fts USING fts5(
+        title, author,
+        content='book', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )""",
+    """CREATE TRIGGER book_fts_ai AFTER INSERT ON book BEGIN
+        INSERT INTO book_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END""",
+    """CREATE TRIGGER book_fts_ad AFTER DELETE ON book BEGIN
+        INSERT INTO book_fts(book_fts, rowid, title, author)
+        VALUES ('delete', old.id, old.title, old.author);
+    END""",
+    """CREATE TRIGGER book_fts_au AFTER UPDATE OF title, author ON book BEGIN
+        INSERT INTO book_fts(book_fts, rowid, title, author)
+        VALUES ('delete', old.id, old.title, old.author);
+        INSERT INTO book_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END""",
+    "INSERT INTO book_fts(book_fts) VALUES ('rebuild')",
+    # Row versions and the catalog-wide change counter used for ETags
+    "INSERT INTO catalog_version (id, version) VALUES (1, 0)",
+    """CREATE TRIGGER book_version_au AFTER UPDATE ON book
+    WHEN new.version = old.version BEGIN
+        UPDATE book SET version = old.version + 1 WHERE id = new.id;
+    END""",
+    """CREATE TRIGGER catalog_version_ai AFTER INSERT ON book BEGIN
+        UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+    END""",
+    """CREATE TRIGGER catalog_version_au AFTER UPDATE ON book BEGIN
+        UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+    END""",
+    """CREATE TRIGGER catalog_version_ad AFTER DELETE ON book BEGIN
+        UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+    END""",
+]
+
+
+def upgrade():
+    op.create_table('book',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('author', sa.String(length=100), nullable=False),
+    sa.Column('genre', sa.String(length=50), nullable=False),
+    sa.Column('publication_year', sa.Integer(), nullable=False),
+    sa.Column('availability', sa.Boolean(), nullable=True),
+    sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('catalog_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in SQLITE_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS book_fts")
+    op.drop_table('catalog_version')
+    op.drop_table('book')
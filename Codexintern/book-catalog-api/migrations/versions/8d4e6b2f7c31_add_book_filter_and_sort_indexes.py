@@ -0,0 +1,38 @@
+"""add book filter and sort indexes
+
+Revision ID: 8d4e6b2f7c31
+Revises: 3f1c2a9d8b10
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d4e6b2f7c31'
+down_revision = '3f1c2a9d8b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Plain CREATE INDEX; batch mode could rebuild the table on SQLite and
+    # lose the FTS and version triggers
+    op.create_index('ix_book_title', 'book', ['title'], unique=False)
+    op.create_index('ix_book_author', 'book', ['author'], unique=False)
+    op.create_index('ix_book_genre_publication_year', 'book', ['genre', 'publication_year'], unique=False)
+    op.create_index('ix_book_publication_year', 'book', ['publication_year'], unique=False)
+    op.create_index('ix_book_availability_genre', 'book', ['availability', 'genre'], unique=False)
+
+    # Give the planner row counts so it can choose between these indexes
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('ANALYZE')
+
+
+def downgrade():
+    op.drop_index('ix_book_availability_genre', table_name='book')
+    op.drop_index('ix_book_publication_year', table_name='book')
+    op.drop_index('ix_book_genre_publication_year', table_name='book')
+    op.drop_index('ix_book_author', table_name='book')
+    op.drop_index('ix_book_title', table_name='book')
@@ -0,0 +1,27 @@
+"""add import checkpoint offset
+
+Revision ID: a6c9e2f4d8b3
+Revises: f3b7d1e9a264
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c9e2f4d8b3'
+down_revision = 'f3b7d1e9a264'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing checkpoints keep NULL and resume by counting records
+    with op.batch_alter_table('import_checkpoint', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('source_offset', sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('import_checkpoint', schema=None) as batch_op:
+        batch_op.drop_column('source_offset')
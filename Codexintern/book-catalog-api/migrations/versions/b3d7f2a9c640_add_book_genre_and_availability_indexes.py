@@ -0,0 +1,32 @@
+"""add book genre and availability indexes
+
+Revision ID: b3d7f2a9c640
+Revises: a6c9e2f4d8b3
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d7f2a9c640'
+down_revision = 'a6c9e2f4d8b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The composite indexes order rows by their second column inside each
+    # genre or availability value, so sorting on either still sorted every
+    # book of a value. These end in the rowid and match (column, id) order.
+    op.create_index('ix_book_genre', 'book', ['genre'], unique=False)
+    op.create_index('ix_book_availability', 'book', ['availability'], unique=False)
+
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('ANALYZE')
+
+
+def downgrade():
+    op.drop_index('ix_book_availability', table_name='book')
+    op.drop_index('ix_book_genre', table_name='book')
@@ -0,0 +1,66 @@
+"""add book facet counts
+
+Revision ID: d91b5e3a7c48
+Revises: c4a8f1e7d293
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd91b5e3a7c48'
+down_revision = 'c4a8f1e7d293'
+branch_labels = None
+depends_on = None
+
+
+# Copied from app/facets.py as of this revision
+SQLITE_DDL = [
+    """CREATE TRIGGER IF NOT EXISTS book_facet_ai AFTER INSERT ON book BEGIN
+        INSERT INTO book_facet (facet, value, count) VALUES ('genre', new.genre, 1) ON CONFLICT (facet, value) DO UPDATE SET count = count + excluded.count;
+        INSERT INTO book_facet (facet, value, count) VALUES ('decade', (new.publication_year / 10) * 10, 1) ON CONFLICT (facet, value) DO UPDATE SET count = count + excluded.count;
+        INSERT INTO book_facet (facet, value, count) VALUES ('availability', CASE WHEN new.availability THEN 'true' ELSE 'false' END, 1) ON CONFLICT (facet, value) DO UPDATE SET count = count + excluded.count;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS book_facet_ad AFTER DELETE ON book BEGIN
+        INSERT INTO book_facet (facet, value, count) VALUES ('genre', old.genre, -1) ON CONFLICT (facet, value) DO UPDATE SET count = count + excluded.count;
+        INSERT INTO book_facet (facet, value, count) VALUES ('decade', (old.publication_year / 10) * 10, -1) ON CONFLICT (facet, value) DO UPDATE SET count = count + excluded.count;
+        INSERT INTO book_facet (facet, value, count) VALUES ('availability', CASE WHEN old.availability THEN 'true' ELSE 'false' END, -1) ON CONFLICT (facet, value) DO UPDATE SET count = count + excluded.count;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS book_facet_au AFTER UPDATE OF genre, publication_year, availability ON book BEGIN
+        INSERT INTO book_facet (facet, value, count) VALUES ('genre', old.genre, -1) ON CONFLICT (facet, value) DO UPDATE SET count = count + excluded.count;
+        INSERT INTO book_facet (facet, value, count) VALUES ('decade', (old.publication_year / 10) * 10, -1) ON CONFLICT (facet, value) DO UPDATE SET count = count + excluded.count;
+        INSERT INTO book_facet (facet, value, count) VALUES ('availability', CASE WHEN old.availability THEN 'true' ELSE 'false' END, -1) ON CONFLICT (facet, value) DO UPDATE SET count = count + excluded.count;
+        INSERT INTO book_facet (facet, value, count) VALUES ('genre', new.genre, 1) ON CONFLICT (facet, value) DO UPDATE SET count = count + excluded.count;
+        INSERT INTO book_facet (facet, value, count) VALUES ('decade', (new.publication_year / 10) * 10, 1) ON CONFLICT (facet, value) DO UPDATE SET count = count + excluded.count;
+        INSERT INTO book_facet (facet, value, count) VALUES ('availability', CASE WHEN new.availability THEN 'true' ELSE 'false' END, 1) ON CONFLICT (facet, value) DO UPDATE SET count = count + excluded.count;
+    END""",
+]
+
+BACKFILL = [
+    """INSERT INTO book_facet (facet, value, count)
+        SELECT 'genre', book.genre, COUNT(*) FROM book GROUP BY 2""",
+    """INSERT INTO book_facet (facet, value, count)
+        SELECT 'decade', (book.publication_year / 10) * 10, COUNT(*) FROM book GROUP BY 2""",
+    """INSERT INTO book_facet (facet, value, count)
+        SELECT 'availability', CASE WHEN book.availability THEN 'true' ELSE 'false' END, COUNT(*) FROM book GROUP BY 2""",
+]
+
+
+def upgrade():
+    op.create_table('book_facet',
+    sa.Column('facet', sa.String(length=20), nullable=False),
+    sa.Column('value', sa.String(length=50), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('facet', 'value')
+    )
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in SQLITE_DDL + BACKFILL:
+            op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for trigger in ('book_facet_ai', 'book_facet_ad', 'book_facet_au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.drop_table('book_facet')
@@ -0,0 +1,26 @@
+"""add search vocabulary
+
+Revision ID: e5f2a8c3b917
+Revises: d91b5e3a7c48
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e5f2a8c3b917'
+down_revision = 'd91b5e3a7c48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Copied from app/search.py as of this revision
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS book_fts_vocab USING fts5vocab(book_fts, 'row')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS book_fts_vocab')
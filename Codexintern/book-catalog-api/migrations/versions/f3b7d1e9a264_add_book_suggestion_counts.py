@@ -0,0 +1,63 @@
+"""add book suggestion counts
+
+Revision ID: f3b7d1e9a264
+Revises: e5f2a8c3b917
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f3b7d1e9a264'
+down_revision = 'e5f2a8c3b917'
+branch_labels = None
+depends_on = None
+
+
+# Copied from app/suggest.py as of this revision
+SQLITE_DDL = [
+    """CREATE TRIGGER IF NOT EXISTS book_suggestion_ai AFTER INSERT ON book BEGIN
+        INSERT INTO book_suggestion (kind, value, count, seq) VALUES ('title', new.title, 1, (SELECT coalesce(max(seq), 0) + 1 FROM book_suggestion)) ON CONFLICT (kind, value) DO UPDATE SET count = count + excluded.count, seq = excluded.seq;
+        INSERT INTO book_suggestion (kind, value, count, seq) VALUES ('author', new.author, 1, (SELECT coalesce(max(seq), 0) + 1 FROM book_suggestion)) ON CONFLICT (kind, value) DO UPDATE SET count = count + excluded.count, seq = excluded.seq;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS book_suggestion_ad AFTER DELETE ON book BEGIN
+        INSERT INTO book_suggestion (kind, value, count, seq) VALUES ('title', old.title, -1, (SELECT coalesce(max(seq), 0) + 1 FROM book_suggestion)) ON CONFLICT (kind, value) DO UPDATE SET count = count + excluded.count, seq = excluded.seq;
+        INSERT INTO book_suggestion (kind, value, count, seq) VALUES ('author', old.author, -1, (SELECT coalesce(max(seq), 0) + 1 FROM book_suggestion)) ON CONFLICT (kind, value) DO UPDATE SET count = count + excluded.count, seq = excluded.seq;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS book_suggestion_au AFTER UPDATE OF title, author ON book BEGIN
+        INSERT INTO book_suggestion (kind, value, count, seq) VALUES ('title', old.title, -1, (SELECT coalesce(max(seq), 0) + 1 FROM book_suggestion)) ON CONFLICT (kind, value) DO UPDATE SET count = count + excluded.count, seq = excluded.seq;
+        INSERT INTO book_suggestion (kind, value, count, seq) VALUES ('author', old.author, -1, (SELECT coalesce(max(seq), 0) + 1 FROM book_suggestion)) ON CONFLICT (kind, value) DO UPDATE SET count = count + excluded.count, seq = excluded.seq;
+        INSERT INTO book_suggestion (kind, value, count, seq) VALUES ('title', new.title, 1, (SELECT coalesce(max(seq), 0) + 1 FROM book_suggestion)) ON CONFLICT (kind, value) DO UPDATE SET count = count + excluded.count, seq = excluded.seq;
+        INSERT INTO book_suggestion (kind, value, count, seq) VALUES ('author', new.author, 1, (SELECT coalesce(max(seq), 0) + 1 FROM book_suggestion)) ON CONFLICT (kind, value) DO UPDATE SET count = count + excluded.count, seq = excluded.seq;
+    END""",
+]
+
+BACKFILL = [
+    """INSERT INTO book_suggestion (kind, value, count, seq)
+        SELECT 'title', title, COUNT(*), 0 FROM book GROUP BY title""",
+    """INSERT INTO book_suggestion (kind, value, count, seq)
+        SELECT 'author', author, COUNT(*), 0 FROM book GROUP BY author""",
+]
+
+
+def upgrade():
+    op.create_table('book_suggestion',
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('value', sa.String(length=200), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('kind', 'value')
+    )
+    op.create_index('ix_book_suggestion_seq', 'book_suggestion', ['seq'], unique=False)
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in SQLITE_DDL + BACKFILL:
+            op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for trigger in ('book_suggestion_ai', 'book_suggestion_ad', 'book_suggestion_au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.drop_index('ix_book_suggestion_seq', table_name='book_suggestion')
+    op.drop_table('book_suggestion')
@@ -1,6 +1,12 @@
+import os
 from app import create_app
+from app.jobs import job_runner
+from app.suggest import preload_suggestions
+from config import config_by_name
 
-app = create_app()
+app = create_app(config_by_name[os.environ.get('APP_CONFIG', 'default')])
+preload_suggestions(app)
+job_runner.start(app)
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
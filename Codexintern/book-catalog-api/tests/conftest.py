@@ -1,5 +1,5 @@
 import pytest
-from app import create_app, db
+from app import create_app, db, cache
 from app.models import Book
 from config import TestingConfig
 
@@ -79,8 +79,11 @@ def init_database(test_database):
     
     yield test_database
     
-    # Clean up after each test
+    # Clean up after each test so every test sees the same five rows
     test_database.session.rollback()
+    Book.query.delete()
+    test_database.session.commit()
+    cache.clear()
     # Don't drop tables here, let test_database fixture handle it
 
 @pytest.fixture(scope='function')
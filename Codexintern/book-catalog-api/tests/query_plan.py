@@ -0,0 +1,53 @@
+"""
+Helpers for asserting on SQLite query plans.
+"""
+import re
+from contextlib import contextmanager
+from sqlalchemy import event, text
+
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+@contextmanager
+def captured_selects(engine):
+    """Record every SELECT statement (with parameters) run on engine"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def explain_query_plan(connection, statement, parameters=()):
+    """Return the detail lines of EXPLAIN QUERY PLAN for a raw SQL statement"""
+    rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)
+    return [row[-1] for row in rows]
+
+
+def full_table_scans(plan):
+    """Tables the plan reads end to end without an index"""
+    return [match.group(1) for match in map(FULL_SCAN.match, plan) if match]
+
+
+def assert_no_full_scan(engine, func):
+    """
+    Run func and fail if any SELECT it issues scans a whole table.
+    Returns the plans so callers can make further assertions.
+    """
+    with captured_selects(engine) as statements:
+        func()
+
+    plans = []
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            plan = explain_query_plan(connection, statement, parameters)
+            scans = full_table_scans(plan)
+            assert not scans, f'full table scan of {scans} in:\n{statement}\nplan: {plan}'
+            plans.append(plan)
+    return plans
@@ -0,0 +1,58 @@
+import pytest
+from starlette.testclient import TestClient
+from app import create_app, db
+from app.asgi import create_asgi_app
+from app.models import Book
+from config import TestingConfig
+
+@pytest.fixture
+def asgi_client(tmp_path):
+    """ASGI app over a SQLite file created and seeded through the Flask app."""
+    uri = 'sqlite:///' + str(tmp_path / 'asgi.db')
+    flask_app = create_app(TestingConfig, uri)
+    with flask_app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Book(title='The Hobbit', author='J.R.R. Tolkien', genre='Fantasy', publication_year=1937),
+            Book(title='1984', author='George Orwell', genre='Dystopian', publication_year=1949, availability=False),
+            Book(title='Emma', author='Jane Austen', genre='Romance', publication_year=1815),
+        ])
+        db.session.commit()
+        db.session.remove()
+        db.engine.dispose()
+    
+    with TestClient(create_asgi_app(TestingConfig, uri)) as client:
+        yield client
+
+def test_asgi_list_matches_flask_envelope(asgi_client):
+    """Test that the ASGI list endpoint filters, paginates and wraps results like the Flask app."""
+    response = asgi_client.get('/api/books?per_page=2&sort_by=publication_year')
+    assert response.status_code == 200
+    body = response.json()
+    assert body['success'] is True
+    assert [book['title'] for book in body['data']] == ['Emma', 'The Hobbit']
+    assert set(body['data'][0]) == {'id', 'title', 'author', 'genre', 'publication_year', 'availability'}
+    
+    next_page = asgi_client.get(body['pagination']['links']['next']).json()
+    assert [book['title'] for book in next_page['data']] == ['1984']
+    assert next_page['pagination']['has_next'] is False
+    
+    filtered = asgi_client.get('/api/books?availability=false').json()
+    assert [book['title'] for book in filtered['data']] == ['1984']
+    assert asgi_client.get('/api/books?q=hobbit').json()['data'][0]['title'] == 'The Hobbit'
+    assert asgi_client.get('/api/books?sort_by=isbn').status_code == 400
+
+def test_asgi_crud(asgi_client, new_book_data):
+    """Test create, read, update and delete through the ASGI app."""
+    created = asgi_client.post('/api/books', json=new_book_data)
+    assert created.status_code == 201
+    book_id = created.json()['data']['id']
+    
+    assert asgi_client.get(f'/api/books/{book_id}').json()['data']['title'] == 'Test Book'
+    
+    updated = asgi_client.put(f'/api/books/{book_id}', json={**new_book_data, 'title': 'Renamed'})
+    assert updated.json()['data']['title'] == 'Renamed'
+    
+    assert asgi_client.post('/api/books', json={'title': ''}).status_code == 400
+    assert asgi_client.delete(f'/api/books/{book_id}').status_code == 204
+    assert asgi_client.get(f'/api/books/{book_id}').status_code == 404
@@ -1,6 +1,9 @@
 import pytest
 import json
+from sqlalchemy import update
+from app import db
 from app.models import Book
+from app.search import ilike_clause
 
 def test_get_all_books(test_client, init_database, auth_headers):
     """Test getting all books."""
@@ -168,6 +171,14 @@ def test_filter_books_by_availability(test_client, init_database, auth_headers):
     # Should only get the book with availability=False
     assert all(book['availability'] == False for book in data['data'])
 
+def test_invalid_availability_filter(test_client, init_database, auth_headers):
+    """Test that an unrecognized boolean is rejected instead of read as false."""
+    for url in ('/api/books?availability=maybe', '/api/books/facets?availability=maybe'):
+        response = test_client.get(url, headers=auth_headers)
+        
+        assert response.status_code == 400
+        assert json.loads(response.data)['message'] == 'availability must be true or false'
+
 def test_pagination(test_client, init_database, auth_headers):
     """Test pagination functionality."""
     response = test_client.get('/api/books?page=1&per_page=2', headers=auth_headers)
@@ -203,4 +214,375 @@ def test_invalid_page_parameter(test_client, init_database, auth_headers):
     
     assert data['success'] == True
     # Should default to page 1
-    assert data['pagination']['current_page'] == 1
\ No newline at end of file
+    assert data['pagination']['current_page'] == 1
+
+def test_cursor_pagination(test_client, init_database, auth_headers):
+    """Test walking the catalog with cursor pagination."""
+    response = test_client.get('/api/books?per_page=2', headers=auth_headers)
+    
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    
+    assert len(data['data']) == 2
+    assert data['pagination']['has_next'] == True
+    assert 'total' not in data['pagination']
+    
+    seen = [book['id'] for book in data['data']]
+    while data['pagination']['has_next']:
+        cursor = data['pagination']['next_cursor']
+        response = test_client.get(f'/api/books?per_page=2&after={cursor}', headers=auth_headers)
+        data = json.loads(response.data)
+        seen.extend(book['id'] for book in data['data'])
+    
+    assert len(seen) == 5
+    assert seen == sorted(seen)
+    assert data['pagination']['next_cursor'] is None
+
+def test_invalid_cursor(test_client, init_database, auth_headers):
+    """Test that a malformed cursor is rejected."""
+    response = test_client.get('/api/books?after=not-a-cursor', headers=auth_headers)
+    
+    assert response.status_code == 400
+    data = json.loads(response.data)
+    
+    assert data['success'] == False
+
+def test_search_prefix_match(test_client, init_database, auth_headers):
+    """Test that search matches word prefixes across title and author."""
+    response = test_client.get('/api/books?q=tolk%20hob', headers=auth_headers)
+    
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    
+    assert len(data['data']) == 1
+    assert data['data'][0]['title'] == 'The Hobbit'
+
+def test_search_index_follows_writes(test_client, init_database, auth_headers):
+    """Test that the search index is updated when books change."""
+    update_data = {
+        'title': 'The Silmarillion',
+        'author': 'J.R.R. Tolkien',
+        'genre': 'Fantasy',
+        'publication_year': 1977
+    }
+    test_client.put('/api/books/5', data=json.dumps(update_data), headers=auth_headers)
+    
+    data = json.loads(test_client.get('/api/books?q=hobbit', headers=auth_headers).data)
+    assert len(data['data']) == 0
+    
+    data = json.loads(test_client.get('/api/books?q=silmarillion', headers=auth_headers).data)
+    assert len(data['data']) == 1
+    
+    test_client.delete('/api/books/5', headers=auth_headers)
+    data = json.loads(test_client.get('/api/books?q=silmarillion', headers=auth_headers).data)
+    assert len(data['data']) == 0
+
+def test_search_fallback_matches_wildcards_literally(init_database):
+    """Test that % and _ in the search text are not LIKE wildcards when FTS5 is unavailable."""
+    db.session.add(Book(title='100% Pure', author='A_B', genre='Fiction', publication_year=2000))
+    db.session.commit()
+    
+    assert [book.title for book in Book.query.filter(ilike_clause('a_b'))] == ['100% Pure']
+    assert [book.title for book in Book.query.filter(ilike_clause('0%'))] == ['100% Pure']
+    assert Book.query.filter(ilike_clause('_')).count() == 1
+
+def test_search_index_is_looked_up_once(test_app, init_database, monkeypatch):
+    """Test that the FTS5 table lookup runs once per app, and again after a rebuild."""
+    import app.search
+    test_app.extensions.pop('search_tables', None)
+    assert app.search.search_index_available() is True
+    
+    with monkeypatch.context() as patch:
+        patch.setattr(app.search, 'text', None)
+        assert app.search.search_index_available() is True
+    
+    app.search.rebuild_search_index()
+    assert 'search_tables' not in test_app.extensions
+    assert app.search.search_index_available() is True
+
+def test_search_cursor_pagination(test_client, init_database, auth_headers):
+    """Test paging through ranked search results."""
+    response = test_client.get('/api/books?q=the&per_page=1', headers=auth_headers)
+    data = json.loads(response.data)
+    
+    assert len(data['data']) == 1
+    assert data['pagination']['has_next'] == True
+    
+    cursor = data['pagination']['next_cursor']
+    response = test_client.get(f'/api/books?q=the&per_page=1&after={cursor}', headers=auth_headers)
+    second = json.loads(response.data)
+    
+    assert len(second['data']) == 1
+    assert second['data'][0]['id'] != data['data'][0]['id']
+    assert second['pagination']['has_next'] == False
+
+def test_export_books_jsonl(test_client, init_database, auth_headers):
+    """Test streaming the catalog as JSON Lines."""
+    response = test_client.get('/api/books/export')
+    
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    
+    rows = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert len(rows) == 5
+    assert rows[0]['title'] == 'The Great Gatsby'
+    assert list(rows[0].keys()) == ['id', 'title', 'author', 'genre', 'publication_year', 'availability']
+
+def test_export_books_csv_with_search(test_client, init_database, auth_headers):
+    """Test exporting search results as CSV."""
+    response = test_client.get('/api/books/export?format=csv&q=orwell')
+    
+    assert response.status_code == 200
+    lines = response.data.decode().splitlines()
+    assert lines[0] == 'id,title,author,genre,publication_year,availability'
+    assert len(lines) == 2
+    assert lines[1].endswith('George Orwell,Dystopian,1949,false')
+
+def test_export_books_json_array(test_client, init_database, auth_headers):
+    """Test exporting the catalog as a JSON array."""
+    response = test_client.get('/api/books/export?format=json')
+    
+    assert response.status_code == 200
+    assert len(json.loads(response.data)) == 5
+
+def test_export_books_invalid_format(test_client, init_database, auth_headers):
+    """Test that unknown export formats are rejected."""
+    response = test_client.get('/api/books/export?format=xml')
+    
+    assert response.status_code == 400
+
+def test_bulk_create_books(test_client, init_database, auth_headers, new_book_data, invalid_book_data):
+    """Test creating a batch of books with one invalid item."""
+    second_book = dict(new_book_data, title='Another Test Book')
+    response = test_client.post(
+        '/api/books/bulk',
+        data=json.dumps([new_book_data, invalid_book_data, second_book]),
+        headers=auth_headers
+    )
+    
+    assert response.status_code == 207
+    data = json.loads(response.data)
+    
+    assert [item['status'] for item in data['data']] == ['created', 'error', 'created']
+    assert 'title' in data['data'][1]['errors']
+    assert Book.query.count() == 7
+    assert db.session.get(Book, data['data'][2]['id']).title == 'Another Test Book'
+
+def test_bulk_update_books(test_client, init_database, auth_headers):
+    """Test partially updating several books at once."""
+    response = test_client.patch(
+        '/api/books/bulk',
+        data=json.dumps([
+            {'id': 1, 'availability': False},
+            {'id': 2, 'title': 'Go Set a Watchman', 'publication_year': 2015},
+            {'id': 999, 'availability': False}
+        ]),
+        headers=auth_headers
+    )
+    
+    assert response.status_code == 207
+    data = json.loads(response.data)
+    
+    assert [item['status'] for item in data['data']] == ['updated', 'updated', 'error']
+    init_database.session.expire_all()
+    assert db.session.get(Book, 1).availability == False
+    assert db.session.get(Book, 2).title == 'Go Set a Watchman'
+    assert db.session.get(Book, 2).author == 'Harper Lee'
+
+def test_bulk_delete_books(test_client, init_database, auth_headers):
+    """Test deleting several books by id."""
+    response = test_client.delete(
+        '/api/books/bulk',
+        data=json.dumps({'ids': [1, 3, 999]}),
+        headers=auth_headers
+    )
+    
+    assert response.status_code == 207
+    data = json.loads(response.data)
+    
+    assert [item['status'] for item in data['data']] == ['deleted', 'deleted', 'error']
+    assert Book.query.count() == 3
+
+def test_bulk_delete_rejects_booleans_and_repeats(test_client, init_database, auth_headers):
+    """Test that true is not read as id 1 and a repeated id is reported once as deleted."""
+    response = test_client.delete(
+        '/api/books/bulk',
+        data=json.dumps({'ids': [True, 2, 2, [3]]}),
+        headers=auth_headers
+    )
+    
+    assert response.status_code == 207
+    data = json.loads(response.data)
+    
+    assert [item['status'] for item in data['data']] == ['error', 'deleted', 'error', 'error']
+    assert data['data'][2]['errors'] == {'id': ['Duplicate id.']}
+    init_database.session.expire_all()
+    assert db.session.get(Book, 1) is not None
+    assert Book.query.count() == 4
+
+def test_bulk_update_rejects_boolean_ids(test_client, init_database, auth_headers):
+    """Test that a boolean id does not select book 1."""
+    response = test_client.patch(
+        '/api/books/bulk',
+        data=json.dumps([{'id': True, 'availability': False}]),
+        headers=auth_headers
+    )
+    
+    assert response.status_code == 400
+    init_database.session.expire_all()
+    assert db.session.get(Book, 1).availability == True
+
+def test_bulk_request_requires_list(test_client, init_database, auth_headers):
+    """Test that a bulk request without items is rejected."""
+    response = test_client.post('/api/books/bulk', data=json.dumps({}), headers=auth_headers)
+    
+    assert response.status_code == 400
+
+def test_get_book_is_cached(test_client, init_database, auth_headers):
+    """Test that repeated reads are served from the cache."""
+    first = test_client.get('/api/books/2', headers=auth_headers)
+    second = test_client.get('/api/books/2', headers=auth_headers)
+    
+    assert first.headers['X-Cache'] == 'MISS'
+    assert second.headers['X-Cache'] == 'HIT'
+    assert json.loads(first.data)['data'] == json.loads(second.data)['data']
+    
+    stats = json.loads(test_client.get('/api/cache/stats').data)['data']
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+
+def test_writes_invalidate_cache(test_client, init_database, auth_headers, new_book_data):
+    """Test that cached books and lists are dropped on write."""
+    test_client.get('/api/books/2', headers=auth_headers)
+    test_client.get('/api/books', headers=auth_headers)
+    
+    update_data = dict(new_book_data, title='Go Set a Watchman')
+    test_client.put('/api/books/2', data=json.dumps(update_data), headers=auth_headers)
+    response = test_client.get('/api/books/2', headers=auth_headers)
+    assert response.headers['X-Cache'] == 'MISS'
+    assert json.loads(response.data)['data']['title'] == 'Go Set a Watchman'
+    
+    test_client.post('/api/books', data=json.dumps(new_book_data), headers=auth_headers)
+    response = test_client.get('/api/books', headers=auth_headers)
+    assert response.headers['X-Cache'] == 'MISS'
+    assert len(json.loads(response.data)['data']) == 6
+
+def test_read_before_concurrent_write_is_not_cached(test_client, init_database, auth_headers, new_book_data, monkeypatch):
+    """Test that a payload read before a write committed is not served after it."""
+    import app.routes
+    book_etag = app.routes.book_etag
+    
+    def etag_then_concurrent_write(book_id, version):
+        # Runs after the GET read the row and before it fills the cache
+        etag = book_etag(book_id, version)
+        with db.engine.begin() as connection:
+            connection.execute(update(Book).where(Book.id == book_id).values(title='Go Set a Watchman'))
+        app.routes.cache.invalidate()
+        return etag
+    
+    monkeypatch.setattr(app.routes, 'book_etag', etag_then_concurrent_write)
+    stale = test_client.get('/api/books/2', headers=auth_headers)
+    monkeypatch.setattr(app.routes, 'book_etag', book_etag)
+    assert json.loads(stale.data)['data']['title'] == 'To Kill a Mockingbird'
+    
+    init_database.session.expire_all()
+    response = test_client.get('/api/books/2', headers=auth_headers)
+    assert response.headers['X-Cache'] == 'MISS'
+    assert json.loads(response.data)['data']['title'] == 'Go Set a Watchman'
+
+def test_get_book_etag(test_client, init_database, auth_headers, new_book_data):
+    """Test conditional GET on a single book."""
+    response = test_client.get('/api/books/3', headers=auth_headers)
+    etag = response.headers['ETag']
+    
+    response = test_client.get('/api/books/3', headers=dict(auth_headers, **{'If-None-Match': etag}))
+    assert response.status_code == 304
+    assert response.data == b''
+    
+    test_client.put('/api/books/3', data=json.dumps(new_book_data), headers=auth_headers)
+    response = test_client.get('/api/books/3', headers=dict(auth_headers, **{'If-None-Match': etag}))
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_list_etag_changes_with_catalog(test_client, init_database, auth_headers):
+    """Test conditional GET on the book list, including writes from bulk endpoints."""
+    etag = test_client.get('/api/books', headers=auth_headers).headers['ETag']
+    
+    response = test_client.get('/api/books', headers=dict(auth_headers, **{'If-None-Match': etag}))
+    assert response.status_code == 304
+    
+    test_client.patch('/api/books/bulk', data=json.dumps([{'id': 4, 'availability': False}]), headers=auth_headers)
+    response = test_client.get('/api/books', headers=dict(auth_headers, **{'If-None-Match': etag}))
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert db.session.get(Book, 4).version == 2
+
+def test_etags_off_without_version_triggers(test_client, init_database, auth_headers, monkeypatch):
+    """Test that databases without the version triggers get no ETags rather than ones that never change."""
+    import app.routes
+    monkeypatch.setattr(app.routes, 'etags_enabled', lambda: False)
+    
+    for url in ('/api/books', '/api/books/1', '/api/books/facets'):
+        response = test_client.get(url, headers=dict(auth_headers, **{'If-None-Match': '*'}))
+        assert response.status_code == 200
+        assert 'ETag' not in response.headers
+        # Served from the response cache the second time
+        response = test_client.get(url, headers=dict(auth_headers, **{'If-None-Match': '*'}))
+        assert response.status_code == 200
+
+def test_filter_books_multiple_values(test_client, init_database, auth_headers):
+    """Test filtering on several genres at once."""
+    response = test_client.get('/api/books?genre=Fantasy,Classic&sort_by=title', headers=auth_headers)
+    
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    
+    assert [book['title'] for book in data['data']] == ['The Great Gatsby', 'The Hobbit']
+
+def test_filter_books_by_year_range(test_client, init_database, auth_headers):
+    """Test combining availability with a publication year range."""
+    response = test_client.get(
+        '/api/books?availability=true&year_from=1900&year_to=1950&sort_by=publication_year&sort_order=desc',
+        headers=auth_headers
+    )
+    
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    
+    assert [book['publication_year'] for book in data['data']] == [1937, 1925]
+
+def test_sorted_cursor_pagination(test_client, init_database, auth_headers):
+    """Test walking a sorted listing page by page with cursors."""
+    url = '/api/books?sort_by=author&sort_order=desc&per_page=2'
+    data = json.loads(test_client.get(url, headers=auth_headers).data)
+    authors = [book['author'] for book in data['data']]
+    
+    while data['pagination']['has_next']:
+        cursor = data['pagination']['next_cursor']
+        assert f'after={cursor}' in data['pagination']['links']['next']
+        data = json.loads(test_client.get(f'{url}&after={cursor}', headers=auth_headers).data)
+        authors.extend(book['author'] for book in data['data'])
+    
+    assert len(authors) == 5
+    assert authors == sorted(authors, reverse=True)
+
+def test_cursor_pagination_across_null_sort_values(test_client, init_database, auth_headers):
+    """Test that walking a sort on a nullable column visits the NULL rows too."""
+    with db.engine.begin() as connection:
+        connection.execute(update(Book).where(Book.id.in_([2, 4])).values(availability=None))
+
+    for sort_order in ('asc', 'desc'):
+        url = f'/api/books?sort_by=availability&sort_order={sort_order}&per_page=1'
+        data = json.loads(test_client.get(url, headers=auth_headers).data)
+        ids = [book['id'] for book in data['data']]
+        while data['pagination']['has_next']:
+            cursor = data['pagination']['next_cursor']
+            data = json.loads(test_client.get(f'{url}&after={cursor}', headers=auth_headers).data)
+            ids.extend(book['id'] for book in data['data'])
+
+        assert sorted(ids) == [1, 2, 3, 4, 5]
+
+def test_invalid_sort_field(test_client, init_database, auth_headers):
+    """Test that unknown sort fields and bad numbers are rejected."""
+    assert test_client.get('/api/books?sort_by=password', headers=auth_headers).status_code == 400
+    assert test_client.get('/api/books?year_from=recent', headers=auth_headers).status_code == 400
@@ -0,0 +1,60 @@
+import time
+import pytest
+from flask import Flask
+from app.cache import BookCache, LRUCache, LocalSharedStore
+
+@pytest.fixture(params=['memory', 'shared'])
+def book_cache(request):
+    """A BookCache on each backend, the shared one emulated locally."""
+    app = Flask(__name__)
+    app.config['BOOK_CACHE_BACKEND'] = request.param
+    app.config['BOOK_CACHE_CLIENT'] = LocalSharedStore()
+    return BookCache(app)
+
+def test_lru_evicts_least_recently_used():
+    """Test that the LRU drops the oldest untouched entry."""
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+
+def test_lru_expires_entries():
+    """Test that entries are not returned after their TTL."""
+    cache = LRUCache(maxsize=2, ttl=0.01)
+    cache.set('a', 1)
+    time.sleep(0.02)
+    
+    assert cache.get('a') is None
+
+def test_counters_are_separate_from_entries():
+    """Test that a counter is read through counter(), never get()."""
+    cache = LRUCache(maxsize=1, ttl=60)
+    cache.incr('generation')
+    cache.set('a', 1)
+    cache.set('b', 2)
+    
+    assert cache.get('generation') is None
+    assert cache.counter('generation') == 1
+    assert cache.counter('missing') == 0
+
+def test_invalidate_orphans_cached_keys(book_cache):
+    """Test that a write changes every book and list key."""
+    from werkzeug.datastructures import MultiDict
+    args = MultiDict([('q', 'tolkien'), ('per_page', '5')])
+    reordered = MultiDict([('per_page', '5'), ('q', 'tolkien')])
+    
+    key = book_cache.list_key('localhost', args)
+    assert key == book_cache.list_key('localhost', reordered)
+    book_key = book_cache.book_key(1)
+    book_cache.set(book_key, {'id': 1})
+    book_cache.invalidate()
+    
+    assert book_cache.list_key('localhost', args) != key
+    assert book_cache.book_key(1) != book_key
+    assert book_cache.get(book_cache.book_key(1)) is None
+    assert book_cache.backend.counter(BookCache.GENERATION_KEY) == 1
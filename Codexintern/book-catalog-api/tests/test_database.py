@@ -0,0 +1,68 @@
+import sqlite3
+import pytest
+from sqlalchemy import create_engine, insert, select, text
+from app import create_app, db
+from app.models import Book, CatalogVersion
+from config import ProductionConfig, TestingConfig
+
+def test_production_profile_tunes_sqlite(tmp_path):
+    """Test that the production profile applies its pragmas and pool options to new connections."""
+    class TunedConfig(ProductionConfig):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'tuned.db')
+    
+    app = create_app(TunedConfig)
+    with app.app_context():
+        assert db.session.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert db.session.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+        assert db.session.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+        assert db.engine.pool.size() == TunedConfig.SQLALCHEMY_ENGINE_OPTIONS['pool_size']
+        db.session.remove()
+        db.engine.dispose()
+
+def test_default_profile_leaves_sqlite_alone(tmp_path):
+    """Test that configs without SQLITE_PRAGMAS keep SQLite's defaults."""
+    class PlainConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'plain.db')
+    
+    app = create_app(PlainConfig)
+    with app.app_context():
+        assert db.session.execute(text('PRAGMA journal_mode')).scalar() == 'delete'
+        db.session.remove()
+        db.engine.dispose()
+
+def test_version_triggers_do_not_depend_on_table_order():
+    """Test that the catalog version triggers are made even when catalog_version is created before book."""
+    engine = create_engine('sqlite://')
+    CatalogVersion.__table__.create(engine)
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Book).values(title='Emma', author='Jane Austen', genre='Classic', publication_year=1815))
+        assert connection.scalar(select(CatalogVersion.version)) == 1
+    engine.dispose()
+
+def test_production_profile_locks_for_writes_up_front(tmp_path):
+    """Test that a writing request holds the write lock from its first read, and a GET does not."""
+    class TunedConfig(ProductionConfig):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'tuned.db')
+    
+    app = create_app(TunedConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.remove()
+    
+    other = sqlite3.connect(str(tmp_path / 'tuned.db'), timeout=0, isolation_level=None)
+    for method, locked in (('GET', False), ('PUT', True)):
+        with app.test_request_context(method=method):
+            db.session.scalar(select(Book.id))
+            if locked:
+                with pytest.raises(sqlite3.OperationalError, match='locked'):
+                    other.execute('BEGIN IMMEDIATE')
+            else:
+                other.execute('BEGIN IMMEDIATE')
+                other.execute('ROLLBACK')
+            db.session.remove()
+    other.close()
+    with app.app_context():
+        db.engine.dispose()
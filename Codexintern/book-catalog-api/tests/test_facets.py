@@ -0,0 +1,70 @@
+import json
+from app import db
+import app.facets
+from app.facets import facet_counts_maintained, grouped_facet_counts, rebuild_facet_counts, stored_facet_counts
+from app.models import Book
+
+def get_facets(client, query=''):
+    response = client.get('/api/books/facets' + query)
+    assert response.status_code == 200
+    return json.loads(response.data)['data']
+
+def test_facets_for_whole_catalog(test_client, init_database):
+    """Test counts per genre, decade and availability from the aggregate table."""
+    data = get_facets(test_client)
+    assert data['total'] == 5
+    assert {item['value']: item['count'] for item in data['genre']} == {
+        'Classic': 1, 'Fiction': 1, 'Dystopian': 1, 'Romance': 1, 'Fantasy': 1
+    }
+    assert data['decade'] == [
+        {'value': 1810, 'count': 1}, {'value': 1920, 'count': 1}, {'value': 1930, 'count': 1},
+        {'value': 1940, 'count': 1}, {'value': 1960, 'count': 1}
+    ]
+    assert data['availability'] == [{'value': True, 'count': 4}, {'value': False, 'count': 1}]
+
+def test_facets_follow_writes(test_client, init_database, new_book_data):
+    """Test that creates, updates and deletes adjust the counts incrementally."""
+    book_id = json.loads(test_client.post('/api/books', json=new_book_data).data)['data']['id']
+    assert {'value': 'Test Genre', 'count': 1} in get_facets(test_client)['genre']
+
+    test_client.put(f'/api/books/{book_id}', json=dict(new_book_data, genre='Fantasy', availability=False))
+    data = get_facets(test_client)
+    assert {'value': 'Fantasy', 'count': 2} in data['genre']
+    assert all(item['value'] != 'Test Genre' for item in data['genre'])
+    assert {'value': False, 'count': 2} in data['availability']
+
+    test_client.delete(f'/api/books/{book_id}')
+    assert get_facets(test_client) == stored_facet_counts() == grouped_facet_counts(Book.query)
+
+def test_filtered_facets_use_grouped_queries(test_client, init_database):
+    """Test that q and filters narrow the counts like they narrow GET /api/books."""
+    data = get_facets(test_client, '?availability=true&year_from=1900')
+    assert data['total'] == 3
+    assert [item['value'] for item in data['availability']] == [True]
+
+    data = get_facets(test_client, '?q=hobbit')
+    assert data['genre'] == [{'value': 'Fantasy', 'count': 1}]
+    assert data['decade'] == [{'value': 1930, 'count': 1}]
+
+    assert test_client.get('/api/books/facets?publication_year=abc').status_code == 400
+
+def test_rebuild_facet_counts(test_app, init_database):
+    """Test recounting after the aggregate table drifted."""
+    db.session.execute(db.text("UPDATE book_facet SET count = 99"))
+    rebuild_facet_counts()
+    assert stored_facet_counts() == grouped_facet_counts(Book.query)
+
+def test_trigger_lookup_runs_once(test_app, init_database, monkeypatch):
+    """Test that the facet trigger lookup runs once per app, not on every request."""
+    test_app.extensions.pop('facet_counts_maintained', None)
+    assert facet_counts_maintained() is True
+    monkeypatch.setattr(app.facets, 'text', None)
+    assert facet_counts_maintained() is True
+
+def test_facets_are_cached_and_conditional(test_client, init_database):
+    """Test the cache and ETag handling shared with the list endpoint."""
+    first = test_client.get('/api/books/facets')
+    assert test_client.get('/api/books/facets').headers['X-Cache'] == 'HIT'
+    assert test_client.get('/api/books').headers['X-Cache'] == 'MISS'
+    response = test_client.get('/api/books/facets', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 304
@@ -0,0 +1,86 @@
+import json
+import pytest
+import app.fuzzy
+from app.fuzzy import TrigramIndex, Vocabulary, similarity
+
+@pytest.fixture
+def fuzzy_client(test_app, test_client, init_database):
+    # Each test builds a new catalog, so start from an empty vocabulary
+    test_app.extensions.pop('fuzzy_vocabulary', None)
+    return test_client
+
+def fuzzy(client, query):
+    response = client.get('/api/books/fuzzy' + query)
+    assert response.status_code == 200
+    return json.loads(response.data)['data']
+
+def test_similarity_and_index():
+    """Test trigram similarity and that the index returns the closest terms first."""
+    assert similarity('tolkien', 'tolkien') == 1.0
+    assert similarity('orwel', 'orwell') > similarity('tolkein', 'tolkien') > 0.3
+    assert similarity('hobbit', 'orwell') < 0.1
+
+    index = TrigramIndex(['tolkien', 'token', 'orwell', 'hobbit'])
+    assert [term for _, term in index.similar('tolkein', 0.3, 5)] == ['tolkien']
+    index.remove('tolkien')
+    assert index.similar('tolkein', 0.3, 5) == []
+    assert len(index) == 3
+
+def test_fuzzy_search_corrects_misspellings(fuzzy_client):
+    """Test that misspelled author and title words still find the book, ranked by similarity."""
+    data = fuzzy(fuzzy_client, '?q=Tolkein')
+    assert [book['title'] for book in data['books']] == ['The Hobbit']
+    assert data['terms'] == {'tolkein': ['tolkien']}
+    assert 0.3 <= data['books'][0]['similarity'] < 1
+
+    data = fuzzy(fuzzy_client, '?q=Orwel')
+    assert data['books'][0]['title'] == '1984'
+
+    data = fuzzy(fuzzy_client, '?q=gret gatsbi')
+    assert [book['title'] for book in data['books']] == ['The Great Gatsby']
+
+    data = fuzzy(fuzzy_client, '?q=hobbit')
+    assert data['books'][0]['similarity'] == 1.0
+
+def test_fuzzy_search_threshold_and_filters(fuzzy_client):
+    """Test that the threshold drops weak matches and list filters still apply."""
+    assert fuzzy(fuzzy_client, '?q=Tolkein&threshold=0.9')['books'] == []
+    assert fuzzy(fuzzy_client, '?q=Orwel&availability=true')['books'] == []
+    assert fuzzy(fuzzy_client, '?q=xyzzy')['books'] == []
+
+    assert fuzzy_client.get('/api/books/fuzzy').status_code == 400
+    assert fuzzy_client.get('/api/books/fuzzy?q=a&threshold=2').status_code == 400
+
+def test_fuzzy_search_follows_writes(fuzzy_client, new_book_data):
+    """Test that new words are found once written and removed books are not returned."""
+    assert fuzzy(fuzzy_client, '?q=Dostoevski')['books'] == []
+    response = fuzzy_client.post('/api/books', json=dict(new_book_data, author='Fyodor Dostoevsky'))
+    book_id = json.loads(response.data)['data']['id']
+
+    assert [book['id'] for book in fuzzy(fuzzy_client, '?q=Dostoevski')['books']] == [book_id]
+
+    fuzzy_client.delete(f'/api/books/{book_id}')
+    assert fuzzy(fuzzy_client, '?q=Dostoevski')['books'] == []
+
+def test_catalog_version_is_read_once_per_interval(fuzzy_client, monkeypatch):
+    """Test that sync reads the catalog version at most once per refresh interval."""
+    vocab = Vocabulary()
+    vocab.sync(60, background=False)
+    reads = []
+    monkeypatch.setattr(app.fuzzy, 'current_catalog_version', lambda: reads.append(1) or 0)
+
+    for _ in range(3):
+        vocab.sync(60)
+    assert reads == []
+    vocab.checked_at -= 60
+    vocab.sync(60)
+    assert reads == [1]
+
+def test_failed_background_refresh_allows_another(test_app):
+    """Test that a refresh thread failing before it reads the terms does not disable refreshes."""
+    vocab = Vocabulary()
+    vocab._refreshing = True
+    vocab._refresh_in_context(object(), 1)
+
+    assert vocab._refreshing is False
+    assert vocab.version is None
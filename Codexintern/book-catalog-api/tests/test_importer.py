@@ -0,0 +1,171 @@
+import csv
+import io
+import json
+import os
+import pytest
+from app import db
+from app.importer import CatalogImportError, import_books, read_records
+from app.models import Book, ImportCheckpoint
+
+ROWS = [
+    {'id': 7, 'title': 'The Hobbit', 'author': 'J.R.R. Tolkien', 'genre': 'Fantasy',
+     'publication_year': '1937', 'availability': 'true', 'isbn': '978-0-261-10221-7'},
+    {'id': 8, 'title': '<b>Dune</b>', 'author': 'Frank Herbert', 'genre': 'Science Fiction',
+     'publication_year': '1965', 'availability': 'false', 'isbn': ''},
+    {'id': 9, 'title': '', 'author': 'Nobody', 'genre': 'Fiction',
+     'publication_year': '1990', 'availability': 'true', 'isbn': ''},
+    {'id': 10, 'title': 'Emma', 'author': 'Jane Austen', 'genre': 'Romance',
+     'publication_year': '1815', 'availability': '', 'isbn': '0-306-40615-3'},
+    {'id': 11, 'title': 'Beloved', 'author': 'Toni Morrison', 'genre': 'Fiction',
+     'publication_year': '1987', 'availability': 'true', 'isbn': '0306406152'},
+]
+
+@pytest.fixture
+def empty_catalog(test_database):
+    yield test_database
+    db.session.rollback()
+    Book.query.delete()
+    ImportCheckpoint.query.delete()
+    db.session.commit()
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+def test_import_csv_validates_and_inserts(empty_catalog, tmp_path):
+    """Test that valid records are inserted and invalid ones are reported with their record number."""
+    path = write_csv(tmp_path / 'books.csv', ROWS)
+    rejects = io.StringIO()
+
+    stats = import_books(path, workers=0, rejects=rejects)
+
+    assert (stats.rows_read, stats.inserted, stats.rejected) == (5, 3, 2)
+    books = {book.title: book for book in Book.query.all()}
+    assert set(books) == {'The Hobbit', 'Dune', 'Beloved'}
+    assert books['Dune'].availability is False
+    assert books['The Hobbit'].id != 7
+
+    rejected = [json.loads(line) for line in rejects.getvalue().splitlines()]
+    assert [item['record'] for item in rejected] == [3, 4]
+    assert 'title' in rejected[0]['errors']
+    assert 'isbn' in rejected[1]['errors']
+
+def test_import_jsonl_in_worker_processes(empty_catalog, tmp_path):
+    """Test importing JSON Lines with a process pool, including a line that is not JSON."""
+    path = tmp_path / 'books.jsonl'
+    lines = [json.dumps({'title': f'Book {n}', 'author': 'Author', 'genre': 'Fiction',
+                         'publication_year': 1900 + n}) for n in range(20)]
+    lines.insert(5, '{not json')
+    path.write_text('\n'.join(lines) + '\n')
+
+    stats = import_books(str(path), chunk_size=4, workers=2)
+
+    assert (stats.rows_read, stats.inserted, stats.rejected) == (21, 20, 1)
+    assert Book.query.count() == 20
+    assert all(book.availability for book in Book.query.all())
+
+def test_import_resumes_from_checkpoint(empty_catalog, tmp_path):
+    """Test that an interrupted import continues after the last committed chunk."""
+    path = write_csv(tmp_path / 'books.csv', [
+        {'title': f'Book {n}', 'author': 'Author', 'genre': 'Fiction', 'publication_year': 1950}
+        for n in range(10)
+    ])
+
+    def interrupt(stats):
+        if stats.rows_read >= 6:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        import_books(path, chunk_size=3, workers=0, on_progress=interrupt)
+    assert Book.query.count() == 6
+
+    stats = import_books(path, chunk_size=3, workers=0)
+    assert stats.resumed_from == 6
+    assert (stats.rows_read, stats.inserted) == (10, 10)
+    assert sorted(book.title for book in Book.query.all()) == sorted(f'Book {n}' for n in range(10))
+
+    assert import_books(path, workers=0).already_imported
+    assert Book.query.count() == 10
+
+    with open(path, 'a') as f:
+        f.write('Book 10,Author,Fiction,1950\n')
+    with pytest.raises(CatalogImportError):
+        import_books(path, workers=0)
+    assert import_books(path, workers=0, restart=True).inserted == 11
+
+def test_import_resumes_at_the_checkpoint_offset(empty_catalog, tmp_path):
+    """Test that a resumed import seeks past the committed records instead of re-reading them."""
+    rows = [{'title': f'Book {n}', 'author': 'Author, Jr.', 'genre': 'Fiction\nand more', 'publication_year': 1950}
+            for n in range(5)]
+    path = write_csv(tmp_path / 'books.csv', rows)
+
+    def interrupt(stats):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        import_books(path, chunk_size=2, workers=0, on_progress=interrupt)
+    checkpoint = db.session.get(ImportCheckpoint, path)
+    rest = list(read_records(path, 'csv', checkpoint.source_offset))
+    assert [record['title'] for _, record in rest] == ['Book 2', 'Book 3', 'Book 4']
+    assert rest[0][1]['genre'] == 'Fiction\nand more'
+    assert rest[-1][0] == os.path.getsize(path)
+
+    stats = import_books(path, chunk_size=2, workers=0)
+    assert (stats.resumed_from, stats.rows_read, stats.inserted) == (2, 5, 5)
+    assert sorted(book.title for book in Book.query.all()) == [f'Book {n}' for n in range(5)]
+
+def test_read_records_jsonl_offsets(tmp_path):
+    """Test that JSON Lines offsets point just past each record, blank lines included."""
+    path = tmp_path / 'books.jsonl'
+    path.write_text('{"title": "Emma"}\n\n{"title": "Ülysses"}\n')
+
+    records = list(read_records(str(path), 'jsonl'))
+    assert records == [(18, {'title': 'Emma'}), (len(path.read_bytes()), {'title': 'Ülysses'})]
+    assert list(read_records(str(path), 'jsonl', 18)) == records[1:]
+
+def test_import_resumes_legacy_checkpoint(empty_catalog, tmp_path):
+    """Test that a checkpoint without an offset resumes by counting records."""
+    path = write_csv(tmp_path / 'books.csv', ROWS)
+    db.session.add(ImportCheckpoint(source=path, source_size=os.path.getsize(path),
+                                    rows_read=3, inserted=2, rejected=1))
+    db.session.commit()
+
+    stats = import_books(path, workers=0)
+    assert (stats.rows_read, stats.inserted, stats.rejected) == (5, 3, 2)
+    assert {book.title for book in Book.query.all()} == {'Beloved'}
+
+def test_rejects_are_written_before_the_chunk_commits(empty_catalog, tmp_path, monkeypatch):
+    """Test that a chunk whose commit fails has already reported its rejects."""
+    path = write_csv(tmp_path / 'books.csv', ROWS)
+    rejects = io.StringIO()
+
+    def fail():
+        raise RuntimeError('disk I/O error')
+
+    # The checkpoint row is created first; the chunk's commit is the one that fails
+    db.session.add(ImportCheckpoint(source=path, source_size=os.path.getsize(path), source_offset=0,
+                                    rows_read=0, inserted=0, rejected=0))
+    db.session.commit()
+    monkeypatch.setattr(db.session, 'commit', fail, raising=False)
+    with pytest.raises(RuntimeError):
+        import_books(path, workers=0, rejects=rejects)
+    monkeypatch.undo()
+    db.session.rollback()
+
+    assert [json.loads(line)['record'] for line in rejects.getvalue().splitlines()] == [3, 4]
+
+def test_import_command(empty_catalog, test_app, tmp_path):
+    """Test the flask books import command."""
+    path = write_csv(tmp_path / 'books.csv', ROWS)
+    runner = test_app.test_cli_runner()
+
+    result = runner.invoke(args=['books', 'import', path, '--workers', '0'])
+    assert result.exit_code == 0, result.output
+    assert 'Imported 3 books from 5 records (2 rejected)' in result.output
+
+    result = runner.invoke(args=['books', 'import', path, '--workers', '0'])
+    assert 'already imported' in result.output
+    assert Book.query.count() == 3
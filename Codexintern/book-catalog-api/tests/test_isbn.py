@@ -0,0 +1,67 @@
+import random
+from app.isbn import clean_isbns, format_isbns, to_isbn10, to_isbn13, validate_isbns
+from app.utils import format_isbn, validate_isbn
+
+SAMPLES = [
+    '978-0-306-40615-7', '9780306406157', '978 0 306 40615 7', '9780306406158',
+    '0-306-40615-2', '0306406152', '0306406153', '080442957X', '080442957x', '0-8044-2957-X',
+    '979-10-90636-07-1', 'X804429570', '97803064061A7', '12345', '1234567890123456',
+    '', None, '   ', '---', ' 0306406152 ', '0306406152\n'
+]
+
+def _random_isbns(count, seed=7):
+    rng = random.Random(seed)
+    values = []
+    for _ in range(count):
+        digits = ''.join(rng.choice('0123456789') for _ in range(rng.choice([9, 10, 12, 13])))
+        if len(digits) == 9:
+            digits += rng.choice('0123456789Xx')
+        elif len(digits) == 12:
+            digits = '978' + digits[3:]
+            digits += str((10 - sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(digits)) % 10) % 10)
+        if rng.random() < 0.3:
+            digits = digits[:3] + '-' + digits[3:]
+        values.append(digits)
+    return values
+
+def test_validate_isbns_matches_scalar():
+    """Test that the batch validator agrees with validate_isbn row by row."""
+    isbns = SAMPLES + _random_isbns(2000)
+    valid, cleaned = validate_isbns(isbns)
+
+    for isbn, is_valid, value in zip(isbns, valid, cleaned):
+        expected_valid, expected_cleaned = validate_isbn(isbn)
+        assert bool(is_valid) == expected_valid, isbn
+        if expected_valid:
+            assert value == expected_cleaned
+
+def test_format_isbns_matches_scalar():
+    """Test that batch formatting produces what format_isbn does."""
+    isbns = SAMPLES + _random_isbns(500)
+    assert list(format_isbns(isbns)) == [format_isbn(isbn) for isbn in isbns]
+
+def test_clean_isbns_reports_true_lengths():
+    """Test that values longer than 13 characters keep their real length."""
+    cleaned, lengths = clean_isbns(['0-306-40615-2', '1234567890123456', None])
+    assert list(cleaned) == ['0306406152', '1234567890123', '']
+    assert list(lengths) == [10, 16, 0]
+
+def test_isbn10_to_isbn13_round_trip():
+    """Test converting between ISBN-10 and ISBN-13."""
+    valid, isbn13 = to_isbn13(['0-306-40615-2', '080442957X', '9780306406157', '0306406153'])
+    assert list(valid) == [True, True, True, False]
+    assert list(isbn13) == ['9780306406157', '9780804429573', '9780306406157', '']
+
+    convertible, isbn10 = to_isbn10(['9780306406157', '9780804429573', '9791090636071', '080442957x'])
+    assert list(convertible) == [True, True, False, True]
+    assert list(isbn10) == ['0306406152', '080442957X', '', '080442957X']
+
+    originals = [isbn.replace('-', '') for isbn in _random_isbns(500) if validate_isbn(isbn)[0]]
+    originals = [isbn.upper() for isbn in originals if len(isbn) == 10]
+    assert list(to_isbn10(to_isbn13(originals)[1])[1]) == originals
+
+def test_empty_batch():
+    """Test that an empty batch returns empty results."""
+    valid, cleaned = validate_isbns([])
+    assert valid.shape == (0,) and cleaned.shape == (0,)
+    assert list(format_isbns([])) == []
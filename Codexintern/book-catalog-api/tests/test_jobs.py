@@ -0,0 +1,142 @@
+import json
+import os
+import time
+import pytest
+from app import create_app, db
+from app.jobs import job_runner
+from app.models import Book, Job
+from config import TestingConfig
+
+@pytest.fixture
+def job_dirs(test_app, init_database, tmp_path, monkeypatch):
+    """Point job results and imports at temporary directories."""
+    monkeypatch.setitem(test_app.config, 'JOBS_RESULT_DIR', str(tmp_path / 'results'))
+    monkeypatch.setitem(test_app.config, 'JOBS_IMPORT_DIR', str(tmp_path / 'imports'))
+    os.makedirs(tmp_path / 'imports')
+    yield tmp_path
+    Job.query.delete()
+    db.session.commit()
+
+def test_export_job(test_client, job_dirs):
+    """Test that an export job writes the catalog to a downloadable file."""
+    response = test_client.post('/api/jobs', json={'type': 'export', 'params': {'format': 'jsonl'}})
+    assert response.status_code == 202
+    data = json.loads(response.data)
+    assert data['success'] == True
+    assert response.headers['Location'] == f"/api/jobs/{data['data']['id']}"
+
+    response = test_client.get(response.headers['Location'])
+    job = json.loads(response.data)['data']
+    assert job['status'] == 'succeeded'
+    assert (job['processed'], job['total'], job['progress']) == (5, 5, 1.0)
+    assert job['result']['rows'] == 5
+
+    response = test_client.get(job['result_url'])
+    assert response.status_code == 200
+    titles = {json.loads(line)['title'] for line in response.data.decode().splitlines()}
+    assert 'The Hobbit' in titles and len(titles) == 5
+
+def test_export_job_with_search(test_client, job_dirs):
+    """Test exporting only the books matching q."""
+    response = test_client.post('/api/jobs', json={'type': 'export', 'params': {'format': 'csv', 'q': 'hobbit'}})
+    job = json.loads(test_client.get(response.headers['Location']).data)['data']
+    assert job['result']['rows'] == 1
+    lines = test_client.get(job['result_url']).data.decode().splitlines()
+    assert len(lines) == 2 and 'The Hobbit' in lines[1]
+
+def test_import_and_reindex_jobs(test_client, job_dirs):
+    """Test import jobs reading from the import directory, and reindexing."""
+    (job_dirs / 'imports' / 'more.jsonl').write_text(
+        json.dumps({'title': 'Dune', 'author': 'Frank Herbert', 'genre': 'Science Fiction',
+                    'publication_year': 1965}) + '\n'
+    )
+    response = test_client.post('/api/jobs', json={'type': 'import', 'params': {'path': 'more.jsonl'}})
+    job = json.loads(test_client.get(response.headers['Location']).data)['data']
+    assert job['status'] == 'succeeded'
+    assert job['result']['inserted'] == 1
+    assert 'result_url' not in job
+    assert Book.query.count() == 6
+
+    response = test_client.post('/api/jobs', json={'type': 'reindex'})
+    job = json.loads(test_client.get(response.headers['Location']).data)['data']
+    assert job['status'] == 'succeeded'
+    assert job['result'] == {'books': 6}
+
+def test_invalid_jobs_are_rejected(test_client, job_dirs):
+    """Test that bad job types and parameters are refused before anything is stored."""
+    assert test_client.post('/api/jobs', json={'type': 'unknown'}).status_code == 400
+    assert test_client.post('/api/jobs', json={'type': 'export', 'params': {'format': 'xml'}}).status_code == 400
+    response = test_client.post('/api/jobs', json={'type': 'import', 'params': {'path': '../../etc/passwd'}})
+    assert response.status_code == 400
+    assert Job.query.count() == 0
+    assert test_client.get('/api/jobs/999').status_code == 404
+
+def test_failed_job_reports_error(test_client, job_dirs, monkeypatch):
+    """Test that an exception in a handler marks the job failed with the message."""
+    from app import jobs
+
+    def broken(job, params, progress):
+        raise RuntimeError('disk full')
+
+    monkeypatch.setitem(jobs.JOB_TYPES, 'reindex', (broken, None))
+    response = test_client.post('/api/jobs', json={'type': 'reindex'})
+    job = json.loads(test_client.get(response.headers['Location']).data)['data']
+    assert (job['status'], job['error']) == ('failed', 'disk full')
+    assert test_client.get(f"/api/jobs/{job['id']}/result").status_code == 404
+
+def test_jobs_run_on_worker_threads(tmp_path):
+    """Test that jobs run off the request thread against a file database."""
+    class ThreadedConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'jobs.db')
+        JOBS_WORKERS = 1
+        JOBS_RESULT_DIR = str(tmp_path / 'results')
+
+    app = create_app(ThreadedConfig)
+    try:
+        with app.app_context():
+            db.create_all()
+            db.session.add(Book(title='Emma', author='Jane Austen', genre='Romance', publication_year=1815))
+            db.session.commit()
+
+        client = app.test_client()
+        location = client.post('/api/jobs', json={'type': 'export'}).headers['Location']
+        deadline = time.monotonic() + 10
+        while True:
+            job = json.loads(client.get(location).data)['data']
+            if job['status'] not in ('queued', 'running') or time.monotonic() > deadline:
+                break
+            time.sleep(0.05)
+        assert job['status'] == 'succeeded'
+        assert job['result']['rows'] == 1
+    finally:
+        app.extensions['job_executor'].shutdown(wait=True)
+        with app.app_context():
+            db.engine.dispose()
+
+def test_recover_fails_orphaned_jobs(test_app, job_dirs):
+    """Test that jobs of a process that exited are failed or rerun when a process starts."""
+    dead = f"{job_runner.worker_id.rsplit(':', 1)[0]}:999999999"
+    running = Job(type='reindex', params={}, status='running', worker=dead)
+    queued = Job(type='reindex', params={}, status='queued', worker=dead)
+    db.session.add_all([running, queued])
+    db.session.commit()
+
+    job_runner._recovered = False
+    job_runner.start(test_app)
+
+    assert db.session.get(Job, running.id).status == 'failed'
+    assert db.session.get(Job, queued.id).status == 'succeeded'
+
+def test_expired_results_are_deleted(test_client, job_dirs, monkeypatch):
+    """Test that result files past JOBS_RESULT_RETENTION are deleted after the next job."""
+    monkeypatch.setitem(test_client.application.config, 'JOBS_RESULT_RETENTION', 3600)
+    old = json.loads(test_client.post('/api/jobs', json={'type': 'export'}).data)['data']
+    path = job_dirs / 'results' / old['result']['filename']
+    day_ago = time.time() - 86400
+    os.utime(path, (day_ago, day_ago))
+
+    new = json.loads(test_client.post('/api/jobs', json={'type': 'export'}).data)['data']
+
+    assert not path.exists()
+    assert test_client.get(old['result_url']).status_code == 404
+    assert test_client.get(new['result_url']).status_code == 200
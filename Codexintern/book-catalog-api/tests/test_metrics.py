@@ -0,0 +1,83 @@
+import logging
+from app import create_app, db
+from app.models import Book
+from config import TestingConfig
+
+def test_metrics_endpoint_reports_requests(test_client, init_database):
+    """Test that handled requests show up on /metrics in Prometheus text format."""
+    test_client.get('/api/books')
+    test_client.get('/api/books/1')
+    
+    response = test_client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+    assert '# TYPE http_request_duration_seconds histogram' in body
+    assert 'http_requests_total{endpoint="/api/books",method="GET",status="200"}' in body
+    assert 'http_request_sql_queries_bucket{endpoint="/api/books/<int:id>",method="GET",le="+Inf"}' in body
+    assert 'http_response_size_bytes_count{endpoint="/api/books",method="GET"}' in body
+    assert 'endpoint="/metrics"' not in body
+
+def test_server_timing_header(tmp_path):
+    """Test that METRICS_SERVER_TIMING adds app, db and serialize timings to responses."""
+    class TimingConfig(TestingConfig):
+        METRICS_SERVER_TIMING = True
+        BOOK_CACHE_BACKEND = None
+    
+    app = create_app(TimingConfig)
+    with app.app_context():
+        db.create_all()
+        header = app.test_client().get('/api/books').headers['Server-Timing']
+        db.session.remove()
+    
+    names = [part.split(';')[0].strip() for part in header.split(',')]
+    assert names == ['app', 'db', 'serialize']
+    assert 'queries"' in header
+
+def test_repeated_statements_warn_about_n_plus_one(caplog):
+    """Test that a request running one statement past the threshold is logged as a likely N+1."""
+    class NPlusOneConfig(TestingConfig):
+        METRICS_N_PLUS_ONE_THRESHOLD = 5
+    
+    app = create_app(NPlusOneConfig)
+    
+    @app.route('/n-plus-one')
+    def n_plus_one():
+        for book_id in range(1, 7):
+            db.session.get(Book, book_id)
+        return 'ok'
+    
+    with app.app_context():
+        db.create_all()
+        with caplog.at_level(logging.WARNING, logger='app.metrics'):
+            app.test_client().get('/n-plus-one')
+        body = app.test_client().get('/metrics').get_data(as_text=True)
+        db.session.remove()
+    
+    assert 'Possible N+1 query: GET /n-plus-one ran the same statement 6 times' in caplog.text
+    assert 'http_request_n_plus_one_total{endpoint="/n-plus-one",method="GET"} 1' in body
+
+def test_failed_statements_do_not_skew_query_timing():
+    """Test that a statement that raises leaves no timing state behind on its connection."""
+    app = create_app(TestingConfig)
+    
+    @app.route('/failing-query')
+    def failing_query():
+        try:
+            db.session.execute(db.text('SELECT * FROM no_such_table'))
+        except Exception:
+            db.session.rollback()
+        db.session.execute(db.text('SELECT 1'))
+        info = dict(db.session.connection().info)
+        return {'info_keys': sorted(info)}
+    
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        for _ in range(3):
+            assert client.get('/failing-query').get_json() == {'info_keys': []}
+        body = client.get('/metrics').get_data(as_text=True)
+        db.session.remove()
+    
+    assert 'http_request_sql_queries_count{endpoint="/failing-query",method="GET"} 3' in body
+    assert 'http_request_sql_queries_bucket{endpoint="/failing-query",method="GET",le="1"} 3' in body
@@ -0,0 +1,37 @@
+import os
+import flask_migrate
+from sqlalchemy import inspect, text
+from app import create_app, db
+from app.models import Book
+from config import TestingConfig
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
+
+def test_migrations_build_the_model_schema(tmp_path):
+    """Test that upgrading to head creates the tables, indexes and triggers the models expect."""
+    class MigrationConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'migrated.db')
+    
+    app = create_app(MigrationConfig)
+    with app.app_context():
+        flask_migrate.upgrade(directory=MIGRATIONS)
+        
+        indexes = {index['name'] for index in inspect(db.engine).get_indexes('book')}
+        assert indexes == {index.name for index in Book.__table__.indexes}
+        
+        db.session.add(Book(title='The Hobbit', author='J.R.R. Tolkien', genre='Fantasy', publication_year=1937))
+        db.session.commit()
+        matches = db.session.execute(text("SELECT rowid FROM book_fts WHERE book_fts MATCH 'hobbit'")).all()
+        assert len(matches) == 1
+        assert db.session.execute(text("SELECT doc FROM book_fts_vocab WHERE term = 'tolkien'")).scalar() == 1
+        assert db.session.execute(text('SELECT version FROM catalog_version')).scalar() == 1
+        assert db.session.execute(
+            text("SELECT count FROM book_facet WHERE facet = 'genre' AND value = 'Fantasy'")
+        ).scalar() == 1
+        assert db.session.execute(
+            text("SELECT count FROM book_suggestion WHERE kind = 'author' AND value = 'J.R.R. Tolkien'")
+        ).scalar() == 1
+        db.session.remove()
+        
+        flask_migrate.downgrade(directory=MIGRATIONS, revision='base')
+        assert inspect(db.engine).get_table_names() == ['alembic_version']
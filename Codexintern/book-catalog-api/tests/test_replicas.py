@@ -0,0 +1,132 @@
+import pytest
+from sqlalchemy import select, text, update
+from app import create_app, db, cache
+from app.models import Book
+from app.replicas import SQLiteReplicator, use_primary
+from config import TestingConfig
+
+class ReplicaConfig(TestingConfig):
+    BOOK_CACHE_BACKEND = None
+    REPLICA_STICKY_SECONDS = 60
+
+@pytest.fixture
+def replicated(tmp_path):
+    """App with a primary and two replica SQLite files; only the first replica is kept in sync."""
+    primary = str(tmp_path / 'primary.db')
+    replicas = [str(tmp_path / f'replica{index}.db') for index in range(2)]
+    app = create_app(ReplicaConfig, 'sqlite:///' + primary, ['sqlite:///' + path for path in replicas])
+    
+    with app.app_context():
+        db.create_all()
+        SQLiteReplicator(primary, replicas).sync()
+        yield app, SQLiteReplicator(primary, replicas[:1])
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+def test_writes_go_to_primary_and_reads_to_replicas(replicated, new_book_data):
+    """Test that reads rotate over the replicas and only see writes once replicated."""
+    app, replicator = replicated
+    book_id = app.test_client().post('/api/books', json=new_book_data).get_json()['data']['id']
+    
+    reader = app.test_client()
+    assert [reader.get(f'/api/books/{book_id}').status_code for _ in range(2)] == [404, 404]
+    
+    replicator.sync()
+    # Round-robin alternates between the synced and the stale replica
+    assert [reader.get(f'/api/books/{book_id}').status_code for _ in range(4)] == [200, 404, 200, 404]
+
+def test_writer_reads_its_own_writes(replicated, new_book_data):
+    """Test that a client's reads stick to the primary after it writes."""
+    app, _ = replicated
+    writer = app.test_client()
+    book_id = writer.post('/api/books', json=new_book_data).get_json()['data']['id']
+    
+    assert [writer.get(f'/api/books/{book_id}').status_code for _ in range(3)] == [200, 200, 200]
+    assert app.test_client().get(f'/api/books/{book_id}').status_code == 404
+
+def test_failed_writes_do_not_pin_reads(replicated, invalid_book_data):
+    """Test that only successful writes set the read-your-writes cookie."""
+    app, _ = replicated
+    client = app.test_client()
+    assert client.post('/api/books', json=invalid_book_data).status_code == 400
+    assert client.get_cookie('db_primary_until') is None
+
+def test_only_selects_go_to_replicas(replicated):
+    """Test that text() SQL and DML run on the primary even during a replicated GET."""
+    app, _ = replicated
+    with app.test_request_context('/api/books'):
+        app.preprocess_request()
+        replica = db.session.get_bind(clause=select(Book.id))
+        assert replica is not db.engine
+        assert db.session.get_bind(clause=text('UPDATE book SET title = title')) is db.engine
+        assert db.session.get_bind(clause=update(Book).values(title='x')) is db.engine
+        
+        use_primary()
+        assert db.session.get_bind(clause=select(Book.id)) is db.engine
+
+class CachedReplicaConfig(ReplicaConfig):
+    BOOK_CACHE_BACKEND = 'memory'
+
+@pytest.fixture
+def replicated_cached(tmp_path):
+    """Like replicated, with the memory response cache on and no replica kept in sync."""
+    primary = str(tmp_path / 'primary.db')
+    replicas = [str(tmp_path / f'replica{index}.db') for index in range(2)]
+    app = create_app(CachedReplicaConfig, 'sqlite:///' + primary, ['sqlite:///' + path for path in replicas])
+    
+    with app.app_context():
+        db.create_all()
+        SQLiteReplicator(primary, replicas).sync()
+        yield app
+        db.session.remove()
+        cache.clear()
+        for engine in db.engines.values():
+            engine.dispose()
+
+def test_replica_reads_do_not_fill_the_cache(replicated_cached, new_book_data):
+    """Test that a stale replica list is not cached and served to the writer."""
+    app = replicated_cached
+    writer = app.test_client()
+    book_id = writer.post('/api/books', json=new_book_data).get_json()['data']['id']
+    
+    reader = app.test_client()
+    for _ in range(2):
+        response = reader.get('/api/books')
+        assert response.get_json()['data'] == []
+        assert response.headers['X-Cache'] == 'MISS'
+    
+    response = writer.get('/api/books')
+    assert [book['id'] for book in response.get_json()['data']] == [book_id]
+    assert response.headers['X-Cache'] == 'MISS'
+
+def test_caught_up_replica_reads_fill_the_cache(tmp_path, new_book_data):
+    """Test that a replica at the primary's catalog version may fill the cache."""
+    primary = str(tmp_path / 'primary.db')
+    replicas = [str(tmp_path / f'replica{index}.db') for index in range(2)]
+    app = create_app(CachedReplicaConfig, 'sqlite:///' + primary, ['sqlite:///' + path for path in replicas])
+    
+    with app.app_context():
+        db.create_all()
+        book_id = app.test_client().post('/api/books', json=new_book_data).get_json()['data']['id']
+        SQLiteReplicator(primary, replicas).sync()
+        
+        reader = app.test_client()
+        assert [reader.get('/api/books').headers['X-Cache'] for _ in range(2)] == ['MISS', 'HIT']
+        assert [reader.get(f'/api/books/{book_id}').headers['X-Cache'] for _ in range(2)] == ['MISS', 'HIT']
+        db.session.remove()
+        cache.clear()
+        for engine in db.engines.values():
+            engine.dispose()
+
+def test_primary_reads_fill_the_cache_for_everyone(replicated_cached, new_book_data):
+    """Test that what the primary read is cached and served to replica readers as well."""
+    app = replicated_cached
+    writer = app.test_client()
+    book_id = writer.post('/api/books', json=new_book_data).get_json()['data']['id']
+    
+    assert writer.get(f'/api/books/{book_id}').headers['X-Cache'] == 'MISS'
+    
+    response = app.test_client().get(f'/api/books/{book_id}')
+    assert response.status_code == 200
+    assert response.headers['X-Cache'] == 'HIT'
@@ -0,0 +1,77 @@
+import json
+import pytest
+from datetime import datetime
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from app import db
+from app.models import Book
+from app.schemas import BookSchema
+from app.serialization import book_columns, rows_to_dicts, init_json_provider, OrjsonProvider
+
+def test_fast_path_matches_schema_dump(test_client, init_database):
+    """Test that column tuples serialize exactly like BookSchema."""
+    rows = db.session.query(*book_columns()).order_by(Book.id).all()
+    books = Book.query.order_by(Book.id).all()
+    
+    fast = rows_to_dicts(rows)
+    assert fast == BookSchema(many=True).dump(books)
+    assert [list(book) for book in fast] == [list(book) for book in BookSchema(many=True).dump(books)]
+
+@pytest.mark.parametrize('compact', [True, False])
+def test_orjson_provider_matches_default(compact):
+    """Test that the orjson provider produces the same bytes as the default one."""
+    pytest.importorskip('orjson')
+    app = Flask(__name__)
+    payload = {
+        'success': True,
+        'data': [{'id': 1, 'title': 'The Hobbit', 'availability': True, 'publication_year': 1937}],
+        'timestamp': datetime(2023, 1, 2, 3, 4, 5),
+        'pagination': None
+    }
+    
+    default, fast = DefaultJSONProvider(app), OrjsonProvider(app)
+    default.compact = fast.compact = compact
+    
+    with app.app_context():
+        assert fast.response(payload).get_data() == default.response(payload).get_data()
+    assert json.loads(fast.dumps(payload)) == json.loads(default.dumps(payload))
+
+def test_orjson_provider_differs_only_in_non_ascii_escapes():
+    """Test that non-ASCII text decodes the same but is not escaped, and that json kwargs are honored."""
+    pytest.importorskip('orjson')
+    app = Flask(__name__)
+    default, fast = DefaultJSONProvider(app), OrjsonProvider(app)
+    payload = {'title': 'Les Misérables', 'year': 1862}
+    
+    assert fast.dumps(payload) == '{"title":"Les Misérables","year":1862}'
+    assert json.loads(fast.dumps(payload)) == json.loads(default.dumps(payload))
+    assert fast.dumps(payload, indent=4) == default.dumps(payload, indent=4)
+    assert fast.loads('{"a": 1.5}', parse_float=str) == {'a': '1.5'}
+
+def test_responses_are_compact_by_default(test_client, init_database, auth_headers):
+    """Test that JSON_COMPACT from config.py reaches the provider."""
+    assert test_client.application.config['JSON_COMPACT'] is True
+    assert test_client.application.json.compact is True
+    assert b'\n ' not in test_client.get('/api/books', headers=auth_headers).data
+
+def test_stdlib_provider_is_the_default(test_app):
+    """Test that orjson is only used when JSON_PROVIDER asks for it."""
+    assert test_app.config['JSON_PROVIDER'] == 'default'
+    assert type(test_app.json) is DefaultJSONProvider
+
+def test_orjson_provider_when_configured():
+    """Test that JSON_PROVIDER = 'orjson' installs the orjson provider."""
+    pytest.importorskip('orjson')
+    app = Flask(__name__)
+    app.config['JSON_PROVIDER'] = 'orjson'
+    init_json_provider(app)
+    
+    assert isinstance(app.json, OrjsonProvider)
+
+def test_unknown_provider_is_rejected():
+    """Test that a misspelled JSON_PROVIDER fails at startup."""
+    app = Flask(__name__)
+    app.config['JSON_PROVIDER'] = 'ujson'
+    
+    with pytest.raises(ValueError):
+        init_json_provider(app)
@@ -0,0 +1,148 @@
+import json
+import random
+import pytest
+from app import db
+from app.models import Book
+import app.suggest
+from app.suggest import PrefixIndex, normalize_prefix, normalize_text, query_suggestions, suggestions_maintained
+
+@pytest.fixture
+def suggest_client(test_app, test_client, init_database):
+    # Each test builds a new catalog, so start from an empty index
+    test_app.extensions.pop('suggestions', None)
+    return test_client
+
+def suggest(client, query):
+    response = client.get('/api/books/suggest' + query)
+    assert response.status_code == 200
+    return json.loads(response.data)['data']
+
+def test_normalization():
+    """Test that case, accents and punctuation are ignored and a trailing space is kept."""
+    assert normalize_text('  Les Misérables: Tome I ') == 'les miserables tome i'
+    assert normalize_prefix('The ') == 'the '
+    assert normalize_prefix('J.R.R') == 'j r r'
+
+def test_prefix_index_matches_brute_force():
+    """Test that the block tree picks the same top entries as sorting the whole range."""
+    rng = random.Random(7)
+    words = ['ab', 'abc', 'abd', 'b', 'ba', 'bab', 'c']
+    entries = {(' '.join(rng.choices(words, k=3)), 'title') for _ in range(3000)}
+    entries = [(key, kind, key, rng.randint(1, 50)) for key, kind in entries]
+    index = PrefixIndex(entries)
+
+    for prefix in ['', 'a', 'ab', 'abc ab', 'b', 'ba', 'c c', 'zz']:
+        for limit in (1, 10, 20, 40):
+            expected = sorted(
+                (entry for entry in entries if entry[0].startswith(prefix)),
+                key=lambda entry: (-entry[3], entry[0])
+            )[:limit]
+            found = [index.keys[i] for i in index.top(*index.range(prefix), limit)]
+            assert found == [entry[0] for entry in expected]
+
+def test_prefix_index_skips_excluded_entries(monkeypatch):
+    """Test that excluding more entries than a tree node keeps still avoids sorting the whole range."""
+    rng = random.Random(11)
+    entries = [(f'a{n:05d}', 'title', f'a{n:05d}', rng.randint(1, 1000)) for n in range(20000)]
+    index = PrefixIndex(entries)
+    lo, hi = index.range('a')
+    # The most popular entries are the ones most likely to be replaced
+    exclude = sorted(range(lo, hi), key=lambda i: -index.counts[i])[:500]
+    expected = [i for i in sorted(range(lo, hi), key=lambda i: (-index.counts[i], i)) if i not in set(exclude)][:10]
+
+    sorted_sizes = []
+    lexsort = app.suggest.np.lexsort
+    def spy(keys, *args, **kwargs):
+        sorted_sizes.append(len(keys[0]))
+        return lexsort(keys, *args, **kwargs)
+    monkeypatch.setattr(app.suggest.np, 'lexsort', spy)
+
+    assert index.top(lo, hi, 10, exclude) == expected
+    assert sorted_sizes[-1] < (hi - lo) // 2
+
+def test_prefix_index_merges_spellings():
+    """Test that spellings with the same normalized text are ranked by their summed count."""
+    entries = [
+        ('emma', 'title', 'Emma', 1), ('emma', 'title', 'EMMA', 2), ('emma', 'title', 'Emma.', 1),
+        ('emma', 'author', 'Emma', 1), ('emmanuel', 'title', 'Emmanuel', 3),
+    ]
+    index = PrefixIndex(entries)
+
+    top = index.top(*index.range('emm'), 3)
+    assert [(index.values[i], index.kinds[i], int(index.counts[i])) for i in top] == [
+        ('EMMA', 'title', 4), ('Emmanuel', 'title', 3), ('Emma', 'author', 1)
+    ]
+    assert index.variants(index.find('emma', 'title')) == {'EMMA': 2, 'Emma': 1, 'Emma.': 1}
+    assert index.find('emma', 'genre') == -1
+
+def test_suggest_titles_and_authors(suggest_client, new_book_data):
+    """Test prefix matches on titles and authors, ranked by number of books."""
+    data = suggest(suggest_client, '?prefix=the')
+    assert [item['text'] for item in data] == ['The Great Gatsby', 'The Hobbit']
+    assert data[0] == {'text': 'The Great Gatsby', 'type': 'title', 'books': 1}
+
+    suggest_client.post('/api/books', json=dict(new_book_data, title='The Silmarillion', author='J.R.R. Tolkien'))
+    data = suggest(suggest_client, '?prefix=j.r.r')
+    assert data == [{'text': 'J.R.R. Tolkien', 'type': 'author', 'books': 2}]
+    assert [item['text'] for item in suggest(suggest_client, '?prefix=The%20')][:1] == ['The Great Gatsby']
+    assert len(suggest(suggest_client, '?prefix=the&limit=1')) == 1
+
+    assert suggest_client.get('/api/books/suggest').status_code == 400
+
+def test_suggest_follows_writes(suggest_client, new_book_data):
+    """Test that created, renamed and deleted books change the suggestions."""
+    response = suggest_client.post('/api/books', json=dict(new_book_data, title='Hobbit Tales'))
+    book_id = json.loads(response.data)['data']['id']
+    assert [item['text'] for item in suggest(suggest_client, '?prefix=hob')] == ['Hobbit Tales']
+
+    suggest_client.put(f'/api/books/{book_id}', json=dict(new_book_data, title='Middle-earth Tales'))
+    assert suggest(suggest_client, '?prefix=hob') == []
+    assert suggest(suggest_client, '?prefix=middle earth')[0]['text'] == 'Middle-earth Tales'
+
+    suggest_client.delete(f'/api/books/{book_id}')
+    assert suggest(suggest_client, '?prefix=middle') == []
+
+    # Writes that bypass the API reach the index through the triggers too
+    db.session.add(Book(title='Harper Valley', author='Nobody', genre='Fiction', publication_year=1990))
+    db.session.commit()
+    assert [item['text'] for item in suggest(suggest_client, '?prefix=harp')] == ['Harper Lee', 'Harper Valley']
+
+def test_suggest_sums_spellings(suggest_client, new_book_data):
+    """Test that titles differing in case or punctuation count all their books, in the index and the overlay."""
+    for title in ('Dune', 'DUNE', 'Dune!', 'Dunes', 'Dunes'):
+        suggest_client.post('/api/books', json=dict(new_book_data, title=title))
+    assert suggest(suggest_client, '?prefix=dun') == [
+        {'text': 'DUNE', 'type': 'title', 'books': 3},
+        {'text': 'Dunes', 'type': 'title', 'books': 2},
+    ]
+
+    # Written after the index was built, so counted through the overlay
+    for title in ('dunes', 'Dunes.', 'dune'):
+        suggest_client.post('/api/books', json=dict(new_book_data, title=title))
+    assert suggest(suggest_client, '?prefix=dun') == [
+        {'text': 'DUNE', 'type': 'title', 'books': 4},
+        {'text': 'Dunes', 'type': 'title', 'books': 4},
+    ]
+
+def test_suggestions_maintained_is_checked_once(test_app, init_database, monkeypatch):
+    """Test that the table lookup runs once per app, not on every request."""
+    test_app.extensions.pop('suggestions_maintained', None)
+    assert suggestions_maintained() is True
+    monkeypatch.setattr(app.suggest, 'inspect', None)
+    assert suggestions_maintained() is True
+
+def test_query_suggestions_escapes_wildcards(init_database):
+    """Test that % and _ in the prefix are not LIKE wildcards."""
+    db.session.add(Book(title='100% Pure', author='A_B', genre='Fiction', publication_year=2000))
+    db.session.commit()
+
+    assert [item['text'] for item in query_suggestions('100%', 10)] == ['100% Pure']
+    assert query_suggestions('%', 10) == []
+    assert query_suggestions('_he', 10) == []
+
+def test_query_suggestions_fallback(init_database):
+    """Test the grouped SQL used when the suggestion table is missing."""
+    assert query_suggestions('the', 10) == [
+        {'text': 'The Great Gatsby', 'type': 'title', 'books': 1},
+        {'text': 'The Hobbit', 'type': 'title', 'books': 1},
+    ]
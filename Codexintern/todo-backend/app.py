@@ -1,25 +1,97 @@
 from flask import Flask, render_template
-from config import Config
-from models import db
+from config import config_by_name
+from models import db, User
+from security import password_hasher, user_claims
+from metrics import RequestMetrics
 from routes import routes
 from flask_jwt_extended import JWTManager
+from flask_migrate import Migrate, stamp, upgrade
+from sqlalchemy import event, inspect
 import os
 
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+MIGRATIONS_DIR = os.path.join(BASE_DIR, "migrations")
+# First revision, matching the schema db.create_all() used to build
+INITIAL_REVISION = "5a7e0c1d2b43"
+
 app = Flask(__name__, static_folder="static", template_folder="templates")
-app.config.from_object(Config)
+app.config.from_object(config_by_name[os.environ.get("APP_CONFIG", "default")])
 
 db.init_app(app)
+password_hasher.init_app(app)
+user_claims.init_app(app)
+migrate = Migrate(app, db, directory=MIGRATIONS_DIR)
 app.register_blueprint(routes)
 
 jwt = JWTManager(app)
+metrics = RequestMetrics(app)
+
+@jwt.user_lookup_loader
+def load_user_claims(jwt_header, jwt_data):
+    """
+    Resolve the token's user through the claims cache; None rejects the
+    token. The username the token was issued for must still match, so a
+    token outlives neither a rename nor a deleted user whose id SQLite
+    hands to a new account.
+
+    Invalidation on user changes only reaches this process's cache, so
+    other workers may accept a changed or deleted user's token for up to
+    USER_CLAIMS_CACHE_TTL seconds.
+    """
+    identity = jwt_data[app.config["JWT_IDENTITY_CLAIM"]]
+
+    def load():
+        user = db.session.get(User, identity)
+        return user.claims() if user else None
+
+    claims = user_claims.get_or_load(identity, load)
+    if claims is None or claims["username"] != jwt_data.get("username"):
+        return None
+    return claims
+
+def init_sqlite_pragmas():
+    """Run the SQLITE_PRAGMAS config on every new SQLite connection"""
+    pragmas = app.config["SQLITE_PRAGMAS"]
+    if not pragmas or db.engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(db.engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+def upgrade_database():
+    """
+    Bring the database schema up to date, adopting pre-migration databases.
+    Run it once per deploy with `flask --app app upgrade-db`, not from every
+    process that imports the app: workers migrating the same file at once
+    fail on each other's schema changes.
+    """
+    tables = inspect(db.engine).get_table_names()
+    if "todo" in tables and "alembic_version" not in tables:
+        # Created by db.create_all() before migrations existed
+        stamp(directory=MIGRATIONS_DIR, revision=INITIAL_REVISION)
+    upgrade(directory=MIGRATIONS_DIR)
+
+@app.cli.command("upgrade-db")
+def upgrade_db_command():
+    """Migrate the database to the latest revision."""
+    upgrade_database()
 
 with app.app_context():
-    os.makedirs("instance", exist_ok=True)
-    db.create_all()
+    os.makedirs(os.path.join(BASE_DIR, "instance"), exist_ok=True)
+    init_sqlite_pragmas()
 
 @app.route("/")
 def home():
     return render_template("index.html")
 
 if __name__ == "__main__":
+    # The development server is a single process, so it can migrate itself
+    with app.app_context():
+        upgrade_database()
     app.run(debug=True)
@@ -0,0 +1,49 @@
+"""
+pytest-benchmark microbenchmarks for the hot todo handlers, called
+through the Flask test client so JWT checks and serialization count.
+
+    pytest benchmarks                                  # print timings
+    pytest benchmarks --benchmark-autosave             # store a baseline
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=min:25%
+
+Autosaved runs go to benchmarks/baselines/<machine>/, which is not
+committed: they are raw per-machine timings, so record and compare them
+on the same machine. BENCH_TODOS and BENCH_USERS set the data size;
+login cost follows PASSWORD_HASH_*.
+"""
+from common import BENCH_PASSWORD
+
+
+def request(client, method, path, status, **kwargs):
+    def run():
+        response = client.open(path, method=method, **kwargs)
+        assert response.status_code == status
+        return response
+    return run
+
+
+def test_get_todos(benchmark, client, auth_headers):
+    benchmark(request(client, "GET", "/todos", 200, headers=auth_headers))
+
+
+def test_get_todos_open(benchmark, client, auth_headers):
+    benchmark(request(client, "GET", "/todos?done=false", 200, headers=auth_headers))
+
+
+def test_get_todos_delta(benchmark, client, auth_headers):
+    # Seed the benchmarked user explicitly: with few todos per user the
+    # random spread may give them none, and then there is no sync token
+    client.post("/todos", json={"title": "before sync"}, headers=auth_headers)
+    token = client.get("/todos", headers=auth_headers).get_json()["sync_token"]
+    for i in range(10):
+        client.post("/todos", json={"title": f"after sync {i}"}, headers=auth_headers)
+    benchmark(request(client, "GET", f"/todos?updated_since={token}", 200, headers=auth_headers))
+
+
+def test_create_todo(benchmark, client, auth_headers):
+    benchmark(request(client, "POST", "/todos", 201, json={"title": "benchmark"}, headers=auth_headers))
+
+
+def test_login(benchmark, client, todo_app):
+    credentials = {"username": f"user{todo_app[1] // 3}", "password": BENCH_PASSWORD}
+    benchmark(request(client, "POST", "/login", 200, json=credentials))
@@ -0,0 +1,146 @@
+"""
+HTTP load test of the todo API: each scenario runs for --duration seconds
+with --clients keep-alive clients, each acting as a different user, and
+reports RPS and p50/p95/p99 latency. Results are compared with a stored
+baseline and the script exits with status 1 on a regression beyond
+--tolerance.
+
+    python benchmarks/bench_load.py                    # compare with the baseline
+    python benchmarks/bench_load.py --save-baseline    # record a new baseline
+    python benchmarks/bench_load.py --db /tmp/todo.db  # data from generate_data.py
+
+Baselines are machine specific: record one on the machine (or CI runner
+class) that will run the comparison.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+
+from common import BENCH_PASSWORD, load_app, make_database, start_server
+from http_load import run_load
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+
+def scenarios(tokens, users):
+    """name -> next_request(rng) returning (method, path, body, expected statuses)"""
+    def authorized(method, path, body=None, expected=(200,)):
+        def next_request(rng):
+            return method, path, body, expected, {"Authorization": "Bearer " + rng.choice(tokens)}
+        return next_request
+
+    def login(rng):
+        body = json.dumps({"username": f"user{rng.randint(1, users)}", "password": BENCH_PASSWORD})
+        return "POST", "/login", body.encode("utf-8"), (200,)
+
+    return {
+        "get_todos": authorized("GET", "/todos"),
+        "get_todos_open": authorized("GET", "/todos?done=false"),
+        "create_todo": authorized("POST", "/todos", b'{"title": "load test"}', (201,)),
+        "login": login,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression messages, empty if every scenario is within tolerance"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['rps']:.0f} req/s vs baseline {base['rps']:.0f}")
+        if result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']:.1f} ms vs baseline {base['p95_ms']:.1f}")
+    return regressions
+
+
+def issue_tokens(app, users, count):
+    """Access tokens for `count` users spread over the id range"""
+    from flask_jwt_extended import create_access_token
+    step = max(1, users // count)
+    with app.app_context():
+        return [
+            create_access_token(identity=user_id, additional_claims={"username": f"user{user_id}"})
+            for user_id in range(1, users + 1, step)
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--todos", type=int, default=100000, help="todos to seed when no --db is given")
+    parser.add_argument("--users", type=int, default=1000, help="users to seed when no --db is given")
+    parser.add_argument("--db", help="existing database built by generate_data.py")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--scenario", action="append", help="run only these scenarios")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--baseline", help="baseline file (default: baselines/load.json)")
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, "load.json")
+
+    if args.db:
+        db_path = os.path.abspath(args.db)
+        app = load_app(db_path)
+        connection = sqlite3.connect(db_path)
+        users, todos = (connection.execute(f"SELECT count(*) FROM {table}").fetchone()[0] for table in ("user", "todo"))
+        connection.close()
+    else:
+        users, todos = args.users, args.todos
+        app, db_path = make_database(users, todos)
+    settings = {"clients": args.clients, "duration": args.duration, "todos": todos, "users": users}
+
+    selected = scenarios(issue_tokens(app, users, 1000), users)
+    if args.scenario:
+        selected = {name: selected[name] for name in args.scenario}
+
+    results = {}
+    process, port = start_server(db_path)
+    try:
+        print(f"{todos} todos, {users} users, {args.clients} clients, {args.duration:.0f}s per scenario")
+        print(f"{'scenario':<16}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for name, next_request in selected.items():
+            result = asyncio.run(run_load("127.0.0.1", port, next_request, args.clients, args.duration))
+            results[name] = result.summary()
+            print(f"{name:<16}{result.rps:>10.0f}{result.percentile(0.5):>10.1f}"
+                  f"{result.percentile(0.95):>10.1f}{result.percentile(0.99):>10.1f}{result.errors:>8}")
+    finally:
+        process.terminate()
+        process.wait()
+        if not args.db:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, "w") as handle:
+            json.dump({"settings": settings, "results": results}, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+        print(f"baseline saved to {baseline_path}")
+        return
+
+    if not os.path.exists(baseline_path):
+        print(f"no baseline at {baseline_path}; run with --save-baseline to record one")
+        return
+    with open(baseline_path) as handle:
+        baseline = json.load(handle)
+    if baseline["settings"] != settings:
+        print(f"baseline was recorded with {baseline['settings']}, not comparing")
+        return
+
+    regressions = compare(results, baseline["results"], args.tolerance)
+    for message in regressions:
+        print("REGRESSION", message)
+    if regressions:
+        sys.exit(1)
+    print(f"no regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Per-request latency of the todo endpoints on a large table, with and
+without the todo indexes.
+
+    python benchmarks/bench_todos.py --todos 10000000 --users 100000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+
+from common import INDEXES, load_app, seed, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--todos", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    handle, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+
+    try:
+        app = load_app(db_path)
+        from flask_jwt_extended import create_access_token
+        from werkzeug.security import generate_password_hash
+
+        seed(db_path, args.users, args.todos, generate_password_hash("benchmark"))
+        client = app.test_client()
+        user_id = args.users // 2
+        with app.app_context():
+            headers = {"Authorization": "Bearer " + create_access_token(identity=user_id)}
+            todo_id = sqlite3.connect(db_path).execute(
+                "SELECT id FROM todo WHERE user_id = ? LIMIT 1", (user_id,)
+            ).fetchone()[0]
+
+        requests = [
+            ("GET /todos", lambda: client.get("/todos", headers=headers)),
+            ("GET /todos?done=false", lambda: client.get("/todos?done=false", headers=headers)),
+            ("PUT /todos/<id>", lambda: client.put(f"/todos/{todo_id}", json={"title": "renamed"}, headers=headers)),
+            ("PATCH mark-done", lambda: client.patch(f"/todos/{todo_id}/mark-done", headers=headers)),
+        ]
+
+        print(f"{args.todos} todos across {args.users} users")
+        print(f"{'request':<24}{'no index p50':>14}{'p95':>10}{'indexed p50':>14}{'p95':>10}")
+        connection = sqlite3.connect(db_path)
+        for name, request in requests:
+            for index in INDEXES:
+                connection.execute(f"DROP INDEX IF EXISTS {index}")
+            connection.commit()
+            bare = timed(request, max(3, args.repeat // 10))
+
+            for statement in INDEXES.values():
+                connection.execute(statement)
+            connection.commit()
+            indexed = timed(request, args.repeat)
+            print(f"{name:<24}{bare[0]:>12.2f}ms{bare[1]:>8.2f}ms{indexed[0]:>12.2f}ms{indexed[1]:>8.2f}ms")
+        connection.close()
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Shared helpers for the benchmark scripts in this directory.
+Run the scripts from the todo-backend directory, e.g.
+`python benchmarks/bench_todos.py --todos 1000000`.
+"""
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+# The HTTP load driver is shared with book-catalog-api's benchmarks
+sys.path.insert(0, os.path.abspath(os.path.join(BASE_DIR, "..", "benchmarks")))
+
+from http_load import free_port, wait_for_port
+
+INDEXES = {
+    "ix_todo_user_id": "CREATE INDEX ix_todo_user_id ON todo (user_id) WHERE deleted_at IS NULL",
+    "ix_todo_user_id_done_id": "CREATE INDEX ix_todo_user_id_done_id ON todo (user_id, done, id) WHERE deleted_at IS NULL",
+    "ix_todo_user_id_change_seq": "CREATE INDEX ix_todo_user_id_change_seq ON todo (user_id, change_seq, id)",
+    "ix_todo_change_seq": "CREATE INDEX ix_todo_change_seq ON todo (change_seq)",
+}
+
+
+def seed(db_path, users, todos, password_hash, batch_size=100000):
+    """Fill the migrated database with users and todos spread across them"""
+    rng = random.Random(42)
+    connection = sqlite3.connect(db_path)
+    connection.execute("PRAGMA synchronous = OFF")
+    connection.execute("PRAGMA journal_mode = MEMORY")
+    connection.executemany(
+        "INSERT INTO user (id, username, password_hash) VALUES (?, ?, ?)",
+        ((i, f"user{i}", password_hash) for i in range(1, users + 1))
+    )
+    for start in range(0, todos, batch_size):
+        rows = [
+            (f"todo {i}", "", rng.random() < 0.5, rng.randint(1, users), "2024-01-01 00:00:00.000000", i + 1)
+            for i in range(start, min(start + batch_size, todos))
+        ]
+        connection.executemany(
+            "INSERT INTO todo (title, description, done, user_id, updated_at, change_seq) VALUES (?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        connection.commit()
+    connection.execute("ANALYZE")
+    connection.commit()
+    connection.close()
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+# Every seeded user logs in with this password
+BENCH_PASSWORD = "benchmark"
+
+
+def load_app(db_path):
+    """Import the app against db_path and migrate its schema"""
+    os.environ["DATABASE_URL"] = "sqlite:///" + db_path
+    from app import app, upgrade_database
+    with app.app_context():
+        upgrade_database()
+    return app
+
+
+def make_database(users, todos, db_path=None):
+    """
+    Create a migrated SQLite file with seeded users and todos.
+    Returns: (app, db_path); the caller removes the file.
+    """
+    if db_path is None:
+        handle, db_path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        os.remove(db_path)
+
+    app = load_app(db_path)
+    from security import password_hasher
+    # Hash with the configured parameters so logins don't trigger a rehash
+    seed(db_path, users, todos, password_hasher.hash(BENCH_PASSWORD))
+    return app, db_path
+
+
+def start_server(db_path, **env):
+    """Serve the app with the production profile from a subprocess. Returns (process, port)."""
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL="sqlite:///" + db_path, APP_CONFIG="production", **env)
+    command = [
+        sys.executable, "-c",
+        "import sys; from werkzeug.serving import run_simple; from app import app; "
+        "run_simple('127.0.0.1', int(sys.argv[1]), app, threaded=True)",
+        str(port)
+    ]
+    process = subprocess.Popen(command, cwd=BASE_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port, process)
+    except RuntimeError:
+        process.kill()
+        raise
+    return process, port
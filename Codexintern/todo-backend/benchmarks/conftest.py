@@ -0,0 +1,27 @@
+import os
+import pytest
+from common import BENCH_PASSWORD, make_database
+
+
+@pytest.fixture(scope="session")
+def todo_app():
+    """App over BENCH_TODOS todos (default 100000) spread across BENCH_USERS users (default 1000)"""
+    users = int(os.environ.get("BENCH_USERS", 1000))
+    app, db_path = make_database(users, int(os.environ.get("BENCH_TODOS", 100000)))
+    yield app, users
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+@pytest.fixture
+def client(todo_app):
+    return todo_app[0].test_client()
+
+
+@pytest.fixture
+def auth_headers(client, todo_app):
+    """Bearer token for a user in the middle of the id range"""
+    username = f"user{todo_app[1] // 2}"
+    token = client.post("/login", json={"username": username, "password": BENCH_PASSWORD}).get_json()["token"]
+    return {"Authorization": "Bearer " + token}
@@ -0,0 +1,34 @@
+"""
+Build a migrated SQLite database of synthetic users and todos, from 1k up
+to 10M todos, for the benchmarks and for trying the app at scale. Every
+user is named user<N> and logs in with the password "benchmark".
+
+    python benchmarks/generate_data.py --todos 10000000 --users 100000 --out /tmp/todo.db
+    DATABASE_URL=sqlite:////tmp/todo.db python app.py
+"""
+import argparse
+import os
+import time
+
+from common import make_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--todos", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--out", required=True, help="SQLite file to create")
+    args = parser.parse_args()
+
+    out = os.path.abspath(args.out)
+    if os.path.exists(out):
+        parser.error(f"{out} already exists")
+
+    start = time.perf_counter()
+    make_database(args.users, args.todos, out)
+    elapsed = time.perf_counter() - start
+    print(f"{args.todos} todos for {args.users} users written to {out} in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
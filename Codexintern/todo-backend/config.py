@@ -4,9 +4,67 @@ BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
 class Config:
     # SQLite database file inside "instance" folder
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(BASE_DIR, 'instance', 'todo.db')
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
+        'sqlite:///' + os.path.join(BASE_DIR, 'instance', 'todo.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
     # Secret key for session & JWT
     SECRET_KEY = "supersecretkey"  
     JWT_SECRET_KEY = "jwt-secret-string"  # used by flask-jwt-extended
+
+    # Password hashing cost. Raising it slows down every login; users with
+    # older hashes are rehashed in the background when they next log in.
+    PASSWORD_HASH_ALGORITHM = os.environ.get('PASSWORD_HASH_ALGORITHM', 'pbkdf2:sha256')
+    PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', 600000))
+    # Work factor when PASSWORD_HASH_ALGORITHM is scrypt; must be a power of two
+    PASSWORD_SCRYPT_N = int(os.environ.get('PASSWORD_SCRYPT_N', 2 ** 15))
+    # Threads that may hash at the same time, per process
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+
+    # Cached user claims for authenticated requests. A change to a user only
+    # drops the entry in the process that made it; other workers keep
+    # accepting the old claims for up to the TTL.
+    USER_CLAIMS_CACHE_SIZE = 1024
+    USER_CLAIMS_CACHE_TTL = 30  # seconds
+
+    # Request metrics on /metrics (Prometheus text format). Server-Timing
+    # headers expose internals, so they are opt-in.
+    METRICS_ENABLED = True
+    METRICS_SERVER_TIMING = os.environ.get('METRICS_SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+    # Log a warning when one request runs the same SQL statement this often
+    METRICS_N_PLUS_ONE_THRESHOLD = 10
+
+    # PRAGMA name -> value run on every new SQLite connection
+    SQLITE_PRAGMAS = {}
+
+
+class ProductionConfig(Config):
+    # Tuned for several gunicorn workers sharing one SQLite file: WAL lets
+    # reads run alongside the writer, synchronous=NORMAL skips an fsync per
+    # commit (still crash-safe in WAL mode), mmap speeds up reads and the
+    # busy timeout makes writers wait instead of failing with "database is locked"
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'busy_timeout': 5000,
+    }
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': 30,
+    }
+
+
+class TestingConfig(Config):
+    TESTING = True
+    # Cheap hashes keep registration and login fast in tests
+    PASSWORD_HASH_ITERATIONS = 1000
+
+
+# Selected with the APP_CONFIG environment variable
+config_by_name = {
+    'default': Config,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
+}
@@ -0,0 +1,32 @@
+"""add todo sync columns
+
+Revision ID: 9b3f4e6a1c07
+Revises: 5a7e0c1d2b43
+Create Date: 2026-10-17 10:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b3f4e6a1c07'
+down_revision = '5a7e0c1d2b43'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows get the epoch as updated_at: they predate any sync token
+    with op.batch_alter_table('todo', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=False,
+                                      server_default='1970-01-01 00:00:00.000000'))
+        batch_op.add_column(sa.Column('deleted_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    # Soft-deleted rows would reappear without deleted_at, so purge them
+    op.execute('DELETE FROM todo WHERE deleted_at IS NOT NULL')
+    with op.batch_alter_table('todo', schema=None) as batch_op:
+        batch_op.drop_column('deleted_at')
+        batch_op.drop_column('updated_at')
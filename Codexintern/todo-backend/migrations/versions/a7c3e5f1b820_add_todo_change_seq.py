@@ -0,0 +1,47 @@
+"""add todo change seq
+
+Revision ID: a7c3e5f1b820
+Revises: e4a9c7b2d615
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e5f1b820'
+down_revision = 'e4a9c7b2d615'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('todo', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('change_seq', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.drop_index('ix_todo_user_id_updated_at')
+
+    # Number existing rows in the order updated_at gave them
+    op.execute(
+        'UPDATE todo SET change_seq = ranked.seq FROM '
+        '(SELECT id, row_number() OVER (ORDER BY updated_at, id) AS seq FROM todo) AS ranked '
+        'WHERE todo.id = ranked.id'
+    )
+
+    # The default only served the backfill; a row written without a seq must
+    # fail rather than sort before every change clients have already seen
+    with op.batch_alter_table('todo', schema=None) as batch_op:
+        batch_op.alter_column('change_seq', existing_type=sa.Integer(), existing_nullable=False, server_default=None)
+        batch_op.create_index('ix_todo_user_id_change_seq', ['user_id', 'change_seq', 'id'], unique=False)
+        batch_op.create_index('ix_todo_change_seq', ['change_seq'], unique=False)
+
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('ANALYZE')
+
+
+def downgrade():
+    with op.batch_alter_table('todo', schema=None) as batch_op:
+        batch_op.drop_index('ix_todo_change_seq')
+        batch_op.drop_index('ix_todo_user_id_change_seq')
+        batch_op.create_index('ix_todo_user_id_updated_at', ['user_id', 'updated_at', 'id'], unique=False)
+        batch_op.drop_column('change_seq')
@@ -0,0 +1,35 @@
+"""add todo indexes
+
+Revision ID: c2d8a5f3e914
+Revises: 9b3f4e6a1c07
+Create Date: 2026-10-17 10:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2d8a5f3e914'
+down_revision = '9b3f4e6a1c07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('todo', schema=None) as batch_op:
+        batch_op.create_index('ix_todo_user_id', ['user_id'], unique=False,
+                              sqlite_where=sa.text('deleted_at IS NULL'))
+        batch_op.create_index('ix_todo_user_id_done_id', ['user_id', 'done', 'id'], unique=False,
+                              sqlite_where=sa.text('deleted_at IS NULL'))
+        batch_op.create_index('ix_todo_user_id_updated_at', ['user_id', 'updated_at', 'id'], unique=False)
+
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('ANALYZE')
+
+
+def downgrade():
+    with op.batch_alter_table('todo', schema=None) as batch_op:
+        batch_op.drop_index('ix_todo_user_id_updated_at')
+        batch_op.drop_index('ix_todo_user_id_done_id')
+        batch_op.drop_index('ix_todo_user_id')
@@ -1,24 +1,66 @@
+from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import event
+from security import password_hasher, user_claims
 
 db = SQLAlchemy()
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    # scrypt hashes are longer than 128 characters
+    password_hash = db.Column(db.String(255), nullable=False)
     todos = db.relationship('Todo', backref='user', lazy=True)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password_hash)
+
+    def claims(self):
+        """Attributes embedded in access tokens and kept in the claims cache"""
+        return {"id": self.id, "username": self.username}
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_user_claims(mapper, connection, target):
+    user_claims.invalidate(target.id)
+
+
+# Next position in the change stream, evaluated by the database inside the
+# writing statement. SQLite runs one write transaction at a time, from its
+# first write to its commit, so values grow in commit order; a timestamp
+# taken in Python before the commit does not.
+NEXT_CHANGE_SEQ = db.text("(SELECT coalesce(max(change_seq), 0) + 1 FROM todo)")
 
 
 class Todo(db.Model):
+    # Every query is scoped to one user and skips soft-deleted rows, so the
+    # listing indexes are partial and lead with user_id. SQLite appends the
+    # rowid to each index, which makes (user_id) serve ORDER BY id as well.
+    # ix_todo_change_seq keeps max(change_seq) to one index probe per write.
+    __table_args__ = (
+        db.Index('ix_todo_user_id', 'user_id', sqlite_where=db.text('deleted_at IS NULL')),
+        db.Index('ix_todo_user_id_done_id', 'user_id', 'done', 'id', sqlite_where=db.text('deleted_at IS NULL')),
+        db.Index('ix_todo_user_id_change_seq', 'user_id', 'change_seq', 'id'),
+        db.Index('ix_todo_change_seq', 'change_seq'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(120), nullable=False)
     description = db.Column(db.String(250))
     done = db.Column(db.Boolean, default=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Every change moves change_seq past all committed changes so clients can
+    # sync deltas; deletes are soft so they show up in the delta too
+    change_seq = db.Column(db.Integer, nullable=False, default=NEXT_CHANGE_SEQ, onupdate=NEXT_CHANGE_SEQ)
+    deleted_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {"id": self.id, "title": self.title, "description": self.description, "done": self.done}
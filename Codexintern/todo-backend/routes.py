@@ -1,20 +1,83 @@
-from flask import Blueprint, request, jsonify
+import base64
+import binascii
+from datetime import datetime
+from flask import Blueprint, current_app, request, jsonify
+from sqlalchemy import and_, or_, bindparam, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
 from models import db, Todo, User
+from security import password_hasher, user_claims
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 
 routes = Blueprint("routes", __name__)
 
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+MAX_BATCH_OPERATIONS = 500
+BATCH_OPS = ("create", "update", "mark_done", "delete")
+TITLE_MAX_LENGTH = Todo.title.type.length
+DESCRIPTION_MAX_LENGTH = Todo.description.type.length
+
+# ---------- SYNC HELPERS ----------
+def encode_sync_token(change_seq, todo_id):
+    """Opaque position in a user's change stream, ordered by (change_seq, id)"""
+    raw = f"{change_seq}|{todo_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_sync_token(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        change_seq, todo_id = raw.rsplit("|", 1)
+        return int(change_seq), int(todo_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("Invalid sync token")
+
+def current_sync_token(user_id):
+    """Token for the newest change of this user, or None if they have no todos"""
+    latest = db.session.query(Todo.change_seq, Todo.id).filter(Todo.user_id == user_id) \
+        .order_by(Todo.change_seq.desc(), Todo.id.desc()).first()
+    return encode_sync_token(*latest) if latest else None
+
+def request_limit():
+    limit = request.args.get("limit", DEFAULT_LIMIT, type=int)
+    return max(1, min(limit, MAX_LIMIT))
+
+def live_todos(user_id):
+    """All queries go through here: scoped to the owner, soft-deleted rows excluded"""
+    return Todo.query.filter(Todo.user_id == user_id, Todo.deleted_at.is_(None))
+
+def owned_todo_or_404(user_id, todo_id):
+    """Primary key lookup that also enforces ownership"""
+    return live_todos(user_id).filter(Todo.id == todo_id).first_or_404()
+
 # ---------- AUTH ----------
+def schedule_rehash(user, password):
+    """Upgrade an outdated password hash without delaying the login response"""
+    app = current_app._get_current_object()
+    user_id, old_hash = user.id, user.password_hash
+
+    def store(new_hash):
+        with app.app_context():
+            # Only replace the hash we verified, in case the password changed meanwhile
+            db.session.execute(
+                update(User).where(User.id == user_id, User.password_hash == old_hash)
+                .values(password_hash=new_hash)
+            )
+            db.session.commit()
+
+    password_hasher.rehash_in_background(password, store)
+
 @routes.route("/register", methods=["POST"])
 def register():
     data = request.get_json()
-    if User.query.filter_by(username=data["username"]).first():
-        return jsonify({"message": "User already exists"}), 400
-    
     new_user = User(username=data["username"])
     new_user.set_password(data["password"])
     db.session.add(new_user)
-    db.session.commit()
+    try:
+        # The unique constraint on username rejects duplicates in the same round-trip
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"message": "User already exists"}), 400
     return jsonify({"message": "User registered successfully"}), 201
 
 @routes.route("/login", methods=["POST"])
@@ -22,7 +85,11 @@ def login():
     data = request.get_json()
     user = User.query.filter_by(username=data["username"]).first()
     if user and user.check_password(data["password"]):
-        token = create_access_token(identity=user.id)
+        if user.password_needs_rehash():
+            schedule_rehash(user, data["password"])
+        claims = user.claims()
+        user_claims.set(user.id, claims)
+        token = create_access_token(identity=user.id, additional_claims={"username": claims["username"]})
         return jsonify({"token": token}), 200
     return jsonify({"message": "Invalid credentials"}), 401
 
@@ -35,20 +102,60 @@ def create_todo():
     new_todo = Todo(title=data["title"], description=data.get("description", ""), user_id=user_id)
     db.session.add(new_todo)
     db.session.commit()
-    return jsonify({"message": "Todo created successfully"}), 201
+    return jsonify({"message": "Todo created successfully", "todo": new_todo.to_dict()}), 201
 
 @routes.route("/todos", methods=["GET"])
 @jwt_required()
 def get_todos():
     user_id = get_jwt_identity()
-    todos = Todo.query.filter_by(user_id=user_id).all()
-    return jsonify([{"id": t.id, "title": t.title, "description": t.description, "done": t.done} for t in todos])
+    limit = request_limit()
+
+    # Delta mode: only what changed after the client's last sync token
+    updated_since = request.args.get("updated_since")
+    if updated_since:
+        try:
+            since_seq, since_id = decode_sync_token(updated_since)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
+        changes = Todo.query.filter(
+            Todo.user_id == user_id,
+            or_(Todo.change_seq > since_seq, and_(Todo.change_seq == since_seq, Todo.id > since_id))
+        ).order_by(Todo.change_seq, Todo.id).limit(limit + 1).all()
+
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        last = changes[-1] if changes else None
+        return jsonify({
+            "todos": [t.to_dict() for t in changes if t.deleted_at is None],
+            "deleted": [t.id for t in changes if t.deleted_at is not None],
+            "sync_token": encode_sync_token(last.change_seq, last.id) if last else updated_since,
+            "has_more": has_more
+        })
+
+    # Cursor pagination by id for the initial load
+    query = live_todos(user_id)
+    done = request.args.get("done")
+    if done is not None:
+        query = query.filter(Todo.done == (done.lower() in ("true", "1", "yes")))
+    after = request.args.get("after", type=int)
+    if after is not None:
+        query = query.filter(Todo.id > after)
+    todos = query.order_by(Todo.id).limit(limit + 1).all()
+
+    has_more = len(todos) > limit
+    todos = todos[:limit]
+    return jsonify({
+        "todos": [t.to_dict() for t in todos],
+        "next_cursor": todos[-1].id if has_more else None,
+        "sync_token": current_sync_token(user_id) if after is None else None
+    })
 
 @routes.route("/todos/<int:id>", methods=["PUT"])
 @jwt_required()
 def update_todo(id):
     user_id = get_jwt_identity()
-    todo = Todo.query.filter_by(id=id, user_id=user_id).first_or_404()
+    todo = owned_todo_or_404(user_id, id)
     data = request.get_json()
     todo.title = data.get("title", todo.title)
     todo.description = data.get("description", todo.description)
@@ -59,8 +166,9 @@ def update_todo(id):
 @jwt_required()
 def delete_todo(id):
     user_id = get_jwt_identity()
-    todo = Todo.query.filter_by(id=id, user_id=user_id).first_or_404()
-    db.session.delete(todo)
+    todo = owned_todo_or_404(user_id, id)
+    # Soft delete so the removal reaches clients through updated_since
+    todo.deleted_at = datetime.utcnow()
     db.session.commit()
     return jsonify({"message": "Todo deleted successfully"})
 
@@ -68,7 +176,107 @@ def delete_todo(id):
 @jwt_required()
 def mark_done(id):
     user_id = get_jwt_identity()
-    todo = Todo.query.filter_by(id=id, user_id=user_id).first_or_404()
+    todo = owned_todo_or_404(user_id, id)
     todo.done = True
     db.session.commit()
     return jsonify({"message": "Todo marked as done"})
+
+def batch_operation_error(op, operation):
+    """Why a batch operation cannot run, or None. Checked before any SQL so bad values fail alone."""
+    if op != "create" and (not isinstance(operation.get("id"), int) or isinstance(operation["id"], bool)):
+        return "id must be an integer"
+    title = operation.get("title")
+    if op == "create" and not title:
+        return "title is required"
+    if op in ("create", "update"):
+        if title is not None and not isinstance(title, str):
+            return "title must be a string"
+        if title is not None and not 0 < len(title) <= TITLE_MAX_LENGTH:
+            return f"title must be 1 to {TITLE_MAX_LENGTH} characters"
+        description = operation.get("description")
+        if description is not None and not isinstance(description, str):
+            return "description must be a string"
+        if description is not None and len(description) > DESCRIPTION_MAX_LENGTH:
+            return f"description must be at most {DESCRIPTION_MAX_LENGTH} characters"
+    return None
+
+@routes.route("/todos/batch", methods=["POST"])
+@jwt_required()
+def batch_todos():
+    """
+    Apply many operations in one transaction. Operations are grouped by
+    type and each group runs as one set-based statement, in the order
+    create, update, mark_done, delete.
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json(silent=True)
+    operations = data.get("operations") if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"message": "operations must be a non-empty list"}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({"message": f"At most {MAX_BATCH_OPERATIONS} operations per batch"}), 400
+
+    results = [None] * len(operations)
+    groups = {op: [] for op in BATCH_OPS}
+    for index, operation in enumerate(operations):
+        op = operation.get("op") if isinstance(operation, dict) else None
+        op = op.replace("-", "_") if isinstance(op, str) else None
+        if op not in BATCH_OPS:
+            results[index] = {"index": index, "status": "invalid", "message": "Unknown op"}
+            continue
+        error = batch_operation_error(op, operation)
+        if error:
+            results[index] = {"index": index, "op": op, "status": "invalid", "message": error}
+        else:
+            groups[op].append((index, operation))
+
+    # One SELECT tells which referenced ids this user owns
+    referenced = {operation["id"] for op in BATCH_OPS[1:] for _, operation in groups[op]}
+    owned = set(db.session.scalars(
+        select(Todo.id).where(Todo.user_id == user_id, Todo.deleted_at.is_(None), Todo.id.in_(referenced))
+    )) if referenced else set()
+    for op in BATCH_OPS[1:]:
+        for index, operation in groups[op]:
+            if operation["id"] not in owned:
+                results[index] = {"index": index, "op": op, "id": operation["id"], "status": "not_found"}
+        groups[op] = [(index, operation) for index, operation in groups[op] if operation["id"] in owned]
+
+    now = datetime.utcnow()
+    if groups["create"]:
+        ids = db.session.scalars(
+            insert(Todo).returning(Todo.id, sort_by_parameter_order=True),
+            [{"title": operation["title"], "description": operation.get("description", ""),
+              "done": False, "user_id": user_id, "updated_at": now}
+             for _, operation in groups["create"]]
+        ).all()
+        for (index, _), todo_id in zip(groups["create"], ids):
+            results[index] = {"index": index, "op": "create", "id": todo_id, "status": "ok"}
+
+    if groups["update"]:
+        # executemany; COALESCE keeps fields the operation does not mention
+        table = Todo.__table__
+        db.session.execute(
+            update(table).where(table.c.id == bindparam("todo_id"), table.c.user_id == user_id).values(
+                title=func.coalesce(bindparam("new_title"), table.c.title),
+                description=func.coalesce(bindparam("new_description"), table.c.description),
+                updated_at=now
+            ),
+            [{"todo_id": operation["id"], "new_title": operation.get("title"),
+              "new_description": operation.get("description")}
+             for _, operation in groups["update"]]
+        )
+
+    for op, values in (("mark_done", {"done": True}), ("delete", {"deleted_at": now})):
+        if groups[op]:
+            db.session.execute(
+                update(Todo).where(Todo.user_id == user_id, Todo.id.in_([o["id"] for _, o in groups[op]]))
+                .values(updated_at=now, **values)
+                .execution_options(synchronize_session=False)
+            )
+
+    db.session.commit()
+
+    for op in BATCH_OPS[1:]:
+        for index, operation in groups[op]:
+            results[index] = {"index": index, "op": op, "id": operation["id"], "status": "ok"}
+    return jsonify({"results": results})
@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+logger = logging.getLogger(__name__)
+
+class PasswordHasher:
+    """
+    Password hashing with a configurable cost.
+
+    Hashing and verification run on a small dedicated thread pool. hashlib
+    releases the GIL while it works, so the pool size caps how many cores a
+    burst of logins can take.
+    """
+
+    def __init__(self, app=None):
+        self.method = "pbkdf2:sha256:600000"
+        self.salt_length = 16
+        self.executor = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        algorithm = app.config.get("PASSWORD_HASH_ALGORITHM", "pbkdf2:sha256")
+        if algorithm == "scrypt":
+            # scrypt takes a power-of-two work factor (N) instead of an
+            # iteration count, with fixed r=8, p=1
+            cost = app.config.get("PASSWORD_SCRYPT_N", 2 ** 15)
+            self.method = f"scrypt:{cost}:8:1"
+            cost_error = None if cost > 1 and not cost & (cost - 1) else "N must be a power of two"
+            # Werkzeug's memory limit rejects N below 128
+            probe = "scrypt:128:8:1"
+        else:
+            cost = app.config.get("PASSWORD_HASH_ITERATIONS", 600000)
+            self.method = f"{algorithm}:{cost}"
+            cost_error = None if cost > 0 else "iterations must be positive"
+            probe = f"{algorithm}:1"
+        self.salt_length = app.config.get("PASSWORD_SALT_LENGTH", 16)
+        # Fail at startup rather than on the first /register or login. The
+        # method is tried at the lowest cost, so every process that starts
+        # does not pay for a full hash.
+        try:
+            if cost_error:
+                raise ValueError(cost_error)
+            generate_password_hash("", probe, self.salt_length)
+        except ValueError as e:
+            raise ValueError(f"Invalid password hash method {self.method!r}: {e}") from e
+
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+        self.executor = ThreadPoolExecutor(
+            max_workers=app.config.get("PASSWORD_HASH_WORKERS", 2),
+            thread_name_prefix="password-hash"
+        )
+        app.extensions["password_hasher"] = self
+
+    def _run(self, func, *args):
+        """Run func on the pool and wait: this caps concurrent hashing cost, the request thread still blocks"""
+        if self.executor is None:
+            return func(*args)
+        return self.executor.submit(func, *args).result()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if the hash was made with other parameters than the configured ones"""
+        return password_hash.split("$", 1)[0] != self.method
+
+    def rehash_in_background(self, password, on_done):
+        """Compute a hash with the current parameters off the request path"""
+        if self.executor is None:
+            return on_done(generate_password_hash(password, self.method, self.salt_length))
+        def callback(future):
+            if future.exception() is not None:
+                logger.error("Rehashing a password failed", exc_info=future.exception())
+                return
+            try:
+                on_done(future.result())
+            except Exception:
+                logger.exception("Storing a rehashed password failed")
+
+        future = self.executor.submit(generate_password_hash, password, self.method, self.salt_length)
+        future.add_done_callback(callback)
+        return future
+
+
+class UserClaimsCache:
+    """
+    LRU cache of user claims keyed by JWT identity, with a per-entry TTL.
+
+    Authenticated requests resolve their user through this cache, so a
+    user is loaded from the database at most once per TTL. Entries are
+    dropped whenever the user row changes through the ORM (see models.py),
+    but only in the process that changed it: the TTL bounds how long other
+    processes serve the old claims.
+    """
+
+    def __init__(self, app=None):
+        self.maxsize = 1024
+        self.ttl = 30
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.maxsize = app.config.get("USER_CLAIMS_CACHE_SIZE", 1024)
+        self.ttl = app.config.get("USER_CLAIMS_CACHE_TTL", 30)
+        self.clear()
+        app.extensions["user_claims"] = self
+
+    def get(self, identity):
+        with self._lock:
+            entry = self._data.get(identity)
+            if entry is None:
+                return None
+            claims, expires = entry
+            if expires < time.monotonic():
+                del self._data[identity]
+                return None
+            self._data.move_to_end(identity)
+            return claims
+
+    def set(self, identity, claims):
+        with self._lock:
+            self._data[identity] = (claims, time.monotonic() + self.ttl)
+            self._data.move_to_end(identity)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_load(self, identity, loader):
+        """Return cached claims, calling loader() on a miss; None is not cached"""
+        claims = self.get(identity)
+        if claims is None:
+            claims = loader()
+            if claims is not None:
+                self.set(identity, claims)
+        return claims
+
+    def invalidate(self, identity):
+        with self._lock:
+            self._data.pop(identity, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+password_hasher = PasswordHasher()
+user_claims = UserClaimsCache()
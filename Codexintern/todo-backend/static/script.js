@@ -1,4 +1,6 @@
 let token = "";
+let todosById = new Map();
+let syncToken = null;
 
 // Register User
 async function register() {
@@ -53,22 +55,61 @@ async function createTodo() {
 
     document.getElementById("todoTitle").value = "";
     document.getElementById("todoDesc").value = "";
-    loadTodos();
+    syncTodos();
 }
 
-// Load Todos
+// Load Todos (first load walks the pages once, then we only sync changes)
 async function loadTodos() {
-    const res = await fetch("/todos", {
-        headers: { "Authorization": "Bearer " + token }
-    });
-    const todos = await res.json();
+    todosById = new Map();
+    syncToken = null;
+
+    let after = null;
+    do {
+        const url = after === null ? "/todos" : `/todos?after=${after}`;
+        const res = await fetch(url, {
+            headers: { "Authorization": "Bearer " + token }
+        });
+        const page = await res.json();
+
+        page.todos.forEach(todo => todosById.set(todo.id, todo));
+        if (after === null) syncToken = page.sync_token;
+        after = page.next_cursor;
+    } while (after !== null);
+
+    renderTodos();
+}
+
+// Sync Todos (fetch only what changed since the last sync)
+async function syncTodos() {
+    if (!syncToken) return loadTodos();
+
+    let hasMore = true;
+    while (hasMore) {
+        const res = await fetch(`/todos?updated_since=${encodeURIComponent(syncToken)}`, {
+            headers: { "Authorization": "Bearer " + token }
+        });
+        // A token the server no longer accepts: start over with a full load
+        if (res.status === 400) return loadTodos();
+        const delta = await res.json();
+
+        delta.todos.forEach(todo => todosById.set(todo.id, todo));
+        delta.deleted.forEach(id => todosById.delete(id));
+        syncToken = delta.sync_token;
+        hasMore = delta.has_more;
+    }
+
+    renderTodos();
+}
 
+// Render Todos
+function renderTodos() {
     const list = document.getElementById("todoList");
     list.innerHTML = "";
 
-    todos.forEach(todo => {
+    [...todosById.values()].sort((a, b) => a.id - b.id).forEach(todo => {
         const li = document.createElement("li");
         li.innerHTML = `
+            <input type="checkbox" class="todo-select" value="${todo.id}">
             <span class="${todo.done ? 'done' : ''}">
                 ${todo.title} - ${todo.description}
             </span>
@@ -88,7 +129,7 @@ async function markDone(id) {
         method: "PATCH",
         headers: { "Authorization": "Bearer " + token }
     });
-    loadTodos();
+    syncTodos();
 }
 
 // Update Todo (prompt for new values)
@@ -105,7 +146,7 @@ async function updateTodo(id) {
         },
         body: JSON.stringify({ title: newTitle, description: newDesc })
     });
-    loadTodos();
+    syncTodos();
 }
 
 // Delete Todo
@@ -114,5 +155,38 @@ async function deleteTodo(id) {
         method: "DELETE",
         headers: { "Authorization": "Bearer " + token }
     });
-    loadTodos();
+    syncTodos();
+}
+
+// Batch: send many operations in one request and one transaction
+async function batchTodos(operations) {
+    if (operations.length === 0) return;
+
+    const res = await fetch("/todos/batch", {
+        method: "POST",
+        headers: {
+            "Content-Type": "application/json",
+            "Authorization": "Bearer " + token
+        },
+        body: JSON.stringify({ operations })
+    });
+    const data = await res.json();
+
+    const failed = (data.results || []).filter(result => result.status !== "ok");
+    if (!res.ok || failed.length) alert(data.message || `${failed.length} operation(s) failed`);
+    syncTodos();
+}
+
+function selectedTodoIds() {
+    return [...document.querySelectorAll(".todo-select:checked")].map(box => Number(box.value));
+}
+
+// Mark selected todos as done
+function markSelectedDone() {
+    batchTodos(selectedTodoIds().map(id => ({ op: "mark_done", id })));
+}
+
+// Delete selected todos
+function deleteSelected() {
+    batchTodos(selectedTodoIds().map(id => ({ op: "delete", id })));
 }
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import pytest
+
+# app.py builds the app on import, so point it at a scratch file before
+# anything imports it
+_handle, DB_PATH = tempfile.mkstemp(suffix=".db")
+os.close(_handle)
+os.environ["DATABASE_URL"] = "sqlite:///" + DB_PATH
+os.environ["APP_CONFIG"] = "testing"
+
+from app import app as flask_app, upgrade_database
+from models import db, Todo, User
+from security import user_claims
+
+PASSWORD = "secret"
+
+with flask_app.app_context():
+    upgrade_database()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    with flask_app.app_context():
+        db.engine.dispose()
+    os.remove(DB_PATH)
+
+
+@pytest.fixture
+def app():
+    """The migrated app; every test starts without users or todos"""
+    with flask_app.app_context():
+        yield flask_app
+        db.session.rollback()
+        Todo.query.delete()
+        User.query.delete()
+        db.session.commit()
+        user_claims.clear()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, username, password=PASSWORD):
+    """Register a user if needed and return their bearer headers"""
+    client.post("/register", json={"username": username, "password": password})
+    response = client.post("/login", json={"username": username, "password": password})
+    return {"Authorization": "Bearer " + response.get_json()["token"]}
+
+
+@pytest.fixture
+def auth_headers(client):
+    return login(client, "alice")
+
+
+@pytest.fixture
+def other_headers(client):
+    return login(client, "bob")
@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import event
+from models import db, User
+from security import user_claims
+from tests.conftest import login
+
+
+@pytest.fixture
+def user_queries(app):
+    """SQL statements that read the user table, recorded while the test runs"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM user' in statement:
+            statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", record)
+
+
+def test_login_returns_a_token(client):
+    client.post("/register", json={"username": "alice", "password": "secret"})
+
+    assert client.post("/login", json={"username": "alice", "password": "secret"}).status_code == 200
+    assert client.post("/login", json={"username": "alice", "password": "wrong"}).status_code == 401
+
+
+def test_register_rejects_duplicates(client):
+    assert client.post("/register", json={"username": "alice", "password": "secret"}).status_code == 201
+    assert client.post("/register", json={"username": "alice", "password": "other"}).status_code == 400
+
+
+def test_cached_claims_skip_the_user_lookup(client, auth_headers, user_queries):
+    for _ in range(3):
+        assert client.get("/todos", headers=auth_headers).status_code == 200
+
+    assert user_queries == []
+
+
+def test_claims_are_loaded_once_after_a_miss(client, auth_headers, user_queries):
+    user_claims.clear()
+
+    for _ in range(3):
+        assert client.get("/todos", headers=auth_headers).status_code == 200
+
+    assert len(user_queries) == 1
+
+
+def test_user_change_invalidates_cached_claims(app, client, auth_headers, user_queries):
+    user = User.query.filter_by(username="alice").one()
+    user.set_password("changed")
+    db.session.commit()
+
+    assert user_claims.get(user.id) is None
+    assert client.get("/todos", headers=auth_headers).status_code == 200
+    assert len(user_queries) == 2  # the query above, then the reload
+
+
+def test_renamed_user_token_is_rejected(app, client, auth_headers):
+    user = User.query.filter_by(username="alice").one()
+    user.username = "alicia"
+    db.session.commit()
+
+    assert client.get("/todos", headers=auth_headers).status_code == 401
+
+
+def test_deleted_user_token_is_rejected(app, client, auth_headers):
+    db.session.delete(User.query.filter_by(username="alice").one())
+    db.session.commit()
+
+    assert client.get("/todos", headers=auth_headers).status_code == 401
+
+
+def test_token_does_not_carry_over_to_a_reused_id(app, client, auth_headers):
+    user = User.query.filter_by(username="alice").one()
+    user_id = user.id
+    db.session.delete(user)
+    db.session.commit()
+
+    # SQLite reuses the highest rowid once it is free
+    new_headers = login(client, "mallory")
+    assert User.query.filter_by(username="mallory").one().id == user_id
+
+    assert client.get("/todos", headers=new_headers).status_code == 200
+    assert client.get("/todos", headers=auth_headers).status_code == 401
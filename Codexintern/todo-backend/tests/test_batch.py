@@ -0,0 +1,82 @@
+import pytest
+
+
+def batch(client, headers, *operations):
+    response = client.post("/todos/batch", json={"operations": list(operations)}, headers=headers)
+    assert response.status_code == 200
+    return response.get_json()["results"]
+
+
+def titles(client, headers):
+    return {todo["id"]: todo["title"] for todo in client.get("/todos", headers=headers).get_json()["todos"]}
+
+
+def test_batch_applies_every_operation(client, auth_headers):
+    first, second = (result["id"] for result in batch(
+        client, auth_headers, {"op": "create", "title": "first"}, {"op": "create", "title": "second"}
+    ))
+
+    results = batch(
+        client, auth_headers,
+        {"op": "update", "id": first, "title": "renamed"},
+        {"op": "mark-done", "id": first},
+        {"op": "delete", "id": second},
+        {"op": "create", "title": "third", "description": "details"},
+    )
+
+    assert [result["status"] for result in results] == ["ok"] * 4
+    todos = client.get("/todos", headers=auth_headers).get_json()["todos"]
+    assert [(todo["title"], todo["done"]) for todo in todos] == [("renamed", True), ("third", False)]
+    assert todos[1]["description"] == "details"
+
+
+@pytest.mark.parametrize("operation, message", [
+    ({"op": "create"}, "title is required"),
+    ({"op": "create", "title": ["x"]}, "title must be a string"),
+    ({"op": "create", "title": "x" * 121}, "title must be 1 to 120 characters"),
+    ({"op": "create", "title": "x", "description": {"a": 1}}, "description must be a string"),
+    ({"op": "create", "title": "x", "description": "x" * 251}, "description must be at most 250 characters"),
+    ({"op": "update", "id": True, "title": "x"}, "id must be an integer"),
+    ({"op": "update", "id": "1", "title": "x"}, "id must be an integer"),
+    ({"op": "update", "id": 1, "title": 5}, "title must be a string"),
+    ({"op": "update", "id": 1, "title": ""}, "title must be 1 to 120 characters"),
+    ({"op": "delete"}, "id must be an integer"),
+])
+def test_batch_rejects_invalid_operations(client, auth_headers, operation, message):
+    results = batch(client, auth_headers, operation)
+
+    assert results[0]["status"] == "invalid"
+    assert results[0]["message"] == message
+
+
+def test_batch_mixes_valid_invalid_and_missing(client, auth_headers, other_headers):
+    mine = batch(client, auth_headers, {"op": "create", "title": "mine"})[0]["id"]
+    theirs = batch(client, other_headers, {"op": "create", "title": "theirs"})[0]["id"]
+
+    results = batch(
+        client, auth_headers,
+        {"op": "create", "title": "new"},
+        {"op": "create", "title": ["x"]},
+        {"op": "update", "id": mine, "title": "changed"},
+        {"op": "update", "id": True, "title": "x"},
+        {"op": "delete", "id": theirs},
+        {"op": "mark_done", "id": 999999},
+        {"op": "archive", "id": mine},
+    )
+
+    assert [result["status"] for result in results] == [
+        "ok", "invalid", "ok", "invalid", "not_found", "not_found", "invalid"
+    ]
+    assert [result["index"] for result in results] == list(range(7))
+    assert set(titles(client, auth_headers).values()) == {"changed", "new"}
+    assert list(titles(client, other_headers).values()) == ["theirs"]
+
+
+def test_batch_rejects_malformed_requests(client, auth_headers):
+    assert client.post("/todos/batch", json={"operations": []}, headers=auth_headers).status_code == 400
+    assert client.post("/todos/batch", json={"operations": "x"}, headers=auth_headers).status_code == 400
+    assert client.post("/todos/batch", json=[{"op": "create", "title": "x"}], headers=auth_headers).status_code == 400
+    assert client.post("/todos/batch", json="x", headers=auth_headers).status_code == 400
+    assert client.post("/todos/batch", data="{", headers=auth_headers).status_code == 400
+    too_many = [{"op": "create", "title": "x"}] * 501
+    assert client.post("/todos/batch", json={"operations": too_many}, headers=auth_headers).status_code == 400
@@ -0,0 +1,42 @@
+import pytest
+from flask import g
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from metrics import RequestStats
+from models import db
+
+
+def sample(client, series):
+    """Current value of one metric series on /metrics, 0 if absent"""
+    for line in client.get("/metrics").get_data(as_text=True).splitlines():
+        name, _, value = line.rpartition(" ")
+        if name == series:
+            return float(value)
+    return 0
+
+
+def test_metrics_report_todo_requests(client, auth_headers):
+    listed = 'http_requests_total{endpoint="/todos",method="GET",status="200"}'
+    created = 'http_requests_total{endpoint="/todos",method="POST",status="201"}'
+    queried = 'http_request_sql_queries_count{endpoint="/todos",method="GET"}'
+    before = {series: sample(client, series) for series in (listed, created, queried)}
+
+    client.post("/todos", json={"title": "measured"}, headers=auth_headers)
+    client.get("/todos", headers=auth_headers)
+
+    assert {series: sample(client, series) - count for series, count in before.items()} == {
+        listed: 1, created: 1, queried: 1
+    }
+    assert 'endpoint="/metrics"' not in client.get("/metrics").get_data(as_text=True)
+
+
+def test_failed_statements_leave_no_timing_state(app):
+    with app.test_request_context("/todos"):
+        g.request_stats = RequestStats()
+        with pytest.raises(OperationalError):
+            db.session.execute(text("SELECT * FROM no_such_table"))
+        db.session.rollback()
+        db.session.execute(text("SELECT 1"))
+
+        assert dict(db.session.connection().info) == {}
+        assert g.request_stats.queries == 1
@@ -0,0 +1,32 @@
+import pytest
+from flask_migrate import downgrade, upgrade
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from app import MIGRATIONS_DIR
+from models import db
+
+
+def test_change_seq_backfill_follows_updated_at(app):
+    """Test that existing todos are numbered in updated_at order when change_seq is added."""
+    downgrade(directory=MIGRATIONS_DIR, revision="e4a9c7b2d615")
+    try:
+        db.session.execute(text("INSERT INTO user (id, username, password_hash) VALUES (1, 'alice', 'x')"))
+        db.session.execute(text(
+            "INSERT INTO todo (id, title, done, user_id, updated_at) VALUES "
+            "(1, 'b', 0, 1, '2024-01-02 00:00:00'), (2, 'a', 0, 1, '2024-01-01 00:00:00'), "
+            "(3, 'c', 0, 1, '2024-01-02 00:00:00')"
+        ))
+        db.session.commit()
+    finally:
+        upgrade(directory=MIGRATIONS_DIR)
+
+    rows = db.session.execute(text("SELECT id, change_seq FROM todo ORDER BY change_seq")).all()
+    assert [tuple(row) for row in rows] == [(2, 1), (1, 2), (3, 3)]
+
+
+def test_change_seq_has_no_server_default(app):
+    """Test that a todo written without a change_seq is rejected instead of getting seq 0."""
+    db.session.execute(text("INSERT INTO user (id, username, password_hash) VALUES (1, 'alice', 'x')"))
+    with pytest.raises(IntegrityError):
+        db.session.execute(text("INSERT INTO todo (title, done, user_id) VALUES ('a', 0, 1)"))
+    db.session.rollback()
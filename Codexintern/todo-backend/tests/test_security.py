@@ -0,0 +1,100 @@
+import logging
+import time
+import pytest
+from flask import Flask
+from werkzeug.security import generate_password_hash
+from models import db, User
+from security import PasswordHasher
+
+
+def hasher(**config):
+    app = Flask(__name__)
+    app.config.update(config)
+    return PasswordHasher(app)
+
+
+def test_hash_and_verify():
+    passwords = hasher(PASSWORD_HASH_ITERATIONS=1000)
+    password_hash = passwords.hash("secret")
+
+    assert password_hash.startswith("pbkdf2:sha256:1000$")
+    assert passwords.verify(password_hash, "secret")
+    assert not passwords.verify(password_hash, "wrong")
+
+
+def test_needs_rehash_when_parameters_change():
+    old = hasher(PASSWORD_HASH_ITERATIONS=1000).hash("secret")
+
+    assert not hasher(PASSWORD_HASH_ITERATIONS=1000).needs_rehash(old)
+    assert hasher(PASSWORD_HASH_ITERATIONS=2000).needs_rehash(old)
+    assert hasher(PASSWORD_HASH_ALGORITHM="scrypt", PASSWORD_SCRYPT_N=2 ** 10).needs_rehash(old)
+
+
+def test_scrypt_uses_its_own_work_factor():
+    passwords = hasher(PASSWORD_HASH_ALGORITHM="scrypt", PASSWORD_HASH_ITERATIONS=600000, PASSWORD_SCRYPT_N=2 ** 10)
+    password_hash = passwords.hash("secret")
+
+    assert password_hash.startswith("scrypt:1024:8:1$")
+    assert passwords.verify(password_hash, "secret")
+
+
+@pytest.mark.parametrize("config", [
+    {"PASSWORD_HASH_ALGORITHM": "scrypt", "PASSWORD_SCRYPT_N": 600000},
+    {"PASSWORD_HASH_ALGORITHM": "pbkdf2:nosuchdigest"},
+])
+def test_invalid_method_fails_at_startup(config):
+    with pytest.raises(ValueError, match="Invalid password hash method"):
+        hasher(PASSWORD_HASH_ITERATIONS=1000, **config)
+
+
+def test_startup_check_does_not_pay_the_full_cost():
+    started = time.perf_counter()
+    hasher(PASSWORD_HASH_ITERATIONS=50_000_000)
+    assert time.perf_counter() - started < 1
+
+
+def test_failed_rehash_is_logged(caplog):
+    passwords = hasher(PASSWORD_HASH_ITERATIONS=1000)
+
+    def store(new_hash):
+        raise RuntimeError("database is locked")
+
+    with caplog.at_level(logging.ERROR, logger="security"):
+        passwords.rehash_in_background("secret", store).result()
+        passwords.executor.shutdown(wait=True)
+
+    assert "Storing a rehashed password failed" in caplog.text
+
+
+def test_failed_hash_is_logged(caplog):
+    passwords = hasher(PASSWORD_HASH_ITERATIONS=1000)
+    passwords.method = "scrypt:3:8:1"
+    stored = []
+
+    with caplog.at_level(logging.ERROR, logger="security"):
+        future = passwords.rehash_in_background("secret", stored.append)
+        passwords.executor.shutdown(wait=True)
+
+    assert isinstance(future.exception(), ValueError)
+    assert stored == []
+    assert "Rehashing a password failed" in caplog.text
+
+
+def test_login_rehashes_outdated_hash(app, client):
+    user = User(username="alice", password_hash=generate_password_hash("secret", "pbkdf2:sha256:2000"))
+    db.session.add(user)
+    db.session.commit()
+
+    response = client.post("/login", json={"username": "alice", "password": "secret"})
+    assert response.status_code == 200
+
+    # The new hash is stored by a pool thread after the response
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        db.session.expire_all()
+        if db.session.get(User, user.id).password_hash.startswith("pbkdf2:sha256:1000$"):
+            break
+        time.sleep(0.01)
+    stored = db.session.get(User, user.id)
+    assert stored.password_hash.startswith("pbkdf2:sha256:1000$")
+    assert stored.check_password("secret")
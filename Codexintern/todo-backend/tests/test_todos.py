@@ -0,0 +1,102 @@
+from datetime import datetime
+from models import db, Todo
+from routes import encode_sync_token
+
+
+def create(client, headers, title, **fields):
+    response = client.post("/todos", json={"title": title, **fields}, headers=headers)
+    assert response.status_code == 201
+    return response.get_json()["todo"]["id"]
+
+
+def test_pagination_walks_every_todo_once(client, auth_headers):
+    ids = [create(client, auth_headers, f"todo {i}") for i in range(5)]
+
+    seen, after = [], None
+    while True:
+        path = "/todos?limit=2" + (f"&after={after}" if after is not None else "")
+        data = client.get(path, headers=auth_headers).get_json()
+        seen.extend(todo["id"] for todo in data["todos"])
+        after = data["next_cursor"]
+        if after is None:
+            break
+
+    assert seen == ids
+
+
+def test_pagination_filters_by_done(client, auth_headers):
+    first = create(client, auth_headers, "first")
+    create(client, auth_headers, "second")
+    client.patch(f"/todos/{first}/mark-done", headers=auth_headers)
+
+    done = client.get("/todos?done=true", headers=auth_headers).get_json()
+    assert [todo["id"] for todo in done["todos"]] == [first]
+    assert len(client.get("/todos?done=false", headers=auth_headers).get_json()["todos"]) == 1
+
+
+def test_pagination_is_scoped_to_the_owner(client, auth_headers, other_headers):
+    create(client, auth_headers, "mine")
+
+    data = client.get("/todos", headers=other_headers).get_json()
+    assert data["todos"] == []
+    assert data["sync_token"] is None
+
+
+def test_delta_returns_changes_and_deletions(client, auth_headers):
+    kept = create(client, auth_headers, "kept")
+    removed = create(client, auth_headers, "removed")
+    token = client.get("/todos", headers=auth_headers).get_json()["sync_token"]
+
+    assert client.get(f"/todos?updated_since={token}", headers=auth_headers).get_json()["todos"] == []
+
+    client.put(f"/todos/{kept}", json={"title": "renamed"}, headers=auth_headers)
+    client.delete(f"/todos/{removed}", headers=auth_headers)
+    added = create(client, auth_headers, "added")
+
+    data = client.get(f"/todos?updated_since={token}", headers=auth_headers).get_json()
+    assert [todo["id"] for todo in data["todos"]] == [kept, added]
+    assert data["todos"][0]["title"] == "renamed"
+    assert data["deleted"] == [removed]
+    assert data["has_more"] is False
+
+    later = client.get(f"/todos?updated_since={data['sync_token']}", headers=auth_headers).get_json()
+    assert later["todos"] == [] and later["deleted"] == []
+    assert later["sync_token"] == data["sync_token"]
+
+
+def test_delta_pages_through_changes(client, auth_headers):
+    create(client, auth_headers, "first")
+    token = client.get("/todos", headers=auth_headers).get_json()["sync_token"]
+    ids = [create(client, auth_headers, f"todo {i}") for i in range(5)]
+
+    seen, has_more = [], True
+    while has_more:
+        data = client.get(f"/todos?updated_since={token}&limit=2", headers=auth_headers).get_json()
+        seen.extend(todo["id"] for todo in data["todos"])
+        token, has_more = data["sync_token"], data["has_more"]
+
+    assert seen == ids
+
+
+def test_delta_follows_commit_order_not_timestamps(app, client, auth_headers):
+    """A change stamped before the client's last sync but committed after it is still delivered."""
+    todo_id = create(client, auth_headers, "late")
+    create(client, auth_headers, "newer")
+    token = client.get("/todos", headers=auth_headers).get_json()["sync_token"]
+
+    # Like a transaction that took its timestamp early and committed late
+    todo = db.session.get(Todo, todo_id)
+    todo.title = "committed late"
+    todo.updated_at = datetime(2000, 1, 1)
+    db.session.commit()
+
+    data = client.get(f"/todos?updated_since={token}", headers=auth_headers).get_json()
+    assert [todo["title"] for todo in data["todos"]] == ["committed late"]
+
+
+def test_delta_rejects_invalid_tokens(client, auth_headers):
+    old_format = encode_sync_token("2024-01-01T00:00:00", 1)
+
+    for token in ("not-a-token", old_format):
+        response = client.get(f"/todos?updated_since={token}", headers=auth_headers)
+        assert response.status_code == 400